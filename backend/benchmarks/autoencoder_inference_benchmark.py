@@ -0,0 +1,84 @@
+"""
+Import time, RSS and predict throughput of the Keras vs NumPy autoencoder.
+
+Each backend is measured in a fresh interpreter so import cost and resident
+memory are attributed correctly.
+
+Usage (from backend/, after python -m src.recommenders.numpy_autoencoder):
+    python -m benchmarks.autoencoder_inference_benchmark --rows 500000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+{imports}
+import_s = time.perf_counter() - start
+
+start = time.perf_counter()
+model, scaler = {load}
+load_s = time.perf_counter() - start
+
+import numpy as np
+X = np.random.default_rng(0).uniform(size=({rows}, 9)).astype(np.float32)
+model.predict(X[:1], verbose=0)
+start = time.perf_counter()
+model.predict(X, batch_size={batch_size}, verbose=0)
+predict_s = time.perf_counter() - start
+
+start = time.perf_counter()
+for _ in range(100):
+    model.predict(X[:1], verbose=0)
+single_s = (time.perf_counter() - start) / 100
+
+print(json.dumps({{
+    "import_s": import_s,
+    "load_s": load_s,
+    "rows_per_s": {rows} / predict_s,
+    "single_ms": single_s * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+BACKENDS = {
+    "keras model.predict": {
+        "imports": "from src.recommenders.autoencoder import load_trained_model",
+        "load": "load_trained_model()",
+    },
+    "NumPy forward pass": {
+        "imports": "from src.recommenders.numpy_autoencoder import load_numpy_autoencoder",
+        "load": "load_numpy_autoencoder()",
+    },
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=8192)
+    args = parser.parse_args()
+
+    header = f"{'backend':<22}{'import':>10}{'load':>10}{'rows/s':>12}{'1-row':>10}{'peak RSS':>11}"
+    print(header)
+    print("-" * len(header))
+    for name, backend in BACKENDS.items():
+        script = _SCRIPT.format(rows=args.rows, batch_size=args.batch_size, **backend)
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            print(f"{name:<22}failed: {result.stderr.strip().splitlines()[-1]}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(
+            f"{name:<22}{r['import_s']:>9.2f}s{r['load_s']:>9.2f}s{r['rows_per_s']:>12,.0f}"
+            f"{r['single_ms']:>8.2f}ms{r['rss_mb']:>9.0f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Latency of /products searches from the local catalogue mirror vs the Kassal proxy.
+
+A fake Kassal catalogue of generated grocery names is crawled into a mirror in a
+temporary directory. The same search queries, some with filters and a sort, are
+then answered by the live path (AsyncKassalAPI against the stand-in server with
+a fixed latency) and by CatalogueMirror.search in a worker thread, as main.py
+calls it.
+
+Usage (from backend/):
+    python -m benchmarks.catalogue_mirror_benchmark --products 10000 --latency 0.08
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.catalogue_mirror import CatalogueMirror
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+BRANDS = ["Tine", "Q", "Gilde", "Prior", "Freia", "Nidar", "Stabburet", "Mills"]
+KINDS = ["melk", "yoghurt", "ost", "pølse", "kylling", "sjokolade", "kaffe", "brød"]
+VARIANTS = ["original", "lett", "økologisk", "mild", "ekstra", "mini", "familie"]
+SIZES = ["1l", "500g", "1kg", "250g", "1,5l", "4x125g"]
+
+
+def _catalogue(count: int, rng: random.Random) -> dict:
+    return {
+        i: " ".join(
+            [
+                rng.choice(BRANDS),
+                rng.choice(KINDS),
+                rng.choice(VARIANTS),
+                rng.choice(SIZES),
+            ]
+        )
+        for i in range(1, count + 1)
+    }
+
+
+def _queries(count: int, rng: random.Random) -> list:
+    queries = []
+    for _ in range(count):
+        query = {"search": f"{rng.choice(BRANDS)} {rng.choice(KINDS)}", "size": 20}
+        if rng.random() < 0.3:
+            query["price_max"] = rng.choice([20, 35, 50])
+        if rng.random() < 0.3:
+            query["sort"] = rng.choice(["price_asc", "name_asc"])
+        queries.append(query)
+    return queries
+
+
+def _report(name: str, latencies: list) -> None:
+    ms = np.array(latencies) * 1000
+    print(
+        f"{name:<22}{np.percentile(ms, 50):>9.2f}ms{np.percentile(ms, 99):>9.2f}ms"
+        f"{ms.mean():>9.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.08)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    products = _catalogue(args.products, rng)
+    queries = _queries(args.queries, rng)
+
+    with tempfile.TemporaryDirectory() as tmp, FakeKassalServer(
+        products=products
+    ) as server:
+        mirror = CatalogueMirror(Path(tmp) / "mirror.sqlite3")
+
+        async def run() -> None:
+            async with AsyncKassalAPI(
+                token="benchmark", base_url=server.base_url, rate_limit=None
+            ) as api:
+                start = time.perf_counter()
+                pages = await mirror.crawl(api)
+                print(
+                    f"Crawled {args.products} products in {pages} pages "
+                    f"in {time.perf_counter() - start:.1f}s"
+                )
+
+                server.latency = args.latency
+                live, local = [], []
+                for query in queries:
+                    start = time.perf_counter()
+                    await api.get_products(**query)
+                    live.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    result = await asyncio.to_thread(mirror.search, **query)
+                    local.append(time.perf_counter() - start)
+                    if result is None:
+                        await api.get_products(**query)  # Miss, the live fallback
+                        local[-1] = time.perf_counter() - start
+
+            header = f"{'path':<22}{'p50':>11}{'p99':>11}{'mean':>11}"
+            print(header)
+            print("-" * len(header))
+            _report("Kassal proxy", live)
+            _report("catalogue mirror", local)
+            print(f"mirror served {mirror.served}, fell back {mirror.fallbacks}")
+
+        asyncio.run(run())
+        mirror.close()
+
+
+if __name__ == "__main__":
+    main()
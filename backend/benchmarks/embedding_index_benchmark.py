@@ -0,0 +1,68 @@
+"""
+Latency and recall benchmark for the recipe embedding index.
+
+Compares the previous suggest_recipes similarity search (sample 6000 recipes,
+dense 6000x6000 cosine matrix, argsort every row) with a top-k query against the
+IVF index over the whole corpus. Embeddings are synthetic so the benchmark runs
+without the trained model.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_index_benchmark --rows 500000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from src.recommenders.embedding_index import EmbeddingIndex, recall_at_k
+
+
+def _previous_path(embeddings: np.ndarray, rng: np.random.Generator) -> None:
+    sample = embeddings[rng.choice(len(embeddings), size=6000, replace=False)]
+    similarity_matrix = cosine_similarity(sample)
+    for item_index in range(len(sample)):
+        sorted_indices = similarity_matrix[item_index].argsort()[::-1]
+        [
+            (similarity_matrix[item_index][idx], idx)
+            for idx in sorted_indices
+            if idx != item_index
+        ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Autoencoder outputs are nine non-negative, skewed nutrition values
+    embeddings = rng.gamma(2.0, 0.05, size=(args.rows, 9)).astype(np.float32)
+
+    start = time.perf_counter()
+    _previous_path(embeddings, rng)
+    previous = time.perf_counter() - start
+    print(f"previous path (6000x6000 matrix): {previous * 1000:10.1f} ms/request")
+
+    start = time.perf_counter()
+    index = EmbeddingIndex.build(embeddings)
+    print(f"index build ({index.n_lists} lists):     {time.perf_counter() - start:10.1f} s (offline)")
+
+    queries = embeddings[rng.choice(args.rows, size=args.queries, replace=False)]
+    for nprobe in (4, 8, 16, 32):
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, args.k, nprobe)
+        latency = (time.perf_counter() - start) / len(queries)
+        recall = recall_at_k(index, embeddings, queries[:50], args.k, nprobe)
+        print(
+            f"index query nprobe={nprobe:<3}           {latency * 1000:10.3f} ms/request"
+            f"   recall@{args.k}={recall:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
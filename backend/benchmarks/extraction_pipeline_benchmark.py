@@ -0,0 +1,69 @@
+"""
+Throughput of the catalogue extraction pipeline against a fake LLM endpoint.
+
+Synthetic catalogue pages for several vendors are extracted through a local
+stand-in for the OpenAI API with a fixed latency per image. Concurrency 1 is the
+previous one-page-at-a-time behaviour of scrape_discounts.py.
+
+Usage (from backend/):
+    python -m benchmarks.extraction_pipeline_benchmark --vendors 13 --pages 4
+"""
+
+import argparse
+import asyncio
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from src.extraction_pipeline import run_extraction
+from src.sales_service import make_openai_extractor
+from tests.fake_llm_server import FakeLLMServer
+
+
+def _write_pages(root: Path, vendors: int, pages: int) -> list:
+    rng = np.random.default_rng(0)
+    names = [f"vendor{v:02d}-no" for v in range(vendors)]
+    for name in names:
+        (root / name).mkdir()
+        for page in range(pages):
+            pixels = rng.integers(0, 255, size=(1800, 1200, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(root / name / f"page{page}.jpg", quality=85)
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--vendors", type=int, default=13)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        vendors = _write_pages(root, args.vendors, args.pages)
+        total = args.vendors * args.pages
+
+        header = f"{'concurrency':<14}{'wall':>9}{'images/s':>11}{'server images/s':>18}"
+        print(f"{total} pages, {args.latency:.2f}s model latency per page")
+        print(header)
+        print("-" * len(header))
+        for concurrency in (1, 4, 8, 16):
+            with FakeLLMServer(latency=args.latency) as server:
+                extractor = make_openai_extractor(
+                    api_key="benchmark", base_url=server.base_url
+                )
+                result = asyncio.run(
+                    run_extraction(
+                        vendors, extractor, images_root=root, concurrency=concurrency
+                    )
+                )
+            print(
+                f"{concurrency:<14}{result.seconds:>8.1f}s{result.images_per_second:>11.2f}"
+                f"{server.images_per_second():>18.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
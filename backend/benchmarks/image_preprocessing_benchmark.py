@@ -0,0 +1,183 @@
+"""
+Payload size, encode time and extraction accuracy of catalogue page preprocessing.
+
+The fixture set is a handful of generated catalogue pages (A4 and tall web
+flyers) with known product names and prices. By default accuracy is estimated
+with a legibility model: a product counts as read if it lies wholly inside a tile
+and its text is at least MIN_LEGIBLE_PX high after our downscaling and the
+model's own (fit 2048x2048, short side 768). Duplicates from tile overlaps that
+survive merging count against precision. With --live the pages are sent to the
+real model instead (needs OPENAI_API_KEY).
+
+Usage (from backend/):
+    python -m benchmarks.image_preprocessing_benchmark [--live]
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from src.image_preprocessing import PreprocessConfig, preprocess_page, tile_boxes
+from src.sales_service import (
+    SalesCatalog,
+    SalesItem,
+    Sale,
+    make_openai_extractor,
+    merge_tile_catalogs,
+)
+
+MIN_LEGIBLE_PX = 10
+FONT_PX = 18
+
+CONFIGS: Dict[str, PreprocessConfig] = {
+    "full size, q75": PreprocessConfig(max_dimension=None, quality=75),
+    "max 2048, q85 (default)": PreprocessConfig(),
+    "max 1536, q70, gray": PreprocessConfig(
+        max_dimension=1536, quality=70, grayscale=True
+    ),
+    "max 2048, q85, tiled": PreprocessConfig(tile_above_aspect=1.6),
+}
+
+NAMES = [
+    "Tine Helmelk",
+    "Grandiosa Original",
+    "Pepsi Max 1,5l",
+    "Norvegia 26%",
+    "Gilde Kjøttkaker",
+    "Freia Melkesjokolade",
+    "Coca-Cola Zero",
+    "Kvikk Lunsj",
+    "Jarlsberg Skiver",
+    "Stabburet Leverpostei",
+    "Toro Tomatsuppe",
+    "Friele Kaffe",
+    "Q Yoghurt Jordbær",
+    "Mills Majones",
+    "First Price Egg",
+    "Bama Bananer",
+    "Synnøve Gulost",
+    "Kavli Rekeost",
+    "Idun Ketchup",
+    "Nidar Stratos",
+]
+
+Truth = List[Tuple[str, float, Tuple[int, int, int, int]]]
+
+
+def make_page(width: int, height: int, rng: random.Random) -> Tuple[Image.Image, Truth]:
+    """A grid of product boxes with a name and a price, like a flyer page."""
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=FONT_PX)
+    truth: Truth = []
+    cell_w, cell_h = width // 3, 260
+    for top in range(40, height - cell_h, cell_h):
+        for col in range(3):
+            left = col * cell_w
+            draw.rectangle(
+                (left + 10, top + 10, left + cell_w - 10, top + cell_h - 10),
+                fill=(250, 230, 80),
+            )
+            name = rng.choice(NAMES)
+            price = float(rng.randint(10, 99))
+            draw.text((left + 30, top + 60), name, fill="black", font=font)
+            draw.text((left + 30, top + 140), f"{price:.0f},-", fill="red", font=font)
+            truth.append((name, price, (left, top, left + cell_w, top + cell_h)))
+    return image, truth
+
+
+def _model_scale(size: Tuple[int, int]) -> float:
+    """The downscaling the vision model applies to an image of this size."""
+    width, height = size
+    scale = min(1.0, 2048 / max(width, height))
+    return scale * min(1.0, 768 / (min(width, height) * scale))
+
+
+def simulated_extraction(
+    image: Image.Image, truth: Truth, config: PreprocessConfig
+) -> SalesCatalog:
+    catalogs = []
+    for box in tile_boxes(image.size, config):
+        tile_w, tile_h = box[2] - box[0], box[3] - box[1]
+        ours = 1.0
+        if config.max_dimension and max(tile_w, tile_h) > config.max_dimension:
+            ours = config.max_dimension / max(tile_w, tile_h)
+        scale = ours * _model_scale((tile_w * ours, tile_h * ours))
+        items = [
+            SalesItem(name=name, sale=Sale(type="price", price=price))
+            for name, price, (_, top, _, bottom) in truth
+            if top >= box[1] and bottom <= box[3] and FONT_PX * scale >= MIN_LEGIBLE_PX
+        ]
+        catalogs.append(SalesCatalog(products=items))
+    return merge_tile_catalogs(catalogs)
+
+
+def score(catalog: SalesCatalog, truth: Truth) -> Tuple[int, int]:
+    """Number of correctly read products, and number of products returned."""
+    expected: Dict[Tuple[str, float], int] = {}
+    for name, price, _ in truth:
+        expected[(name.casefold(), price)] = (
+            expected.get((name.casefold(), price), 0) + 1
+        )
+    correct = 0
+    for item in catalog.products:
+        key = (" ".join(item.name.casefold().split()), item.sale.price)
+        if expected.get(key):
+            expected[key] -= 1
+            correct += 1
+    return correct, len(catalog.products)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--live", action="store_true", help="Extract with the real model"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    fixtures = [make_page(1240, 1754, rng) for _ in range(3)]
+    fixtures += [make_page(1240, 4200, rng) for _ in range(3)]
+    tmp = Path(tempfile.mkdtemp())
+    for i, (image, _) in enumerate(fixtures):
+        image.save(tmp / f"page{i}.png")
+
+    header = (
+        f"{'config':<26}{'KB/page':>9}{'encode':>10}{'requests':>10}"
+        f"{'recall':>8}{'precision':>11}"
+    )
+    print(f"{len(fixtures)} fixture pages, {sum(len(t) for _, t in fixtures)} products")
+    print(header)
+    print("-" * len(header))
+    for name, config in CONFIGS.items():
+        total_bytes, encode_s, requests, correct, returned = 0, 0.0, 0, 0, 0
+        extractor = make_openai_extractor(preprocess=config) if args.live else None
+        for i, (image, truth) in enumerate(fixtures):
+            start = time.perf_counter()
+            tiles = preprocess_page(image, config)
+            encode_s += time.perf_counter() - start
+            total_bytes += sum(len(tile) for tile in tiles)
+            requests += len(tiles)
+            if extractor is not None:
+                catalog = asyncio.run(extractor(tmp / f"page{i}.png"))
+            else:
+                catalog = simulated_extraction(image, truth, config)
+            page_correct, page_returned = score(catalog, truth)
+            correct += page_correct
+            returned += page_returned
+        products = sum(len(t) for _, t in fixtures)
+        print(
+            f"{name:<26}{total_bytes / len(fixtures) / 1024:>9.0f}"
+            f"{encode_s / len(fixtures) * 1000:>8.0f}ms{requests / len(fixtures):>10.1f}"
+            f"{correct / products:>8.2f}{(correct / returned if returned else 0):>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Wall time and peak memory of loading recipes.csv and reviews.csv, untyped vs ingested.
+
+Compares a full, untyped pd.read_csv of both files, as the consumers used to do,
+with streaming them into typed Parquet partitions through ingest_csv, and then
+the training-data load of the autoencoder (the nine nutrition columns) from the
+CSV and from the partitions. Every scenario runs in a fresh process so peak RSS
+numbers are not polluted by the other scenarios.
+
+Usage (from backend/):
+    python -m benchmarks.ingestion_benchmark --recipes-csv data/recipes.csv --reviews-csv data/reviews.csv
+    python -m benchmarks.ingestion_benchmark --rows 200000 --reviews 600000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _read_csv_scenario(recipes_csv, reviews_csv, datasets_dir, queue) -> None:
+    import pandas as pd
+
+    start = time.perf_counter()
+    recipes = pd.read_csv(recipes_csv)
+    reviews = pd.read_csv(reviews_csv)
+    frame_mb = (
+        recipes.memory_usage(deep=True).sum() + reviews.memory_usage(deep=True).sum()
+    ) / 2**20
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), frame_mb))
+
+
+def _ingest_scenario(recipes_csv, reviews_csv, datasets_dir, queue) -> None:
+    from src.recommenders.ingestion import RECIPES, REVIEWS, ingest_csv
+
+    start = time.perf_counter()
+    ingest_csv(RECIPES, recipes_csv, datasets_dir)
+    ingest_csv(REVIEWS, reviews_csv, datasets_dir)
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), None))
+
+
+def _nutrition_csv_scenario(recipes_csv, reviews_csv, datasets_dir, queue) -> None:
+    import pandas as pd
+
+    from src.recommenders.recipe_store import NUTRITION_COLUMNS
+
+    start = time.perf_counter()
+    nutrition = pd.read_csv(recipes_csv)[NUTRITION_COLUMNS]
+    frame_mb = nutrition.memory_usage(deep=True).sum() / 2**20
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), frame_mb))
+
+
+def _nutrition_parquet_scenario(recipes_csv, reviews_csv, datasets_dir, queue) -> None:
+    from src.recommenders.ingestion import RECIPES, load_columns
+    from src.recommenders.recipe_store import NUTRITION_COLUMNS
+
+    start = time.perf_counter()
+    nutrition = load_columns(RECIPES, NUTRITION_COLUMNS, recipes_csv, datasets_dir)
+    frame_mb = nutrition.memory_usage(deep=True).sum() / 2**20
+    queue.put((time.perf_counter() - start, _peak_rss_mb(), frame_mb))
+
+
+def _write_synthetic(recipes_csv, reviews_csv, rows, reviews, queue) -> None:
+    from benchmarks.synthetic import write_recipes_csv, write_reviews_csv
+
+    if recipes_csv:
+        write_recipes_csv(recipes_csv, rows)
+    if reviews_csv:
+        write_reviews_csv(reviews_csv, reviews, rows)
+    queue.put(None)
+
+
+def _run(target, *args):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def _size_mb(path: Path) -> float:
+    if path.is_file():
+        return path.stat().st_size / 2**20
+    return sum(p.stat().st_size for p in path.rglob("*.parquet")) / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--recipes-csv", help="Path to recipes.csv (synthetic if omitted)"
+    )
+    parser.add_argument(
+        "--reviews-csv", help="Path to reviews.csv (synthetic if omitted)"
+    )
+    parser.add_argument("--rows", type=int, default=200_000, help="Synthetic recipes")
+    parser.add_argument(
+        "--reviews", type=int, default=600_000, help="Synthetic reviews"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recipes_csv = Path(args.recipes_csv or Path(tmp) / "recipes.csv")
+        reviews_csv = Path(args.reviews_csv or Path(tmp) / "reviews.csv")
+        # Written in a separate process as well: a spawned process starts with
+        # the peak RSS of its parent
+        _run(
+            _write_synthetic,
+            None if args.recipes_csv else str(recipes_csv),
+            None if args.reviews_csv else str(reviews_csv),
+            args.rows,
+            args.reviews,
+        )
+        datasets_dir = Path(tmp) / "datasets"
+        paths = (str(recipes_csv), str(reviews_csv), str(datasets_dir))
+
+        results = {
+            "pd.read_csv, both files": _run(_read_csv_scenario, *paths),
+            "ingest_csv, both files": _run(_ingest_scenario, *paths),
+            "nutrition from CSV": _run(_nutrition_csv_scenario, *paths),
+            "nutrition from Parquet": _run(_nutrition_parquet_scenario, *paths),
+        }
+        print(
+            f"recipes.csv {_size_mb(recipes_csv):.1f} MB -> "
+            f"{_size_mb(datasets_dir / 'recipes'):.1f} MB Parquet, "
+            f"reviews.csv {_size_mb(reviews_csv):.1f} MB -> "
+            f"{_size_mb(datasets_dir / 'reviews'):.1f} MB Parquet"
+        )
+
+    header = f"{'path':<26}{'wall time':>11}{'peak RSS':>12}{'frame':>11}"
+    print(header)
+    print("-" * len(header))
+    for name, (seconds, peak_mb, frame_mb) in results.items():
+        frame = f"{frame_mb:>9.1f}MB" if frame_mb is not None else f"{'-':>11}"
+        print(f"{name:<26}{seconds:>10.2f}s{peak_mb:>10.1f}MB{frame}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Latency of concurrent product lookups with the blocking vs the async Kassal client.
+
+Each simulated request is an ``async def`` handler that fetches one product, as
+in main.py. With the blocking client the handlers run one after another on the
+event loop; with the async client they overlap up to the concurrency limit over
+pooled keep-alive connections. The upstream is a local stand-in server with a
+fixed per-request latency, and the client-side rate limiter is disabled.
+
+Usage (from backend/):
+    python -m benchmarks.kassal_client_benchmark --requests 200 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.kassal_service import KassalAPI
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+async def _run(handler, requests: int) -> np.ndarray:
+    start = time.perf_counter()
+
+    async def timed(i: int) -> float:
+        await handler(i)
+        return time.perf_counter() - start
+
+    return np.array(await asyncio.gather(*(timed(i) for i in range(requests))))
+
+
+def _report(name: str, latencies: np.ndarray, connections: int) -> None:
+    wall = latencies.max()
+    print(
+        f"{name:<28}{np.percentile(latencies, 50) * 1000:>9.0f}ms"
+        f"{np.percentile(latencies, 99) * 1000:>9.0f}ms"
+        f"{len(latencies) / wall:>10.0f}/s{connections:>8}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    header = f"{'client':<28}{'p50':>11}{'p99':>11}{'throughput':>12}{'conns':>8}"
+    print(header)
+    print("-" * len(header))
+
+    with FakeKassalServer(latency=args.latency) as server:
+        sync_api = KassalAPI(token="benchmark")
+        sync_api.BASE_URL = server.base_url
+
+        async def blocking_handler(i: int) -> None:
+            sync_api.get_product_by_id(i % 100 + 1)
+
+        latencies = asyncio.run(_run(blocking_handler, args.requests))
+        _report("requests.get (blocking)", latencies, len(server.connections))
+
+    for concurrency in sorted({args.concurrency, args.concurrency * 2}):
+        with FakeKassalServer(latency=args.latency) as server:
+
+            async def run_async() -> np.ndarray:
+                async with AsyncKassalAPI(
+                    token="benchmark",
+                    base_url=server.base_url,
+                    max_concurrency=concurrency,
+                    max_connections=concurrency,
+                    rate_limit=None,
+                ) as api:
+
+                    async def handler(i: int) -> None:
+                        await api.get_product_by_id(i % 100 + 1)
+
+                    return await _run(handler, args.requests)
+
+            latencies = asyncio.run(run_async())
+            _report(f"AsyncKassalAPI (limit {concurrency})", latencies, len(server.connections))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Latency and hit ratio of /recipes/recommend planning with and without the plan cache.
+
+A stream of user profiles is drawn from a population (ages, weights and heights
+around typical values, all activity levels and objectives, a few tolerance and
+suggestion settings) and each is turned into breakfast, lunch, dinner and
+suggestion rows loaded as summary columns, the way the endpoint does it. The
+recipe store is built from a synthetic recipes.csv and the embeddings and model
+are small NumPy stand-ins, so the uncached time is a lower bound of the cost of
+the real autoencoder.
+
+Usage (from backend/):
+    python -m benchmarks.plan_cache_benchmark --rows 50000 --requests 5000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+import src.recommenders.meal_plan_service as meal_plan_service
+from benchmarks.synthetic import write_recipes_csv
+from src.recommenders.embedding_index import EmbeddingIndex
+from src.recommenders.meal_plan_service import daily_caloric_target, plan_rows
+from src.recommenders.model_registry import ModelRegistry
+from src.recommenders.models import SUMMARY_FIELDS
+from src.recommenders.plan_cache import PlanCache, plan_version
+from src.recommenders.recipe_store import RecipeStore, build_recipe_store
+
+ACTIVITY = ["sedentary", "lightly_active", "moderately_active", "very_active"]
+OBJECTIVES = ["weight_loss", "muscle_gain", "health_maintenance"]
+
+
+class _Scaler:
+    def transform(self, X):
+        return X / 4000
+
+
+class _Model:
+    def __init__(self, rng: np.random.Generator) -> None:
+        self.weights = rng.uniform(size=(9, 9)).astype(np.float32)
+
+    def predict(self, X, verbose=0):
+        return X @ self.weights
+
+
+def _profiles(count: int, rng: np.random.Generator) -> list:
+    return [
+        (
+            str(rng.choice(["male", "female"])),
+            round(float(rng.normal(75, 12)), 1),
+            round(float(rng.normal(175, 9))),
+            int(rng.integers(18, 70)),
+            str(rng.choice(ACTIVITY)),
+            str(rng.choice(OBJECTIVES)),
+            int(rng.choice([50, 100])),
+            int(rng.choice([5, 10])),
+        )
+        for _ in range(count)
+    ]
+
+
+def _plan(recipes, index, cache, profile):
+    *person, tolerance, suggestions = profile
+    daily_calories = daily_caloric_target(*person)
+
+    def compute_rows(calories):
+        return plan_rows(calories, recipes, tolerance, suggestions, index=index)
+
+    if cache is None:
+        rows = compute_rows(daily_calories)
+    else:
+        key = cache.key(
+            daily_calories, tolerance, suggestions, plan_version(recipes, index)
+        )
+        rows = cache.get_or_compute(key, lambda: compute_rows(key.daily_calories))
+    columns = [name for name in SUMMARY_FIELDS if name in recipes.columns]
+    return [recipes.take(r[:suggestions], columns=columns) for r in rows]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--buckets", type=int, nargs="+", default=[1, 10, 25])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_recipes_csv(Path(tmp) / "recipes.csv", args.rows)
+        recipes = RecipeStore(build_recipe_store(csv_path, Path(tmp) / "store"))
+        model, scaler = Path(tmp) / "model.keras", Path(tmp) / "scaler.pkl"
+        model.touch()
+        scaler.touch()
+        meal_plan_service.model_registry = ModelRegistry(
+            str(model), str(scaler), loader=lambda m, s: (_Model(rng), _Scaler())
+        )
+        embeddings = rng.gamma(2.0, 0.05, size=(args.rows, 9)).astype(np.float32)
+        index = EmbeddingIndex.build(embeddings, version=recipes.version)
+        profiles = _profiles(args.requests, rng)
+
+        header = (
+            f"{'planning':<22}{'p50':>10}{'p99':>10}{'mean':>10}"
+            f"{'hit ratio':>11}{'entries':>9}{'memory':>10}"
+        )
+        print(f"{args.rows} recipes, {args.requests} requests")
+        print(header)
+        print("-" * len(header))
+        scenarios = [("uncached", None)] + [
+            (f"cache, {bucket} kcal bucket", PlanCache(bucket=bucket))
+            for bucket in args.buckets
+        ]
+        for name, cache in scenarios:
+            _plan(recipes, index, None, profiles[0])  # Warm up
+            latencies = []
+            for profile in profiles:
+                start = time.perf_counter()
+                _plan(recipes, index, cache, profile)
+                latencies.append(time.perf_counter() - start)
+            ms = np.array(latencies) * 1000
+            status = cache.status() if cache else {}
+            hit_ratio = status.get("hit_ratio")
+            print(
+                f"{name:<22}{np.percentile(ms, 50):>8.3f}ms"
+                f"{np.percentile(ms, 99):>8.3f}ms{ms.mean():>8.3f}ms"
+                f"{hit_ratio if hit_ratio is not None else 0:>11.1%}"
+                f"{status.get('entries', 0):>9}"
+                f"{status.get('bytes', 0) / 1024:>8.1f}kB"
+            )
+
+
+if __name__ == "__main__":
+    main()
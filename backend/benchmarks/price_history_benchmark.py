@@ -0,0 +1,181 @@
+"""
+Time of price-history analytics over a whole catalogue, vectorised vs per product.
+
+A synthetic price history is generated for every product of a catalogue-sized
+set: a base price that occasionally changes, short campaigns at a reduced price
+and an occasional increase just before a campaign. It is recorded into a
+PriceHistoryStore in a temporary directory, and the window statistics, 30-day
+low discount check and price-drop detection are run over all products, once
+with the vectorised implementation and once with a plain Python loop over
+each product's history.
+
+Usage (from backend/):
+    python -m benchmarks.price_history_benchmark --products 50000 --points 30
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from src.kassal.price_history import DAY, PriceHistoryStore
+
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc).timestamp()
+
+
+def _history(points: int, rng: random.Random) -> List[Tuple[int, float]]:
+    price = round(rng.uniform(10, 150), 1)
+    ts = NOW - 365 * DAY
+    history = []
+    for _ in range(points):
+        ts += rng.expovariate(points / (365 * DAY))
+        if ts >= NOW:
+            break
+        roll = rng.random()
+        if roll < 0.15:
+            history.append((int(ts), round(price * rng.uniform(0.6, 0.9), 1)))
+        elif roll < 0.2:
+            price = round(price * rng.uniform(1.05, 1.2), 1)
+            history.append((int(ts), price))
+        else:
+            history.append((int(ts), price))
+    return history
+
+
+def _products(count: int, points: int, rng: random.Random) -> list:
+    products = []
+    for product_id in range(1, count + 1):
+        history = _history(points, rng)
+        products.append(
+            {
+                "id": product_id,
+                "name": f"Product {product_id}",
+                "price_history": [
+                    {
+                        "price": price,
+                        "date": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+                    }
+                    for ts, price in history
+                ],
+            }
+        )
+    return products
+
+
+def _loop_stats(histories: Dict[int, list], days: float) -> dict:
+    start = NOW - days * DAY
+    stats = {}
+    for product_id, history in histories.items():
+        window = [p for ts, p in history if ts >= start]
+        before = [p for ts, p in history if ts < start]
+        if before:
+            window.insert(0, before[-1])
+        if window:
+            stats[product_id] = (
+                min(window),
+                max(window),
+                statistics.median(window),
+                sum(window) / len(window),
+                window[-1],
+            )
+    return stats
+
+
+def _loop_discounts(histories: Dict[int, list], days: float) -> dict:
+    checks = {}
+    for product_id, history in histories.items():
+        if not history:
+            continue
+        current = history[-1][1]
+        i = len(history) - 1
+        while i > 0 and history[i - 1][1] == current:
+            i -= 1
+        since = history[i][0]
+        earlier = [p for ts, p in history[:i] if ts >= since - days * DAY]
+        before = [p for ts, p in history[:i] if ts < since - days * DAY]
+        if before:
+            earlier.append(before[-1])
+        low = min(earlier) if earlier else None
+        checks[product_id] = low is not None and current < low
+    return checks
+
+
+def _loop_drops(histories: Dict[int, list], days: float, min_pct: float) -> list:
+    drops = []
+    for product_id, (low, high, _, _, current) in _loop_stats(histories, days).items():
+        drop = (high - current) / high * 100
+        if drop >= min_pct:
+            drops.append((drop, product_id))
+    return sorted(drops, reverse=True)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--points", type=int, default=30)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    products = _products(args.products, args.points, rng)
+    histories = {
+        p["id"]: [
+            (int(datetime.fromisoformat(h["date"]).timestamp()), h["price"])
+            for h in p["price_history"]
+        ]
+        for p in products
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceHistoryStore(Path(tmp) / "prices.sqlite3")
+        observations, record_time = _timed(store.record, products)
+        _, load_time = _timed(store.frame)
+        print(
+            f"{args.products} products, {observations} observations: recorded in "
+            f"{record_time:.2f}s, loaded into columns in {load_time:.2f}s"
+        )
+
+        header = f"{'analysis':<26}{'vectorised':>12}{'loop':>12}{'speedup':>10}"
+        print(header)
+        print("-" * len(header))
+        runs = [
+            (
+                "30-day window stats",
+                lambda: store.window_stats(30, now=NOW),
+                lambda: _loop_stats(histories, 30),
+            ),
+            (
+                "30-day low discounts",
+                lambda: store.discounts(30),
+                lambda: _loop_discounts(histories, 30),
+            ),
+            (
+                "7-day drops >= 10%",
+                lambda: store.price_drops(7, 10, now=NOW),
+                lambda: _loop_drops(histories, 7, 10),
+            ),
+        ]
+        for name, vectorised, loop in runs:
+            result, fast = _timed(vectorised)
+            expected, slow = _timed(loop)
+            assert len(result) == len(expected), name
+            if name.startswith("30-day low"):
+                assert result["real_discount"].sum() == sum(expected.values())
+            print(
+                f"{name:<26}{fast * 1000:>10.0f}ms{slow * 1000:>10.0f}ms"
+                f"{slow / fast:>9.1f}x"
+            )
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
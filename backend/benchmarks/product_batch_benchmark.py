@@ -0,0 +1,87 @@
+"""
+Wall time of looking up N products with one batch request vs N sequential calls.
+
+A client needing N products (a shopping list, say) either calls
+GET /products/id/{id} once per product, one after another, or sends them all to
+POST /products/batch. Both go through the FastAPI app in process, backed by the
+async Kassal client with a memory cache, against a local stand-in for the Kassal
+API with a fixed per-request latency. The id list contains duplicates, as real
+lists do. The client-side rate limiter is off unless --rate-limit is given.
+
+Usage (from backend/):
+    python -m benchmarks.product_batch_benchmark --items 50 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+import main as api_app
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.cache import make_response_cache
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+async def _sequential(client: httpx.AsyncClient, ids: list) -> None:
+    for product_id in ids:
+        response = await client.get(f"/products/id/{product_id}")
+        response.raise_for_status()
+
+
+async def _batch(client: httpx.AsyncClient, ids: list) -> None:
+    response = await client.post("/products/batch", json={"ids": ids})
+    response.raise_for_status()
+    assert len(response.json()["ids"]) == len(ids)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    ids = [rng.randint(1, 100) for _ in range(args.items)]
+
+    header = f"{'lookup':<30}{'wall':>10}{'upstream calls':>16}"
+    print(f"{args.items} ids ({len(set(ids))} distinct), {args.latency * 1000:.0f}ms")
+    print(header)
+    print("-" * len(header))
+    scenarios = [
+        ("sequential GET, cold cache", _sequential, False),
+        ("batch POST, cold cache", _batch, False),
+        ("batch POST, warm cache", _batch, True),
+    ]
+    for name, lookup, warm in scenarios:
+        with FakeKassalServer(latency=args.latency) as server:
+
+            async def run() -> float:
+                api_app.kassal_api = AsyncKassalAPI(
+                    token="benchmark",
+                    base_url=server.base_url,
+                    rate_limit=args.rate_limit,
+                    cache=make_response_cache("memory"),
+                )
+                transport = httpx.ASGITransport(app=api_app.app)
+                async with httpx.AsyncClient(
+                    transport=transport, base_url="http://test"
+                ) as client:
+                    if warm:
+                        await lookup(client, ids)
+                        server.requests.clear()
+                    start = time.perf_counter()
+                    await lookup(client, ids)
+                    elapsed = time.perf_counter() - start
+                await api_app.kassal_api.aclose()
+                return elapsed
+
+            elapsed = asyncio.run(run())
+            print(f"{name:<30}{elapsed * 1000:>8.0f}ms{len(server.requests):>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Cold-start and per-request memory benchmark for the recipe store.
+
+Compares the previous /recipes/recommend data path, which ran pd.read_csv on
+every request, with the memory-mapped RecipeStore. Every scenario runs in a fresh
+process so peak RSS numbers are not polluted by the other scenario.
+
+Usage (from backend/):
+    python -m benchmarks.recipe_store_benchmark --csv data/recipes.csv
+    python -m benchmarks.recipe_store_benchmark --rows 100000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# A typical profile: 2000 kcal/day, split 50/40/10 over the three meals.
+CALORIC_TARGETS = [1000, 800, 200]
+TOLERANCE = 50
+SUGGESTIONS = 5
+PROFILE = ("male", 80.0, 180.0, 30, "sedentary", "health_maintenance")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _csv_scenario(csv_path: str, requests: int, queue: mp.Queue) -> None:
+    import pandas as pd
+
+    timings, peaks = [], []
+    for _ in range(requests):
+        tracemalloc.start()
+        start = time.perf_counter()
+        recipes_df = pd.read_csv(csv_path)
+        for target in CALORIC_TARGETS:
+            recipes_df[
+                (recipes_df["Calories"] >= target - TOLERANCE)
+                & (recipes_df["Calories"] <= target + TOLERANCE)
+            ].head(SUGGESTIONS)
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del recipes_df
+    queue.put(
+        {
+            "cold_start_s": timings[0],
+            "request_s": sum(timings) / len(timings),
+            "request_peak_mb": max(peaks) / 2**20,
+            "process_peak_rss_mb": _peak_rss_mb(),
+        }
+    )
+
+
+def _store_scenario(store_dir: str, requests: int, queue: mp.Queue) -> None:
+    from src.recommenders.meal_plan_service import (
+        daily_caloric_target,
+        meal_plan_rows,
+    )
+    from src.recommenders.recipe_store import RecipeStore
+
+    start = time.perf_counter()
+    store = RecipeStore(store_dir)
+    cold_start = time.perf_counter() - start
+
+    timings, peaks = [], []
+    for _ in range(requests):
+        tracemalloc.start()
+        start = time.perf_counter()
+        daily_calories = daily_caloric_target(*PROFILE)
+        for rows in meal_plan_rows(daily_calories, store, TOLERANCE, SUGGESTIONS):
+            store.take(rows)
+        timings.append(time.perf_counter() - start)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    queue.put(
+        {
+            "cold_start_s": cold_start,
+            "request_s": sum(timings) / len(timings),
+            "request_peak_mb": max(peaks) / 2**20,
+            "process_peak_rss_mb": _peak_rss_mb(),
+        }
+    )
+
+
+def _run(target, *args) -> dict:
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", help="Path to recipes.csv (synthetic if omitted)")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic rows")
+    parser.add_argument("--requests", type=int, default=3)
+    args = parser.parse_args()
+
+    from src.recommenders.recipe_store import build_recipe_store
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.csv:
+            csv_path = Path(args.csv)
+        else:
+            from benchmarks.synthetic import write_recipes_csv
+
+            csv_path = write_recipes_csv(Path(tmp) / "recipes.csv", args.rows)
+        print(f"CSV: {csv_path} ({csv_path.stat().st_size / 2**20:.1f} MB)")
+
+        start = time.perf_counter()
+        store_dir = build_recipe_store(csv_path, Path(tmp) / "recipe_store")
+        print(f"One-off store build: {time.perf_counter() - start:.2f}s\n")
+
+        results = {
+            "pd.read_csv per request": _run(
+                _csv_scenario, str(csv_path), args.requests
+            ),
+            "RecipeStore (mmap)": _run(_store_scenario, str(store_dir), args.requests),
+        }
+
+    header = f"{'path':<26}{'cold start':>12}{'per request':>14}{'req. peak':>12}{'peak RSS':>12}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(
+            f"{name:<26}{r['cold_start_s']:>11.3f}s{r['request_s'] * 1000:>12.1f}ms"
+            f"{r['request_peak_mb']:>10.1f}MB{r['process_peak_rss_mb']:>10.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Payload size and latency of /recipes/recommend with full rows vs the summary view.
+
+The app is called in process through httpx, backed by a recipe store built from
+a synthetic recipes.csv. The trained autoencoder is not part of the repository,
+so the suggestion step is replaced by a random pick of store rows; the meal plan
+runs unchanged. Sizes are the response bodies as sent and gzip-compressed, as a
+mobile client on a compressing proxy sees them.
+GET /recipes/{RecipeId} is the follow-up call for the one recipe opened.
+
+Usage (from backend/):
+    python -m benchmarks.recipe_view_benchmark --rows 50000 --suggestions 10
+"""
+
+import argparse
+import asyncio
+import gzip
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+import numpy as np
+
+import main as api_app
+import src.recommenders.meal_plan_service as meal_plan_service
+from benchmarks.synthetic import write_recipes_csv
+from src.recommenders.recipe_store import RecipeStore, build_recipe_store
+
+PROFILE = {
+    "category": "male",
+    "body_weight": 80.0,
+    "body_height": 180.0,
+    "age": 30,
+    "activity_intensity": "sedentary",
+    "objective": "health_maintenance",
+    "tolerance": 50,
+}
+
+
+_rng = np.random.default_rng(0)
+
+
+def _random_suggestions(daily_caloric_intake, recipes, suggestions=5, index=None):
+    """Stand-in for suggestion_rows that picks random rows instead of neighbours."""
+    return _rng.choice(len(recipes), size=suggestions, replace=False)
+
+
+async def _measure(client: httpx.AsyncClient, method: str, url: str, body, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = await client.request(method, url, json=body)
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return np.array(latencies) * 1000, response.content
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--suggestions", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_recipes_csv(Path(tmp) / "recipes.csv", args.rows)
+        store = RecipeStore(build_recipe_store(csv_path, Path(tmp) / "store"))
+        api_app.get_recipe_store = lambda: store
+        api_app.get_embedding_index = lambda: None
+        api_app.get_review_scores = lambda: None
+        meal_plan_service.suggestion_rows = _random_suggestions
+
+        body = {**PROFILE, "suggestions": args.suggestions}
+        recipe_id = int(store.column("RecipeId")[args.rows // 2])
+        scenarios = [
+            ("full rows", "POST", "/recipes/recommend", body),
+            ("view=summary", "POST", "/recipes/recommend?view=summary", body),
+            (
+                "fields=RecipeId,Name",
+                "POST",
+                "/recipes/recommend?fields=RecipeId,Name",
+                body,
+            ),
+            ("GET /recipes/{id}", "GET", f"/recipes/{recipe_id}", None),
+        ]
+
+        async def run() -> None:
+            transport = httpx.ASGITransport(app=api_app.app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://benchmark"
+            ) as client:
+                header = (
+                    f"{'request':<24}{'p50':>10}{'p99':>10}{'body':>11}{'gzip':>10}"
+                )
+                print(f"{args.rows} recipes, {args.suggestions} suggestions per list")
+                print(header)
+                print("-" * len(header))
+                for name, method, url, payload in scenarios:
+                    ms, content = await _measure(
+                        client, method, url, payload, args.runs
+                    )
+                    print(
+                        f"{name:<24}{np.percentile(ms, 50):>8.2f}ms"
+                        f"{np.percentile(ms, 99):>8.2f}ms"
+                        f"{len(content) / 1024:>9.1f}kB"
+                        f"{len(gzip.compress(content)) / 1024:>8.1f}kB"
+                    )
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
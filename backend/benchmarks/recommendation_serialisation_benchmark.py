@@ -0,0 +1,97 @@
+"""
+Rows per second turning recommended recipes into a JSON response body.
+
+The recipes are synthetic rows with the columns of data/recipes.csv. Each path
+serialises the same DataFrame from start to finish:
+
+- per-row models: _transform_df_to_pydantic, then FastAPI's default encoding of
+  the returned dict (jsonable_encoder and json.dumps), the previous path;
+- TypeAdapter: one pydantic validation and dump_json of the list of records;
+- columns + orjson: recommendation_rows and orjson.dumps, the current path;
+- columns + orjson, 3 fields: the same with only RecipeId, Name and Calories.
+
+Usage (from backend/):
+    python -m benchmarks.recommendation_serialisation_benchmark --rows 5 50 1000
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from benchmarks.synthetic import make_recipes_frame
+from src.recommenders.models import (
+    MealRecommendationResponse,
+    _transform_df_to_pydantic,
+    recommendation_rows,
+)
+
+SUMMARY_FIELDS = ["RecipeId", "Name", "Calories"]
+
+_responses = TypeAdapter(List[MealRecommendationResponse])
+
+
+def _rows_per_second(serialise: Callable[[], bytes], rows: int, seconds: float):
+    serialise()  # Warm up
+    runs, start = 0, time.perf_counter()
+    while True:
+        body = serialise()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return runs * rows / elapsed, len(body)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5, 50, 1000])
+    parser.add_argument("--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    header = f"{'rows':>6}  {'path':<28}{'rows/s':>12}{'speedup':>9}{'body':>11}"
+    print(header)
+    print("-" * len(header))
+    for rows in args.rows:
+        df = make_recipes_frame(rows)
+        paths = [
+            (
+                "per-row models",
+                lambda: json.dumps(
+                    jsonable_encoder({"recipes": _transform_df_to_pydantic(df)})
+                ).encode(),
+            ),
+            (
+                "TypeAdapter",
+                lambda: _responses.dump_json(
+                    _responses.validate_python(
+                        df.astype(object).where(df.notna(), None).to_dict("records")
+                    )
+                ),
+            ),
+            (
+                "columns + orjson",
+                lambda: orjson.dumps({"recipes": recommendation_rows(df)}),
+            ),
+            (
+                "columns + orjson, 3 fields",
+                lambda: orjson.dumps(
+                    {"recipes": recommendation_rows(df, SUMMARY_FIELDS)}
+                ),
+            ),
+        ]
+        baseline = None
+        for name, serialise in paths:
+            rate, size = _rows_per_second(serialise, rows, args.seconds)
+            baseline = baseline or rate
+            print(
+                f"{rows:>6}  {name:<28}{rate:>12,.0f}{rate / baseline:>8.1f}x"
+                f"{size / 1024:>9.1f}kB"
+            )
+
+
+if __name__ == "__main__":
+    main()
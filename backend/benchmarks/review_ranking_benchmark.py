@@ -0,0 +1,120 @@
+"""
+Build time of the review scores and per-request cost of re-ranking with them.
+
+Synthetic recipes and reviews with the columns of data/recipes.csv and
+data/reviews.csv are written to a temporary directory. The offline job (ingest
+reviews.csv, then aggregate it per recipe) runs in a fresh process so its peak
+RSS is its own. Re-ranking a calorie window of candidates with the precomputed
+scores is then compared with aggregating the candidates' reviews from a
+DataFrame of all reviews on every request.
+
+Usage (from backend/):
+    python -m benchmarks.review_ranking_benchmark --rows 200000 --reviews 1400000
+"""
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _write_synthetic(tmp, rows, reviews, queue) -> None:
+    from benchmarks.synthetic import write_recipes_csv, write_reviews_csv
+    from src.recommenders.recipe_store import build_recipe_store
+
+    csv_path = write_recipes_csv(Path(tmp) / "recipes.csv", rows)
+    build_recipe_store(csv_path, Path(tmp) / "store")
+    write_reviews_csv(Path(tmp) / "reviews.csv", reviews, rows)
+    queue.put(None)
+
+
+def _build_scenario(tmp, queue) -> None:
+    from src.recommenders.recipe_store import RecipeStore
+    from src.recommenders.review_ranking import build_review_scores
+
+    start = time.perf_counter()
+    build_review_scores(
+        RecipeStore(Path(tmp) / "store"),
+        reviews_csv=Path(tmp) / "reviews.csv",
+        datasets_dir=Path(tmp) / "datasets",
+    )
+    queue.put((time.perf_counter() - start, _peak_rss_mb()))
+
+
+def _run(target, *args):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=target, args=(*args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--reviews", type=int, default=1_400_000)
+    parser.add_argument("--suggestions", type=int, nargs="+", default=[5, 10, 50])
+    parser.add_argument("--pool", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Written in a separate process: a spawned process starts with the peak
+        # RSS of its parent
+        _run(_write_synthetic, tmp, args.rows, args.reviews)
+        seconds, peak_mb = _run(_build_scenario, tmp)
+        print(
+            f"{args.rows} recipes, {args.reviews} reviews: ingested and aggregated "
+            f"in {seconds:.2f}s, peak RSS {peak_mb:.0f} MB"
+        )
+
+        import numpy as np
+        import pandas as pd
+
+        from src.recommenders.recipe_store import RecipeStore
+        from src.recommenders.review_ranking import load_review_scores
+
+        recipes = RecipeStore(Path(tmp) / "store")
+        scores = load_review_scores(
+            recipes, Path(tmp) / "reviews.csv", Path(tmp) / "datasets"
+        )
+        reviews = pd.read_csv(Path(tmp) / "reviews.csv", usecols=["RecipeId", "Rating"])
+        recipe_ids = recipes.column("RecipeId")
+
+        def per_request(rows: np.ndarray, k: int) -> np.ndarray:
+            ids = recipe_ids[rows]
+            ratings = reviews[reviews["RecipeId"].isin(ids)].groupby("RecipeId")
+            stats = ratings["Rating"].agg(["sum", "count"]).reindex(ids, fill_value=0)
+            mean, weight = scores.prior_mean, scores.prior_weight
+            bayesian = (mean * weight + stats["sum"]) / (weight + stats["count"])
+            return rows[np.argsort(-bayesian.to_numpy(), kind="stable")[:k]]
+
+        header = f"{'suggestions':>11}{'candidates':>12}{'precomputed':>14}{'per request':>14}"
+        print(header)
+        print("-" * len(header))
+        for k in args.suggestions:
+            windows = recipes.calorie_index.windows([1000, 800, 200], 50, k * args.pool)
+            timings = []
+            for rank in (scores.rank, per_request):
+                start = time.perf_counter()
+                for _ in range(args.runs):
+                    for rows in windows:
+                        rank(rows, k)
+                timings.append((time.perf_counter() - start) / args.runs * 1e6)
+            print(
+                f"{k:>11}{k * args.pool:>12}{timings[0]:>12.1f}us"
+                f"{timings[1]:>12.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Latency of radius and nearest-k store queries on the grid StoreIndex vs alternatives.
+
+Stores are scattered around a handful of Norwegian cities, most of them close to
+a city centre, the way grocery stores are. For each radius the same query points
+are answered by a full haversine scan over every store (NumPy), by scikit-learn's
+BallTree with the haversine metric, and by StoreIndex.within, which also builds
+the sorted result list main.py returns. Nearest-k is compared the same way.
+
+Usage (from backend/):
+    python -m benchmarks.store_index_benchmark --stores 10000 --queries 500
+"""
+
+import argparse
+import random
+import time
+from typing import Callable, List
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+from src.kassal.models_physical_stores import PhysicalStore
+from src.kassal.store_index import EARTH_RADIUS_KM, StoreIndex, haversine_km
+from tests.kassal.fake_kassal_server import store_json
+
+CITIES = [
+    (59.91, 10.75),  # Oslo
+    (60.39, 5.32),  # Bergen
+    (63.43, 10.40),  # Trondheim
+    (58.97, 5.73),  # Stavanger
+    (69.65, 18.96),  # Tromsø
+    (58.15, 8.00),  # Kristiansand
+]
+GROUPS = ["MENY_NO", "KIWI", "REMA_1000", "COOP_EXTRA", "SPAR_NO"]
+
+
+def _stores(count: int, rng: random.Random) -> List[PhysicalStore]:
+    stores = []
+    for store_id in range(1, count + 1):
+        if rng.random() < 0.8:
+            lat, lng = rng.choice(CITIES)
+            lat, lng = lat + rng.gauss(0, 0.15), lng + rng.gauss(0, 0.3)
+        else:
+            lat, lng = rng.uniform(58, 71), rng.uniform(5, 30)
+        data = store_json(store_id, f"Store {store_id}", rng.choice(GROUPS))
+        data["position"] = {"lat": lat, "lng": lng}
+        stores.append(PhysicalStore.model_validate(data))
+    return stores
+
+
+def _time(query: Callable[[float, float], object], points: list) -> np.ndarray:
+    latencies = []
+    for lat, lng in points:
+        start = time.perf_counter()
+        query(lat, lng)
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1e6
+
+
+def _report(name: str, us: np.ndarray, hits: float) -> None:
+    print(
+        f"{name:<26}{np.percentile(us, 50):>10.1f}us{np.percentile(us, 99):>10.1f}us"
+        f"{us.mean():>10.1f}us{hits:>10.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--stores", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    stores = _stores(args.stores, rng)
+    points = [
+        (lat + rng.gauss(0, 0.1), lng + rng.gauss(0, 0.2))
+        for lat, lng in (rng.choice(CITIES) for _ in range(args.queries))
+    ]
+
+    start = time.perf_counter()
+    index = StoreIndex(stores)
+    grid_build = time.perf_counter() - start
+    lats = np.array([s.position.lat for s in stores])
+    lngs = np.array([s.position.lng for s in stores])
+    start = time.perf_counter()
+    tree = BallTree(np.radians(np.column_stack([lats, lngs])), metric="haversine")
+    tree_build = time.perf_counter() - start
+    print(
+        f"{args.stores} stores in {len(index.spans)} cells, built in "
+        f"{grid_build * 1000:.1f}ms (BallTree {tree_build * 1000:.1f}ms)"
+    )
+
+    def scan(lat: float, lng: float, km: float) -> list:
+        distances = haversine_km(lat, lng, lats, lngs)
+        inside = np.flatnonzero(distances <= km)
+        return [stores[i] for i in inside[np.argsort(distances[inside])]]
+
+    def ball_tree(lat: float, lng: float, km: float) -> list:
+        point = np.radians([[lat, lng]])
+        ind, _ = tree.query_radius(
+            point, km / EARTH_RADIUS_KM, return_distance=True, sort_results=True
+        )
+        return [stores[i] for i in ind[0]]
+
+    header = f"{'query':<26}{'p50':>12}{'p99':>12}{'mean':>12}{'results':>10}"
+    print(header)
+    print("-" * len(header))
+    for km in (1, 5, 20, 50):
+        hits = np.mean([len(index.within(lat, lng, km)) for lat, lng in points])
+        _report(f"{km}km full scan", _time(lambda a, b: scan(a, b, km), points), hits)
+        _report(
+            f"{km}km BallTree", _time(lambda a, b: ball_tree(a, b, km), points), hits
+        )
+        _report(
+            f"{km}km grid", _time(lambda a, b: index.within(a, b, km), points), hits
+        )
+
+    def scan_nearest(lat: float, lng: float) -> list:
+        distances = haversine_km(lat, lng, lats, lngs)
+        nearest = np.argpartition(distances, args.k)[: args.k]
+        return [stores[i] for i in nearest[np.argsort(distances[nearest])]]
+
+    def tree_nearest(lat: float, lng: float) -> list:
+        _, ind = tree.query(np.radians([[lat, lng]]), k=args.k)
+        return [stores[i] for i in ind[0]]
+
+    k = args.k
+    _report(f"nearest {k} full scan", _time(scan_nearest, points), k)
+    _report(f"nearest {k} BallTree", _time(tree_nearest, points), k)
+    _report(f"nearest {k} grid", _time(lambda a, b: index.nearest(a, b, k), points), k)
+    grouped = _time(lambda a, b: index.nearest(a, b, k, group="KIWI"), points)
+    _report(f"nearest {k} grid, group", grouped, k)
+
+
+if __name__ == "__main__":
+    main()
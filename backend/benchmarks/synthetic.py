@@ -0,0 +1,100 @@
+"""
+Synthetic datasets shaped like the real data files.
+
+data/recipes.csv and data/reviews.csv are Git LFS blobs that are not always
+checked out, so the benchmarks fall back to generating data with the same
+columns and roughly the same per-row size.
+"""
+
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from src.recommenders.recipe_store import NUTRITION_COLUMNS
+
+_WORDS = np.array(
+    "salt pepper butter flour sugar onion garlic chicken beef rice pasta tomato "
+    "cheese milk egg oil lemon basil parsley carrot potato cream honey vanilla".split()
+)
+
+
+def _sentences(rng: np.random.Generator, rows: int, words: int) -> list:
+    picks = _WORDS[rng.integers(0, len(_WORDS), size=(rows, words))]
+    return [" ".join(row) for row in picks]
+
+
+def make_recipes_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    """Return a DataFrame with the columns of data/recipes.csv."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "RecipeId": np.arange(38, 38 + rows),
+            "Name": _sentences(rng, rows, 4),
+            "AuthorId": rng.integers(1, 2_000_000, size=rows),
+            "AuthorName": _sentences(rng, rows, 1),
+            "CookTime": "PT" + pd.Series(rng.integers(1, 90, size=rows)).astype(str) + "M",
+            "PrepTime": "PT" + pd.Series(rng.integers(1, 60, size=rows)).astype(str) + "M",
+            "TotalTime": "PT1H",
+            "DatePublished": "1999-08-09T21:46:00Z",
+            "Description": _sentences(rng, rows, 30),
+            "Images": 'c("https://img.sndimg.com/food/image/upload/v1/img/recipes/38/picVfzLZo.jpg")',
+            "RecipeCategory": _sentences(rng, rows, 1),
+            "Keywords": 'c("Dessert", "Low Protein", "Healthy")',
+            "RecipeIngredientQuantities": 'c("4", "1/4", "1", "1")',
+            "RecipeIngredientParts": 'c("' + pd.Series(_sentences(rng, rows, 8)) + '")',
+            "AggregatedRating": rng.choice([np.nan, 3.0, 4.0, 4.5, 5.0], size=rows),
+            "ReviewCount": rng.integers(0, 50, size=rows).astype(float),
+        }
+    )
+    nutrition = rng.gamma(2.0, 150.0, size=(rows, len(NUTRITION_COLUMNS))).round(1)
+    for i, column in enumerate(NUTRITION_COLUMNS):
+        df[column] = nutrition[:, i]
+    df["RecipeServings"] = rng.integers(1, 8, size=rows).astype(float)
+    df["RecipeYield"] = None
+    df["RecipeInstructions"] = 'c("' + pd.Series(_sentences(rng, rows, 150)) + '")'
+    return df
+
+
+def write_recipes_csv(path: Union[str, Path], rows: int, seed: int = 0) -> Path:
+    """Write a synthetic recipes.csv and return its path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_recipes_frame(rows, seed).to_csv(path, index=False)
+    return path
+
+
+def make_reviews_frame(rows: int, recipes: int, seed: int = 0) -> pd.DataFrame:
+    """Return a DataFrame with the columns of data/reviews.csv."""
+    rng = np.random.default_rng(seed)
+    submitted = pd.Timestamp("2000-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 20 * 365 * 86400, size=rows), unit="s"
+    )
+    dates = submitted.strftime("%Y-%m-%dT%H:%M:%SZ")
+    # Popular recipes collect most of the reviews, many recipes have none
+    popularity = rng.pareto(1.5, size=recipes)
+    return pd.DataFrame(
+        {
+            "ReviewId": np.arange(2, 2 + rows),
+            "RecipeId": 38 + rng.choice(recipes, size=rows, p=popularity / popularity.sum()),
+            "AuthorId": rng.integers(1, 2_000_000, size=rows),
+            "AuthorName": _sentences(rng, rows, 1),
+            "Rating": rng.choice(
+                [0, 1, 2, 3, 4, 5], p=[0.05, 0.02, 0.03, 0.05, 0.15, 0.7], size=rows
+            ),
+            "Review": _sentences(rng, rows, 60),
+            "DateSubmitted": dates,
+            "DateModified": dates,
+        }
+    )
+
+
+def write_reviews_csv(
+    path: Union[str, Path], rows: int, recipes: int, seed: int = 0
+) -> Path:
+    """Write a synthetic reviews.csv for the given number of recipes and return its path."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    make_reviews_frame(rows, recipes, seed).to_csv(path, index=False)
+    return path
@@ -1,68 +1,186 @@
-from typing import Optional, Union, List
+import asyncio
+from contextlib import asynccontextmanager
+from math import ceil
+from typing import Optional, Set, Union, List
 
-import pandas as pd
 from fastapi import FastAPI, HTTPException, Query, Path
 from fastapi.middleware.cors import CORSMiddleware
-
-from src.configuration import KASSAL_API_KEY
-from src.kassal.kassal_service import KassalAPI
+from fastapi.responses import ORJSONResponse
+
+from src.configuration import (
+    CATALOGUE_MIRROR,
+    CATALOGUE_REFRESH_INTERVAL,
+    KASSAL_API_KEY,
+    KASSAL_CACHE,
+    KASSAL_CACHE_MAX_MB,
+    KASSAL_MAX_CONCURRENCY,
+    KASSAL_MAX_RETRIES,
+    KASSAL_RATE_LIMIT,
+    KASSAL_TIMEOUT,
+    PLAN_CACHE_BUCKET,
+    PLAN_CACHE_MAX_MB,
+    PRICE_HISTORY,
+    REVIEW_RANKING,
+    REVIEW_RERANK_POOL,
+    SALES_RELOAD_INTERVAL,
+    STORE_DIRECTORY,
+    STORE_SYNC_INTERVAL,
+)
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.cache import make_response_cache
+from src.kassal.catalogue_mirror import CatalogueMirror
+from src.kassal.rate_limiter import background_priority
 from src.kassal.models_physical_stores import (
+    NearbyStore,
     PhysicalStoresResponse,
     PhysicalStore,
 )
-from src.kassal.models_products import ProductsResponse, Product
-from src.kassal.models_products_ean import ProductsByEanData
+from src.kassal.store_index import StoreDirectory
+from src.kassal.price_history import PriceHistoryStore, to_records
+from src.kassal.models_price_history import (
+    DiscountCheckResponse,
+    PriceDropResponse,
+    PriceStatsResponse,
+)
+from src.kassal.models_products import (
+    Product,
+    ProductsLinks,
+    ProductsMeta,
+    ProductsResponse,
+)
 from src.kassal.models_products_compare import ProductsCompareData
-from src.recommenders.meal_plan_service import generate_meal_plan, suggest_recipes
-from src.recommenders.models import MealRecommendationRequest, _transform_df_to_pydantic
-from src.sales_dao import load_product_sales
-from src.sales_service import ProductSales, Sale
-from fastapi import Query
-from src.kassal.models_products import ProductsResponse, Product
+from src.kassal.models_products_batch import (
+    EanBatchItem,
+    ProductBatchItem,
+    ProductBatchRequest,
+    ProductBatchResponse,
+)
+from src.recommenders.meal_plan_service import daily_caloric_target, plan_rows
+from src.recommenders.models import (
+    MealRecommendationRequest,
+    RecommendationView,
+    recommendation_rows,
+    view_fields,
+)
+from src.recommenders.embedding_index import embedding_indexes, get_embedding_index
+from src.recommenders.model_registry import model_registry
+from src.recommenders.plan_cache import PlanCache, plan_version
+from src.recommenders.recipe_store import get_recipe_store
+from src.recommenders.review_ranking import get_review_scores, review_scores
+from src.on_sale_catalog import OnSaleCatalog
+from src.sales_registry import LoadedSales, SalesRegistry
+from src.sale_matcher import SaleMatcher
+from src.sale_resolution import SaleIndex, SaleResolver
 
-
-from math import ceil
-from fastapi import Query
-from src.kassal.models_products import ProductsResponse, Product
-from src.kassal.models_products import ProductsLinks, ProductsMeta
-
-# Load sales data once at startup (uses default path inside load_product_sales)
-try:
-    _loaded = load_product_sales()
-    _sales_list: List[ProductSales] = (
-        _loaded if isinstance(_loaded, list) else [_loaded]
-    )
-except Exception:
-    _sales_list = []
+# Sales data and the sale matcher built from it, reloaded in the background when
+# a new sales snapshot is written
+sales_registry = SalesRegistry(check_interval=SALES_RELOAD_INTERVAL)
 
 
 def enrich_products_with_sales(
-    products: List[Product], sales_list: List[ProductSales]
+    products: List[Product], matcher: Union[SaleIndex, SaleMatcher]
 ) -> List[Product]:
     """
-    For each product in 'products', match by substring between sale item names
-    and product.name, attaching the first matching Sale found.
+    Attach the sale of every product in 'products' that has one, looked up by
+    product id in the resolved sale index, or by sale name while that is built.
     """
-    # Flatten all sales into a name->Sale map
-    sale_map: dict[str, Sale] = {}
-    for ps in sales_list:
-        for sp in ps.products.products:
-            sale_map[sp.name.lower()] = sp.sale
-
-    # Attach sale info for each product by substring match
-    for p in products:
-        pname = p.name.lower()
-        for sale_name, sale_obj in sale_map.items():
-            if sale_name in pname:
-                p.sale = sale_obj
-                break
-    return products
+    return matcher.enrich(products)
+
+
+# Recording tasks in flight, referenced so they are not garbage collected
+_price_recordings: Set[asyncio.Task] = set()
+
+
+async def _record(products: list) -> None:
+    try:
+        await asyncio.to_thread(price_history.record, products)
+    except Exception as e:
+        print(f"Failed to record price history: {e}")
+
+
+def record_price_history(products: list) -> None:
+    """Store the price histories of fetched products, off the request path."""
+    if price_history is None or not products:
+        return
+    task = asyncio.create_task(_record(products))
+    _price_recordings.add(task)
+    task.add_done_callback(_price_recordings.discard)
+
+
+def _sale_enricher() -> Union[SaleIndex, SaleMatcher]:
+    if sale_resolver.ready:
+        return sale_resolver.index
+    return sales_registry.current.matcher
+
+
+def _rebuild_on_sale_catalog(loaded: LoadedSales) -> None:
+    sale_resolver.ensure(loaded.sales, loaded.version)
+    on_sale_catalog.ensure(loaded.sales, loaded.matcher, loaded.version)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global price_history
+    if PRICE_HISTORY:
+        price_history = await asyncio.to_thread(PriceHistoryStore)
+
+    # Load and warm the autoencoder, then open (and on first start, build) the
+    # memory-mapped recipe store, the embedding index and the review scores once
+    # per worker
+    try:
+        model_registry.warm()
+        get_recipe_store()
+        get_embedding_index()
+        if REVIEW_RANKING:
+            # Requests only read the loaded scores, a later reload runs in a thread
+            review_scores.load()
+    except Exception as e:
+        print(f"Recipe recommender unavailable: {e}")
+
+    # Load the sales, then resolve the sale items to Kassal products in the
+    # background unless the lists saved for this sales data can be reused. The
+    # same happens again whenever the watcher swaps in a new sales snapshot.
+    await sales_registry.refresh()
+    on_sale_catalog.load(sales_registry.current.version)
+    sale_resolver.load(sales_registry.current.version)
+    _rebuild_on_sale_catalog(sales_registry.current)
+    sales_registry.on_reload(_rebuild_on_sale_catalog)
+    sales_registry.start()
+
+    # Keep the local product catalogue up to date, unless another process does
+    crawler = None
+    if catalogue_mirror is not None and CATALOGUE_REFRESH_INTERVAL:
+        crawler = asyncio.create_task(
+            catalogue_mirror.refresh_forever(kassal_api, CATALOGUE_REFRESH_INTERVAL)
+        )
+
+    # Serve the stores saved by the last sync right away, then keep them fresh
+    store_sync = None
+    if store_directory is not None:
+        await asyncio.to_thread(store_directory.load)
+        if STORE_SYNC_INTERVAL:
+            store_sync = asyncio.create_task(store_directory.refresh_forever())
+    yield
+    for task in (crawler, store_sync):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await sales_registry.close()
+    await sale_resolver.close()
+    await on_sale_catalog.close()
+    await kassal_api.aclose()
+    if price_history is not None:
+        # Let the recordings in flight finish before the database is closed
+        await asyncio.gather(*_price_recordings, return_exceptions=True)
+        price_history.close()
+        price_history = None
 
 
 app = FastAPI(
     title="EiT backend",
     description="Backend for EiT project",
     version="0.0.2",
+    lifespan=lifespan,
 )
 
 origins = [
@@ -80,7 +198,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-kassal_api = KassalAPI(token=KASSAL_API_KEY)
+kassal_api = AsyncKassalAPI(
+    token=KASSAL_API_KEY,
+    max_concurrency=KASSAL_MAX_CONCURRENCY,
+    timeout=KASSAL_TIMEOUT,
+    rate_limit=KASSAL_RATE_LIMIT or None,
+    max_retries=KASSAL_MAX_RETRIES,
+    cache=make_response_cache(KASSAL_CACHE, max_bytes=int(KASSAL_CACHE_MAX_MB * 2**20)),
+)
+sale_resolver = SaleResolver(kassal_api)
+# Lists the products the sale items were resolved to, not every name match
+on_sale_catalog = OnSaleCatalog(kassal_api, resolver=sale_resolver)
+catalogue_mirror = CatalogueMirror() if CATALOGUE_MIRROR else None
+# Opened in the lifespan, so importing main does not create the database
+price_history: Optional[PriceHistoryStore] = None
+store_directory = (
+    StoreDirectory(kassal_api, max_age=STORE_SYNC_INTERVAL) if STORE_DIRECTORY else None
+)
+
+# How long a request waits for the first on-sale build before answering 503
+ON_SALE_BUILD_WAIT = 10.0
+
+# Meal plans shared by requests whose profiles round to the same calorie target
+plan_cache = (
+    PlanCache(max_bytes=int(PLAN_CACHE_MAX_MB * 2**20), bucket=PLAN_CACHE_BUCKET)
+    if PLAN_CACHE_MAX_MB > 0
+    else None
+)
+
+
+def _on_model_reload(loaded) -> None:
+    # The embedding index depends on the model: the index of the new model is
+    # built in the background while the previous model and index keep serving.
+    # Cached plans are keyed on the index version, so they switch with the swap.
+    embedding_indexes.rebuild(loaded)
+
+
+model_registry.on_reload(_on_model_reload)
 
 
 @app.get("/products/on-sale", response_model=ProductsResponse)
@@ -88,28 +242,26 @@ async def get_products_on_sale(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(10, ge=1, description="Items per page"),
 ):
-    sale_names = [item.name for ps in _sales_list for item in ps.products.products]
-    all_products: list[Product] = []
-    for name in sale_names:
-        try:
-            resp = kassal_api.get_products(
-                search=name,
-                size=1,
+    # Builds start when new sales are loaded. This only starts one if the last
+    # build of the current sales failed and its cooldown has passed, so failures
+    # are not retried on every request.
+    _rebuild_on_sale_catalog(sales_registry.current)
+    # While a rebuild runs the previous list is served; only the first build is awaited
+    if not on_sale_catalog.ready:
+        await on_sale_catalog.wait(ON_SALE_BUILD_WAIT)
+    if not on_sale_catalog.ready:
+        detail = "The on-sale products are still being resolved, try again shortly."
+        if not on_sale_catalog.building and on_sale_catalog.last_error:
+            detail = (
+                "The on-sale products could not be resolved: "
+                f"{on_sale_catalog.last_error}"
             )
-            all_products.extend(resp.data)
-        except Exception:
-            continue
+        raise HTTPException(status_code=503, detail=detail)
 
-    unique_products = {p.id: p for p in all_products}.values()
-    product_list = list(unique_products)
-
-    enriched = enrich_products_with_sales(product_list, _sales_list)
-
-    total = len(enriched)
+    page_items, total = on_sale_catalog.page(page, size)
     last_page = ceil(total / size) if total else 1
     start = (page - 1) * size
-    end = min(start + size, total)
-    page_items = enriched[start:end]
+    end = start + len(page_items)
 
     base_path = "/products/on-sale"
     links = ProductsLinks(
@@ -122,10 +274,12 @@ async def get_products_on_sale(
     meta = ProductsMeta.model_validate(
         {
             "current_page": page,
-            "from": start + 1 if total else 0,
+            "from": start + 1 if page_items else 0,
             "to": end,
             "per_page": size,
             "path": base_path,
+            "total": total,
+            "last_page": last_page,
         }
     )
 
@@ -146,20 +300,56 @@ async def get_physical_stores(
     km: float = Query(5, ge=0, description="Radius in kilometers"),
     group: Optional[str] = Query(None, description="Group filter"),
 ):
+    filters = dict(
+        search=search, page=page, size=size, lat=lat, lng=lng, km=km, group=group
+    )
     try:
-        return kassal_api.get_physical_stores(
-            search=search, page=page, size=size, lat=lat, lng=lng, km=km, group=group
-        )
+        # Answered locally once the store list has been synced
+        if store_directory is not None:
+            result = await asyncio.to_thread(store_directory.search, **filters)
+            if result is not None:
+                return result
+        return await kassal_api.get_physical_stores(**filters)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/physical-stores/nearest", response_model=List[NearbyStore])
+async def get_nearest_physical_stores(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude"),
+    lng: float = Query(..., ge=-180, le=180, description="Longitude"),
+    k: int = Query(5, ge=1, le=100, description="Number of stores"),
+    group: Optional[str] = Query(None, description="Group filter"),
+    search: Optional[str] = Query(None, description="Search term for physical stores"),
+    max_km: Optional[float] = Query(
+        None, gt=0, description="Ignore stores further away than this"
+    ),
+):
+    """The k stores nearest to a position, nearest first, with their distances."""
+    if store_directory is None or not store_directory.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="The physical stores are still being synced, try again shortly.",
+        )
+    try:
+        nearest = await asyncio.to_thread(
+            store_directory.nearest, lat, lng, k, group, search, max_km
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [NearbyStore(store=store, distance_km=km) for store, km in nearest or []]
+
+
 @app.get("/physical-stores/{store_id}", response_model=PhysicalStore)
 async def get_physical_store_by_id(
     store_id: str = Path(..., description="ID of the physical store")
 ):
     try:
-        return kassal_api.get_physical_store_by_id(store_id)
+        if store_directory is not None and store_id.isdigit():
+            store = store_directory.get(int(store_id))
+            if store is not None:
+                return store
+        return await kassal_api.get_physical_store_by_id(store_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -183,21 +373,28 @@ async def get_products(
     ),
     sort: Optional[str] = Query(None, description="Sort order"),
 ):
+    filters = dict(
+        search=search,
+        page=page,
+        size=size,
+        vendor=vendor,
+        brand=brand,
+        price_min=price_min,
+        price_max=price_max,
+        unique=unique,
+        exclude_without_ean=exclude_without_ean,
+        sort=sort,
+    )
     try:
-        result = kassal_api.get_products(
-            search=search,
-            page=page,
-            size=size,
-            vendor=vendor,
-            brand=brand,
-            price_min=price_min,
-            price_max=price_max,
-            unique=unique,
-            exclude_without_ean=exclude_without_ean,
-            sort=sort,
-        )
+        # Served from the local mirror when it can answer, live from Kassal otherwise
+        result = None
+        if catalogue_mirror is not None:
+            result = await asyncio.to_thread(catalogue_mirror.search, **filters)
+        if result is None:
+            result = await kassal_api.get_products(**filters)
         # Enrich all products in one call
-        enrich_products_with_sales(result.data, _sales_list)
+        enrich_products_with_sales(result.data, _sale_enricher())
+        record_price_history(result.data)
         return result
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -208,21 +405,58 @@ async def get_product_by_id(
     product_id: int = Path(..., description="ID of the product")
 ):
     try:
-        prod = kassal_api.get_product_by_id(product_id)
+        prod = await kassal_api.get_product_by_id(product_id)
         # Single product enrichment
-        enrich_products_with_sales([prod], _sales_list)
+        enrich_products_with_sales([prod], _sale_enricher())
+        record_price_history([prod])
         return prod
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch(request: ProductBatchRequest):
+    """
+    Look up many products by id and/or EAN in one request.
+
+    Each distinct id and EAN is fetched once, from the cache when fresh, and the
+    rest concurrently within the Kassal rate limit. A lookup that fails is
+    reported on its own item instead of failing the whole batch.
+    """
+    products, eans = await asyncio.gather(
+        kassal_api.get_products_by_ids(request.ids),
+        kassal_api.get_products_by_eans(request.eans),
+    )
+    found = [p for p in products.values() if isinstance(p, Product)]
+    enrich_products_with_sales(found, _sale_enricher())
+    found_eans = [d for d in eans.values() if not isinstance(d, Exception)]
+    record_price_history(found + [p for data in found_eans for p in data.products])
+
+    id_items = []
+    for product_id in request.ids:
+        result = products[product_id]
+        if isinstance(result, Exception):
+            id_items.append(ProductBatchItem(id=product_id, error=str(result)))
+        else:
+            id_items.append(ProductBatchItem(id=product_id, product=result))
+    ean_items = []
+    for ean in request.eans:
+        result = eans[ean]
+        if isinstance(result, Exception):
+            ean_items.append(EanBatchItem(ean=ean, error=str(result)))
+        else:
+            ean_items.append(EanBatchItem(ean=ean, data=result))
+    return ProductBatchResponse(ids=id_items, eans=ean_items)
+
+
 @app.get("/products/find-by-url/single", response_model=Product)
 async def find_product_by_url_single(
     url: str = Query(..., description="URL of the product to find")
 ):
     try:
-        prod = kassal_api.find_product_by_url_single(url)
-        enrich_products_with_sales([prod], _sales_list)
+        prod = await kassal_api.find_product_by_url_single(url)
+        enrich_products_with_sales([prod], _sale_enricher())
+        record_price_history([prod])
         return prod
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -233,16 +467,91 @@ async def find_product_by_url_compare(
     url: str = Query(..., description="URL of the product for comparison")
 ):
     try:
-        data = kassal_api.find_product_by_url_compare(url)
+        data = await kassal_api.find_product_by_url_compare(url)
         # Bulk enrichment
-        enrich_products_with_sales(data, _sales_list)
+        enrich_products_with_sales(data.products, _sale_enricher())
+        record_price_history(data.products)
         return data
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/prices/stats", response_model=PriceStatsResponse)
+async def get_price_stats(
+    ids: List[int] = Query(..., description="Product ids"),
+    days: float = Query(30, gt=0, description="Window in days"),
+):
+    """Lowest, highest, median and mean price of products over the last days."""
+    if price_history is None:
+        raise HTTPException(status_code=503, detail="Price history is disabled.")
+    stats = await asyncio.to_thread(price_history.window_stats, days, ids)
+    return {"days": days, "data": to_records(stats, price_history.names)}
+
+
+@app.get("/prices/discounts", response_model=DiscountCheckResponse)
+async def get_price_discounts(
+    ids: Optional[List[int]] = Query(None, description="Product ids, all if omitted"),
+    days: float = Query(30, gt=0, description="Days before the current price"),
+    only_real: bool = Query(False, description="Only prices below the earlier low"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of products"),
+):
+    """
+    Whether the current price of products is below their lowest price in the
+    days before it took effect, i.e. a real discount rather than a raised price
+    brought back down.
+    """
+    if price_history is None:
+        raise HTTPException(status_code=503, detail="Price history is disabled.")
+    checks = await asyncio.to_thread(price_history.discounts, days, ids)
+    if only_real:
+        checks = checks[checks["real_discount"]].sort_values(
+            "discount_pct", ascending=False, kind="stable"
+        )
+    return {"days": days, "data": to_records(checks.head(limit), price_history.names)}
+
+
+@app.get("/prices/drops", response_model=PriceDropResponse)
+async def get_price_drops(
+    days: float = Query(7, gt=0, description="Window in days"),
+    min_drop_pct: float = Query(10, ge=0, description="Minimum drop in percent"),
+    ids: Optional[List[int]] = Query(None, description="Product ids, all if omitted"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of products"),
+):
+    """Products whose price fell the most below their recent high, largest first."""
+    if price_history is None:
+        raise HTTPException(status_code=503, detail="Price history is disabled.")
+    drops = await asyncio.to_thread(price_history.price_drops, days, min_drop_pct, ids)
+    return {
+        "days": days,
+        "min_drop_pct": min_drop_pct,
+        "data": to_records(drops.head(limit), price_history.names),
+    }
+
+
 @app.post("/recipes/recommend")
-async def recommend_recipes(request: MealRecommendationRequest):
+async def recommend_recipes(
+    request: MealRecommendationRequest,
+    view: RecommendationView = Query(
+        RecommendationView.full,
+        description="summary sends only the fields needed to list the recipes",
+    ),
+    fields: Optional[List[str]] = Query(
+        None, description="Recipe fields to send, overrides the view"
+    ),
+):
+    """
+    Breakfast, lunch and dinner options and suggestions for a user profile.
+
+    The profile only matters through its daily caloric target. With the meal plan
+    cache enabled the plan is computed for the target rounded to
+    PLAN_CACHE_BUCKET kcal, on a miss as on a hit, so all profiles in a bucket
+    get the same plan.
+    """
+    try:
+        response_fields = view_fields(view, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     category = request.category.value
     body_weight = request.body_weight
     body_height = request.body_height
@@ -252,42 +561,156 @@ async def recommend_recipes(request: MealRecommendationRequest):
     tolerance = request.tolerance
     num_suggestions = request.suggestions
 
-    recipes_df = pd.read_csv("data/recipes.csv")
-    breakfast_options, lunch_options, dinner_options = generate_meal_plan(
-        category,
-        body_weight,
-        body_height,
-        age,
-        activity_intensity,
-        objective,
-        recipes_df,
-        tolerance,
+    recipes = get_recipe_store()
+    index = get_embedding_index()
+    ranking = get_review_scores() if REVIEW_RANKING else None
+    # The profile only matters through its daily caloric intake
+    daily_calories = daily_caloric_target(
+        category, body_weight, body_height, age, activity_intensity, objective
     )
 
-    suggestions = suggest_recipes(
-        category,
-        body_weight,
-        body_height,
-        age,
-        activity_intensity,
-        objective,
-        recipes_df,
-        num_suggestions,
+    def compute_rows(calories):
+        return plan_rows(
+            calories,
+            recipes,
+            tolerance,
+            num_suggestions,
+            index=index,
+            ranking=ranking,
+            pool=REVIEW_RERANK_POOL,
+        )
+
+    if plan_cache is None:
+        rows = compute_rows(daily_calories)
+    else:
+        key = plan_cache.key(
+            daily_calories,
+            tolerance,
+            num_suggestions,
+            plan_version(recipes, index, ranking),
+        )
+        # Computed for the rounded target, so the plan does not depend on which
+        # profile of the bucket missed first
+        rows = plan_cache.get_or_compute(key, lambda: compute_rows(key.daily_calories))
+
+    # Only the columns that are sent are read from the recipe store, and the
+    # options are not longer than the number of suggestions
+    columns = [name for name in response_fields if name in recipes.columns]
+    breakfast_options, lunch_options, dinner_options, suggestions = (
+        recipes.take(r[:num_suggestions], columns=columns) for r in rows
     )
 
-    # Ensure that the options are not longer than the number of suggestions
-    breakfast_options = breakfast_options.head(num_suggestions)
-    lunch_options = lunch_options.head(num_suggestions)
-    dinner_options = dinner_options.head(num_suggestions)
+    # Serialised column by column and written as JSON bytes by orjson
+    return ORJSONResponse(
+        {
+            "breakfast": recommendation_rows(breakfast_options, response_fields),
+            "lunch": recommendation_rows(lunch_options, response_fields),
+            "dinner": recommendation_rows(dinner_options, response_fields),
+            "suggestions": recommendation_rows(suggestions, response_fields),
+        }
+    )
 
-    breakfast_options = _transform_df_to_pydantic(breakfast_options)
-    lunch_options = _transform_df_to_pydantic(lunch_options)
-    dinner_options = _transform_df_to_pydantic(dinner_options)
-    suggestions = _transform_df_to_pydantic(suggestions)
 
-    return {
-        "breakfast": breakfast_options,
-        "lunch": lunch_options,
-        "dinner": dinner_options,
-        "suggestions": suggestions,
-    }
+@app.get("/recipes/{recipe_id}")
+async def get_recipe(
+    recipe_id: int = Path(..., description="RecipeId of the recipe"),
+    fields: Optional[List[str]] = Query(
+        None, description="Recipe fields to send, all if omitted"
+    ),
+):
+    """The details of one recipe, e.g. one listed by the summary view."""
+    try:
+        response_fields = view_fields(fields=fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    recipes = get_recipe_store()
+    row = recipes.row_of(recipe_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Recipe {recipe_id} not found")
+    columns = [name for name in response_fields if name in recipes.columns]
+    recipe = recipes.take([row], columns=columns)
+    return ORJSONResponse(recommendation_rows(recipe, response_fields)[0])
+
+
+@app.get("/status/model")
+async def get_model_status():
+    """Load time and predict latency of the recipe autoencoder in this worker."""
+    return model_registry.metrics()
+
+
+@app.get("/status/embedding-index")
+async def get_embedding_index_status():
+    """Version of the served embedding index and its background rebuilds."""
+    return embedding_indexes.status()
+
+
+@app.get("/status/plan-cache")
+async def get_plan_cache_status():
+    """Hit/miss counters and size of the meal plan cache."""
+    if plan_cache is None:
+        return {"enabled": False}
+    return plan_cache.status()
+
+
+@app.get("/status/review-ranking")
+async def get_review_ranking_status():
+    """Recipes and reviews behind the review-based ranking."""
+    ranking = get_review_scores() if REVIEW_RANKING else None
+    if ranking is None:
+        return {"enabled": False}
+    return ranking.status()
+
+
+@app.get("/status/kassal")
+async def get_kassal_status():
+    """Request, retry and rate limiter queue statistics of the Kassal client."""
+    return kassal_api.metrics()
+
+
+@app.get("/status/on-sale")
+async def get_on_sale_status():
+    """Build state of the materialised /products/on-sale list."""
+    return on_sale_catalog.status()
+
+
+@app.get("/status/sales")
+async def get_sales_status():
+    """Version, size and load time of the sales data served by this worker."""
+    return sales_registry.status()
+
+
+@app.get("/status/sale-index")
+async def get_sale_index_status():
+    """Match rate and ambiguity of the sale items resolved to Kassal products."""
+    return sale_resolver.status()
+
+
+@app.get("/status/catalogue")
+async def get_catalogue_status():
+    """Size, crawl progress and hit counts of the local product catalogue mirror."""
+    if catalogue_mirror is None:
+        return {"enabled": False}
+    return await asyncio.to_thread(catalogue_mirror.stats)
+
+
+@app.get("/status/stores")
+async def get_stores_status():
+    """Size, age and hit count of the local physical store index."""
+    if store_directory is None:
+        return {"enabled": False}
+    return store_directory.status()
+
+
+@app.get("/status/prices")
+async def get_prices_status():
+    """Products and observations in the price history."""
+    if price_history is None:
+        return {"enabled": False}
+    return await asyncio.to_thread(price_history.stats)
+
+
+@app.get("/status/cache")
+async def get_cache_status():
+    """Hit/miss counters of the Kassal response cache."""
+    cache = kassal_api.cache
+    return cache.stats() if cache else {"enabled": False}
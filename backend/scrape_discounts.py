@@ -1,4 +1,9 @@
-from src.sales_service import _extract_sales_from_images, get_all_sales_from_vendor
+import asyncio
+
+from src.configuration import EXTRACTION_CONCURRENCY
+from src.extraction_cache import ExtractionCache
+from src.extraction_pipeline import ExtractionCheckpoint, run_extraction
+from src.sales_service import make_openai_extractor
 from src.sales_dao import load_product_sales, save_product_sales
 
 if __name__ == "__main__":
@@ -17,16 +22,28 @@ if __name__ == "__main__":
         "jacobs-no",
         "matkroken-no",
     ]
-    sales = []
-    for page in pages:
-        # Extract sales from images
-        sales_data = get_all_sales_from_vendor(page)
-        # Save the sales data to a file
-        sales.extend(sales_data)
+    # Extract the pages of all vendors concurrently. Finished pages are
+    # checkpointed, so rerunning after a crash only extracts the rest, and pages
+    # that did not change since an earlier scrape come from the extraction cache.
+    checkpoint = ExtractionCheckpoint()
+    cache = ExtractionCache()
+    result = asyncio.run(
+        run_extraction(
+            pages,
+            cache.wrap(make_openai_extractor()),
+            checkpoint=checkpoint,
+            concurrency=EXTRACTION_CONCURRENCY,
+        )
+    )
+    print(result.summary())
+    print(f"Extraction cache: {cache.stats()}")
 
     # Save the sales data to a file
-    save_product_sales(sales)
+    save_product_sales(result.sales)
+    if result.failed:
+        print("Rerun to retry the failed pages, finished pages are kept")
+    else:
+        checkpoint.clear()
     # Load the sales data from the file
-    loaded_sales_data = load_product_sales()
-
-    print(loaded_sales_data)
+    for loaded_sales in load_product_sales():
+        print(loaded_sales)
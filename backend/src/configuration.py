@@ -10,6 +10,49 @@ GOOGLE_CLIENT_SECRET = os.environ.get("GOOGLE_CLIENT_SECRET")
 GOOGLE_REDIRECT_URI = os.environ.get("GOOGLE_REDIRECT_URI")
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
+# Kassal client tuning: requests in flight at once and per-request timeout in seconds
+KASSAL_MAX_CONCURRENCY = int(os.environ.get("KASSAL_MAX_CONCURRENCY", "10"))
+KASSAL_TIMEOUT = float(os.environ.get("KASSAL_TIMEOUT", "10"))
+# Requests per minute allowed by the Kassal plan, 0 disables client-side limiting
+KASSAL_RATE_LIMIT = int(os.environ.get("KASSAL_RATE_LIMIT", "60"))
+KASSAL_MAX_RETRIES = int(os.environ.get("KASSAL_MAX_RETRIES", "3"))
+# Response cache for product and store lookups: "memory", "sqlite" or "off",
+# holding at most KASSAL_CACHE_MAX_MB of JSON responses
+KASSAL_CACHE = os.environ.get("KASSAL_CACHE", "memory")
+KASSAL_CACHE_MAX_MB = float(os.environ.get("KASSAL_CACHE_MAX_MB", "32"))
+
+# Serve /products from a local mirror of the Kassal catalogue, crawled every
+# CATALOGUE_REFRESH_INTERVAL seconds (0 when `python -m src.kassal.catalogue_mirror`
+# is run on a schedule instead)
+CATALOGUE_MIRROR = os.environ.get("CATALOGUE_MIRROR", "false").lower() == "true"
+CATALOGUE_REFRESH_INTERVAL = float(os.environ.get("CATALOGUE_REFRESH_INTERVAL", "3600"))
+
+# Answer /physical-stores from a local copy of every Kassal store, synced when it
+# is older than STORE_SYNC_INTERVAL seconds (0 uses the saved copy as is)
+STORE_DIRECTORY = os.environ.get("STORE_DIRECTORY", "true").lower() == "true"
+STORE_SYNC_INTERVAL = float(os.environ.get("STORE_SYNC_INTERVAL", "86400"))
+
+# Keep the price history of every fetched product for the /prices analytics
+PRICE_HISTORY = os.environ.get("PRICE_HISTORY", "true").lower() == "true"
+
+# Meal plans are computed and cached per daily calorie target rounded to
+# PLAN_CACHE_BUCKET kcal, so a plan can be up to half a bucket off the exact
+# target. The cache holds at most PLAN_CACHE_MAX_MB of recipe rows (0 disables
+# the cache, and with it the rounding)
+PLAN_CACHE_BUCKET = int(os.environ.get("PLAN_CACHE_BUCKET", "10"))
+PLAN_CACHE_MAX_MB = float(os.environ.get("PLAN_CACHE_MAX_MB", "16"))
+
+# Re-rank recommended recipes by their reviews, keeping the best of
+# REVIEW_RERANK_POOL times as many candidates
+REVIEW_RANKING = os.environ.get("REVIEW_RANKING", "true").lower() == "true"
+REVIEW_RERANK_POOL = int(os.environ.get("REVIEW_RERANK_POOL", "4"))
+
+# Catalogue pages sent to the vision model at once by scrape_discounts.py
+EXTRACTION_CONCURRENCY = int(os.environ.get("EXTRACTION_CONCURRENCY", "8"))
+
+# Seconds between checks for a new sales snapshot, 0 only loads it at startup
+SALES_RELOAD_INTERVAL = float(os.environ.get("SALES_RELOAD_INTERVAL", "30"))
+
 if not KASSAL_API_KEY:
     raise Exception("KASSAL_API_KEY environment variable is not set.")
 
@@ -0,0 +1,225 @@
+import argparse
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.image_preprocessing import DEFAULT_PREPROCESS, PreprocessConfig
+from src.sales_service import (
+    EXTRACTION_MODEL,
+    EXTRACTION_PROMPT_VERSION,
+    Extractor,
+    SalesCatalog,
+)
+
+EXTRACTION_CACHE_PATH = "data/extraction_cache.sqlite3"
+
+
+def hash_image(path: Union[str, Path]) -> str:
+    """SHA-256 of the image file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """
+    Content-addressed store of catalogue page extractions.
+
+    Results are keyed by the SHA-256 of the image bytes, the prompt version, the
+    model name and the preprocessing options, so an unchanged page is never sent
+    to the model twice, whatever its file name or vendor folder, while a new
+    prompt, model, downscaling or tiling starts afresh.
+    """
+
+    def __init__(self, path: Union[str, Path] = EXTRACTION_CACHE_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            columns = [
+                row[1] for row in self._conn.execute("PRAGMA table_info(extractions)")
+            ]
+            if columns and "preprocess" not in columns:
+                # Caches from before the preprocessing was part of the key hold
+                # extractions made with the default options
+                self._conn.execute("ALTER TABLE extractions RENAME TO extractions_old")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS extractions ("
+                "image_hash TEXT NOT NULL, prompt_version TEXT NOT NULL, "
+                "model TEXT NOT NULL, preprocess TEXT NOT NULL, "
+                "catalog TEXT NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (image_hash, prompt_version, model, preprocess))"
+            )
+            if columns and "preprocess" not in columns:
+                self._conn.execute(
+                    "INSERT INTO extractions SELECT image_hash, prompt_version, "
+                    "model, ?, catalog, created_at FROM extractions_old",
+                    (DEFAULT_PREPROCESS.key(),),
+                )
+                self._conn.execute("DROP TABLE extractions_old")
+        self.hits = 0
+        self.misses = 0
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+
+    def get(
+        self, image_hash: str, prompt_version: str, model: str, preprocess: str
+    ) -> Optional[SalesCatalog]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT catalog FROM extractions WHERE image_hash = ? "
+                "AND prompt_version = ? AND model = ? AND preprocess = ?",
+                (image_hash, prompt_version, model, preprocess),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return SalesCatalog.model_validate_json(row[0])
+
+    def put(
+        self,
+        image_hash: str,
+        prompt_version: str,
+        model: str,
+        preprocess: str,
+        catalog: SalesCatalog,
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    image_hash,
+                    prompt_version,
+                    model,
+                    preprocess,
+                    catalog.model_dump_json(),
+                    time.time(),
+                ),
+            )
+
+    def invalidate(
+        self, prompt_version: Optional[str] = None, keep_current: bool = False
+    ) -> int:
+        """
+        Delete cached extractions.
+
+        Args:
+            prompt_version: Only delete entries made with this prompt version.
+            keep_current: Delete every entry not made with the current
+                EXTRACTION_PROMPT_VERSION instead.
+
+        Returns:
+            int: The number of entries deleted.
+        """
+        with self._lock, self._conn:
+            if keep_current:
+                cursor = self._conn.execute(
+                    "DELETE FROM extractions WHERE prompt_version != ?",
+                    (EXTRACTION_PROMPT_VERSION,),
+                )
+            elif prompt_version is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM extractions WHERE prompt_version = ?",
+                    (prompt_version,),
+                )
+            else:
+                cursor = self._conn.execute("DELETE FROM extractions")
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT prompt_version, model, preprocess, COUNT(*) FROM extractions "
+                "GROUP BY prompt_version, model, preprocess "
+                "ORDER BY prompt_version, model, preprocess"
+            ).fetchall()
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(row[-1] for row in rows),
+            "by_version": [
+                {
+                    "prompt_version": version,
+                    "model": model,
+                    "preprocess": preprocess,
+                    "entries": count,
+                }
+                for version, model, preprocess, count in rows
+            ],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+        }
+
+    def wrap(
+        self,
+        extractor: Extractor,
+        model: Optional[str] = None,
+        prompt_version: str = EXTRACTION_PROMPT_VERSION,
+        preprocess: Optional[PreprocessConfig] = None,
+    ) -> Extractor:
+        """
+        Return an extractor that only calls ``extractor`` for pages not cached.
+
+        Identical pages being extracted at the same time share one model call.
+
+        Args:
+            extractor: The extractor to cache.
+            model: Model the extractor uses, defaults to its ``model_name``.
+            prompt_version: Version of the extraction prompt.
+            preprocess: How the extractor prepares pages, defaults to its
+                ``preprocess``.
+        """
+        model = model or getattr(extractor, "model_name", EXTRACTION_MODEL)
+        preprocess = preprocess or getattr(extractor, "preprocess", DEFAULT_PREPROCESS)
+        preprocess_key = preprocess.key()
+
+        async def extract(images_path: Union[str, Path]) -> SalesCatalog:
+            image_hash = await asyncio.to_thread(hash_image, images_path)
+            key = (image_hash, prompt_version, model, preprocess_key)
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self.hits += 1
+                return await asyncio.shield(inflight)
+
+            catalog = self.get(*key)
+            if catalog is not None:
+                return catalog
+            task = asyncio.ensure_future(extractor(images_path))
+            self._inflight[key] = task
+            try:
+                catalog = await task
+            finally:
+                del self._inflight[key]
+            self.put(*key, catalog)
+            return catalog
+
+        return extract
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Inspect or prune the extraction cache"
+    )
+    parser.add_argument("command", choices=["stats", "invalidate"])
+    parser.add_argument("--prompt-version", help="Only invalidate this prompt version")
+    parser.add_argument(
+        "--stale",
+        action="store_true",
+        help="Invalidate every prompt version except the current one",
+    )
+    args = parser.parse_args()
+
+    cache = ExtractionCache()
+    if args.command == "invalidate":
+        deleted = cache.invalidate(args.prompt_version, keep_current=args.stale)
+        print(f"Deleted {deleted} cached extractions")
+    print(cache.stats())
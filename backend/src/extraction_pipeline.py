@@ -0,0 +1,177 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.sales_service import (
+    DEFAULT_IMAGES_ROOT,
+    Extractor,
+    ProductSales,
+    SalesCatalog,
+    find_vendor_images,
+)
+
+CHECKPOINT_PATH = "data/extraction_checkpoint.jsonl"
+
+
+def _file_signature(path: Path) -> List[int]:
+    stat = path.stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ExtractionCheckpoint:
+    """
+    Append-only JSONL record of the pages extracted so far.
+
+    Each finished page is written and flushed as soon as its result arrives, so
+    an interrupted run loses at most the pages that were in flight. A page is
+    only reused if the image file still has the same size and modification time.
+    """
+
+    def __init__(self, path: Union[str, Path] = CHECKPOINT_PATH) -> None:
+        self.path = Path(path)
+        self._file = None
+
+    def load(self) -> Dict[str, Tuple[List[int], SalesCatalog]]:
+        """Return the recorded results by image path."""
+        done: Dict[str, Tuple[List[int], SalesCatalog]] = {}
+        if not self.path.exists():
+            return done
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    catalog = SalesCatalog.model_validate(record["catalog"])
+                except (ValueError, KeyError):
+                    continue  # A line cut short by a crash
+                done[record["image"]] = (record["signature"], catalog)
+        return done
+
+    def record(self, vendor: str, image: Path, catalog: SalesCatalog) -> None:
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a", encoding="utf-8")
+        line = json.dumps(
+            {
+                "vendor": vendor,
+                "image": str(image),
+                "signature": _file_signature(image),
+                "catalog": catalog.model_dump(mode="json"),
+            },
+            ensure_ascii=False,
+        )
+        self._file.write(line + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def clear(self) -> None:
+        """Forget all progress, e.g. once a run has been saved."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+
+@dataclass
+class ExtractionResult:
+    sales: List[ProductSales]
+    extracted: int = 0
+    resumed: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    missing_vendors: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def images_per_second(self) -> float:
+        return self.extracted / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"Extracted {self.extracted} pages in {self.seconds:.1f}s "
+            f"({self.images_per_second:.2f} images/s), {self.resumed} resumed "
+            f"from checkpoint, {len(self.failed)} failed"
+        )
+
+
+async def run_extraction(
+    vendors: List[str],
+    extractor: Extractor,
+    images_root: Path = DEFAULT_IMAGES_ROOT,
+    checkpoint: Optional[ExtractionCheckpoint] = None,
+    concurrency: int = 8,
+) -> ExtractionResult:
+    """
+    Extract the sales from every catalogue page of the given vendors.
+
+    All pages of all vendors go through one pool of at most ``concurrency``
+    extractions in flight. A page that fails is reported and left out; it is not
+    checkpointed, so a rerun tries it again while skipping the finished pages.
+
+    Args:
+        vendors: Folder names under ``images_root``.
+        extractor: Async callable from image path to SalesCatalog, typically
+            sales_service.make_openai_extractor().
+        images_root: Base directory for downloaded images.
+        checkpoint: Where finished pages are recorded and resumed from.
+        concurrency: Maximum number of pages being extracted at once.
+
+    Returns:
+        ExtractionResult: One ProductSales per page, in vendor and file name order.
+    """
+    start = time.perf_counter()
+    result = ExtractionResult(sales=[])
+
+    pages: List[Tuple[str, Path]] = []
+    for vendor in vendors:
+        vendor_dir = images_root / vendor
+        if not vendor_dir.is_dir():
+            print(f"Vendor directory not found, skipping: {vendor_dir}")
+            result.missing_vendors.append(vendor)
+            continue
+        pages.extend((vendor, image) for image in find_vendor_images(vendor_dir))
+
+    done = checkpoint.load() if checkpoint else {}
+    catalogs: Dict[Path, SalesCatalog] = {}
+    todo: List[Tuple[str, Path]] = []
+    for vendor, image in pages:
+        previous = done.get(str(image))
+        if previous is not None and previous[0] == _file_signature(image):
+            catalogs[image] = previous[1]
+            result.resumed += 1
+        else:
+            todo.append((vendor, image))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def extract_page(vendor: str, image: Path) -> None:
+        async with semaphore:
+            try:
+                catalog = await extractor(image)
+            except Exception as e:
+                print(f"Failed to extract {image}: {e}")
+                result.failed[str(image)] = str(e)
+                return
+        catalogs[image] = catalog
+        result.extracted += 1
+        if checkpoint:
+            checkpoint.record(vendor, image, catalog)
+
+    try:
+        await asyncio.gather(*(extract_page(vendor, image) for vendor, image in todo))
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    result.sales = [
+        ProductSales(products=catalogs[image], vendor=vendor)
+        for vendor, image in pages
+        if image in catalogs
+    ]
+    result.seconds = time.perf_counter() - start
+    return result
@@ -0,0 +1,103 @@
+from dataclasses import astuple, dataclass, fields
+from io import BytesIO
+from typing import List, Optional, Tuple
+
+from PIL import Image
+
+Box = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class PreprocessConfig:
+    """
+    How catalogue pages are prepared before they are sent to the vision model.
+
+    Attributes:
+        max_dimension: Longest side in pixels after downscaling, None to keep the
+            original size. The OpenAI vision models scale images to fit 2048x2048
+            anyway, so larger images only cost upload time.
+        quality: JPEG quality, 1-95.
+        grayscale: Send single-channel images.
+        tile_above_aspect: Split pages whose height/width exceeds this into
+            overlapping tiles, None to never tile. At least ``tile_aspect``, so a
+            tiled page is always taller than one tile.
+        tile_aspect: Height/width of each tile.
+        tile_overlap: Fraction of a tile's height shared with the next tile, so a
+            product cut by one tile boundary is whole in the neighbouring tile.
+    """
+
+    max_dimension: Optional[int] = 2048
+    quality: int = 85
+    grayscale: bool = False
+    tile_above_aspect: Optional[float] = None
+    tile_aspect: float = 1.4
+    tile_overlap: float = 0.15
+
+    def __post_init__(self) -> None:
+        if self.tile_aspect <= 0:
+            raise ValueError(f"tile_aspect must be positive, got {self.tile_aspect}")
+        if not 0 <= self.tile_overlap < 1:
+            raise ValueError(f"tile_overlap must be in [0, 1), got {self.tile_overlap}")
+        if (
+            self.tile_above_aspect is not None
+            and self.tile_above_aspect < self.tile_aspect
+        ):
+            raise ValueError(
+                f"tile_above_aspect ({self.tile_above_aspect}) must be at least "
+                f"tile_aspect ({self.tile_aspect})"
+            )
+
+    def key(self) -> str:
+        """Stable identifier of the options, for keying cached extractions."""
+        return ",".join(
+            f"{field.name}={value}" for field, value in zip(fields(self), astuple(self))
+        )
+
+
+DEFAULT_PREPROCESS = PreprocessConfig()
+
+
+def tile_boxes(size: Tuple[int, int], config: PreprocessConfig) -> List[Box]:
+    """Crop boxes (left, top, right, bottom) of the tiles for an image size."""
+    width, height = size
+    if config.tile_above_aspect is None or height <= width * config.tile_above_aspect:
+        return [(0, 0, width, height)]
+    tile_height = min(height, int(width * config.tile_aspect))
+    step = max(1, int(tile_height * (1 - config.tile_overlap)))
+    tops = list(range(0, height - tile_height, step))
+    # The last tile ends at the bottom edge, and never starts above the top one
+    tops.append(max(0, height - tile_height))
+    return [(0, top, width, top + tile_height) for top in tops]
+
+
+def prepare_image(image: Image.Image, config: PreprocessConfig) -> Image.Image:
+    """Convert to a JPEG-compatible mode and downscale to ``max_dimension``."""
+    image = image.convert("L" if config.grayscale else "RGB")
+    if config.max_dimension and max(image.size) > config.max_dimension:
+        image.thumbnail((config.max_dimension, config.max_dimension), Image.LANCZOS)
+    return image
+
+
+def encode_jpeg(image: Image.Image, config: PreprocessConfig) -> bytes:
+    buffered = BytesIO()
+    image.save(buffered, format="JPEG", quality=config.quality, optimize=True)
+    return buffered.getvalue()
+
+
+def preprocess_page(
+    image: Image.Image, config: PreprocessConfig = DEFAULT_PREPROCESS
+) -> List[bytes]:
+    """
+    Turn a catalogue page into the JPEG images sent to the model.
+
+    Args:
+        image (Image.Image): The page as loaded from disk.
+        config (PreprocessConfig): Resizing, encoding and tiling options.
+
+    Returns:
+        List[bytes]: One JPEG per tile, top to bottom; a single one if untiled.
+    """
+    return [
+        encode_jpeg(prepare_image(image.crop(box), config), config)
+        for box in tile_boxes(image.size, config)
+    ]
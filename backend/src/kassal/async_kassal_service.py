@@ -0,0 +1,314 @@
+import asyncio
+import importlib.util
+from typing import Optional, Union, Any, Dict, List
+
+import httpx
+
+from src.kassal.cache import ResponseCache
+from src.kassal.kassal_service import KassalAPI, parse_response
+from src.kassal.rate_limiter import TokenBucketLimiter, backoff_delay, parse_retry_after
+from src.kassal.models_physical_stores import (
+    PhysicalStoresResponse,
+    PhysicalStore,
+    SinglePhysicalStoreResponse,
+)
+from src.kassal.models_products import (
+    ProductsResponse,
+    Product,
+    SingleProductResponse,
+)
+from src.kassal.models_find_by_url_single import FindByUrlResponse
+from src.kassal.models_products_ean import ProductsByEanResponse, ProductsByEanData
+from src.kassal.models_products_compare import (
+    ProductsCompareResponse,
+    ProductsCompareData,
+)
+
+# HTTP/2 needs the optional h2 package; without it httpx speaks HTTP/1.1 with keep-alive.
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AsyncKassalAPI:
+    """
+    Asyncio variant of KassalAPI for use inside the FastAPI handlers.
+
+    All requests share one httpx.AsyncClient, so connections (and TLS sessions) are
+    kept alive and reused instead of being opened per call. HTTP/2 is used when the
+    h2 package is installed. At most ``max_concurrency`` requests are in flight at
+    once; the rest wait on a semaphore without blocking the event loop.
+
+    Requests also pass through a shared token bucket sized to the API quota
+    (``rate_limit`` per minute, None to disable), so bursts are queued rather than
+    rejected. A 429 pauses the bucket for the Retry-After period (or a jittered
+    exponential backoff) and the request is retried up to ``max_retries`` times.
+
+    With a ``cache``, lookups of single products, EANs, URLs and stores are served
+    from it while fresh, and concurrent misses share one upstream call.
+
+    Call ``aclose`` on shutdown to release the connection pool.
+    """
+
+    BASE_URL: str = KassalAPI.BASE_URL
+    GROUPS = KassalAPI.GROUPS
+
+    def __init__(
+        self,
+        token: str,
+        base_url: Optional[str] = None,
+        max_concurrency: int = 10,
+        max_connections: int = 20,
+        timeout: float = 10.0,
+        connect_timeout: float = 5.0,
+        http2: Optional[bool] = None,
+        rate_limit: Optional[int] = 60,
+        burst: int = 5,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        self.token: str = token
+        self.headers: Dict[str, str] = {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/json",
+        }
+        self.base_url = base_url or self.BASE_URL
+        self.max_concurrency = max_concurrency
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=30.0,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.http2 = HTTP2_AVAILABLE if http2 is None else http2
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.limiter: Optional[TokenBucketLimiter] = (
+            TokenBucketLimiter(rate_limit, 60.0, burst) if rate_limit else None
+        )
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.cache = cache
+
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.retry_count = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created on first use so the pool belongs to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self) -> "AsyncKassalAPI":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _get(
+        self, endpoint: str, params: Optional[Dict[str, Union[str, int, float]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Helper method for GET requests.
+        Returns the JSON payload as a dict, from the cache when one is configured.
+        """
+        if self.cache is None:
+            return await self._fetch(endpoint, params)
+        return await self.cache.get_or_fetch(
+            endpoint, params, lambda: self._fetch(endpoint, params)
+        )
+
+    async def _fetch(
+        self, endpoint: str, params: Optional[Dict[str, Union[str, int, float]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a GET request to the API.
+        Waits for a rate limit token and retries on 429. Raises an exception if the
+        retries are used up or the response contains an error.
+        Returns the JSON payload as a dict.
+        """
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire()
+            async with self._semaphore:
+                response = await self._get_client().get(endpoint, params=params)
+            self.request_count += 1
+            if response.status_code != 429:
+                break
+
+            self.rate_limited_count += 1
+            if attempt == self.max_retries:
+                break
+            self.retry_count += 1
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base)
+            if self.limiter is not None:
+                # Hold back every queued request, not just this one
+                self.limiter.pause(delay)
+            else:
+                await asyncio.sleep(delay)
+
+        # Check for rate limit
+        if response.status_code == 429:
+            raise Exception(
+                "Rate limit exceeded. You can only call the API 60 times per minute."
+            )
+
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "requests": self.request_count,
+            "rate_limited": self.rate_limited_count,
+            "retries": self.retry_count,
+            "limiter": self.limiter.metrics() if self.limiter else None,
+            "cache": self.cache.stats() if self.cache else None,
+        }
+
+    # ----------------------------
+    # Physical Stores
+    # ----------------------------
+    async def get_physical_stores(
+        self,
+        search: Optional[str] = None,
+        page: int = 1,
+        size: int = 10,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        km: float = 5,
+        group: Optional[str] = None,
+    ) -> PhysicalStoresResponse:
+        """
+        GET /physical-stores
+        Returns a PhysicalStoresResponse Pydantic model.
+        """
+        params = KassalAPI._physical_stores_params(
+            search, page, size, lat, lng, km, group
+        )
+        raw_json = await self._get("physical-stores", params=params)
+        return parse_response(PhysicalStoresResponse, raw_json, "PhysicalStoresResponse")
+
+    async def get_physical_store_by_id(self, store_id: str) -> PhysicalStore:
+        """
+        GET /physical-stores/{id}
+        Returns a single PhysicalStore model.
+        """
+        raw_json = await self._get(f"physical-stores/{store_id}")
+        return parse_response(
+            SinglePhysicalStoreResponse, raw_json, "SinglePhysicalStoreResponse"
+        ).data
+
+    # ----------------------------
+    # Products
+    # ----------------------------
+    async def get_products(
+        self,
+        search: Optional[str] = None,
+        page: int = 1,
+        size: int = 10,
+        vendor: Optional[str] = None,
+        brand: Optional[str] = None,
+        price_min: Optional[Union[int, float]] = None,
+        price_max: Optional[Union[int, float]] = None,
+        unique: Optional[bool] = None,
+        exclude_without_ean: Optional[bool] = None,
+        sort: Optional[str] = None,
+    ) -> ProductsResponse:
+        """
+        GET /products
+        Returns a ProductsResponse Pydantic model.
+        """
+        params = KassalAPI._products_params(
+            search,
+            page,
+            size,
+            vendor,
+            brand,
+            price_min,
+            price_max,
+            unique,
+            exclude_without_ean,
+            sort,
+        )
+        raw_json = await self._get("products", params=params)
+        return parse_response(ProductsResponse, raw_json, "ProductsResponse")
+
+    async def get_product_by_id(self, product_id: int) -> Product:
+        """
+        GET /products/id/{id}
+        Returns a single Product.
+        """
+        raw_json = await self._get(f"products/id/{product_id}")
+        return parse_response(SingleProductResponse, raw_json, "Product").data
+
+    async def get_product_by_ean(self, ean: str) -> ProductsByEanData:
+        """
+        GET /products/ean/{ean}
+        Returns the inner data (ProductsByEanData) from a ProductsByEanResponse.
+        """
+        raw_json = await self._get(f"products/ean/{ean}")
+        return parse_response(
+            ProductsByEanResponse, raw_json, "ProductsByEanResponse"
+        ).data
+
+    async def get_products_by_ids(
+        self, product_ids: List[int]
+    ) -> Dict[int, Union[Product, Exception]]:
+        """
+        Look up many products at once.
+        Duplicate ids are fetched once and the lookups run concurrently, within
+        the concurrency and rate limits. Returns the product, or the exception
+        raised while fetching it, by id.
+        """
+        unique = list(dict.fromkeys(product_ids))
+        results = await asyncio.gather(
+            *(self.get_product_by_id(product_id) for product_id in unique),
+            return_exceptions=True,
+        )
+        return dict(zip(unique, results))
+
+    async def get_products_by_eans(
+        self, eans: List[str]
+    ) -> Dict[str, Union[ProductsByEanData, Exception]]:
+        """
+        Look up many EANs at once, like get_products_by_ids.
+        """
+        unique = list(dict.fromkeys(eans))
+        results = await asyncio.gather(
+            *(self.get_product_by_ean(ean) for ean in unique), return_exceptions=True
+        )
+        return dict(zip(unique, results))
+
+    async def find_product_by_url_single(self, url: str) -> Product:
+        """
+        GET /products/find-by-url/single
+        Returns a single Product from a response wrapped in {"data": {...}}.
+        """
+        raw_json = await self._get("products/find-by-url/single", params={"url": url})
+        return parse_response(
+            FindByUrlResponse, raw_json, "single-product response"
+        ).data
+
+    async def find_product_by_url_compare(self, url: str) -> ProductsCompareData:
+        """
+        GET /products/find-by-url/compare
+        Returns the inner data (ProductsCompareData) from a ProductsCompareResponse.
+        """
+        raw_json = await self._get("products/find-by-url/compare", params={"url": url})
+        return parse_response(
+            ProductsCompareResponse, raw_json, "compare-products response"
+        ).data
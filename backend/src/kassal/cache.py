@@ -0,0 +1,326 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+from urllib.parse import urlencode
+
+KASSAL_CACHE_PATH = "data/kassal_cache.sqlite3"
+
+# Seconds a response stays fresh, by endpoint prefix. Endpoints without an entry
+# (product search and store listings) are not cached.
+DEFAULT_TTLS: Dict[str, float] = {
+    "products/id/": 15 * 60,
+    "products/ean/": 15 * 60,
+    "products/find-by-url/": 15 * 60,
+    "physical-stores/": 6 * 60 * 60,
+}
+
+Params = Optional[Dict[str, Union[str, int, float]]]
+
+
+class MemoryCacheBackend:
+    """
+    In-process store with per-entry expiry and least-recently-used eviction.
+
+    Values are kept JSON-encoded, so the bound is on the bytes actually held
+    rather than on the number of responses, whose sizes differ by orders of
+    magnitude between a store and a product with a long price history.
+    """
+
+    # Cheap enough to call on the event loop
+    blocking = False
+
+    def __init__(self, max_bytes: int = 32 * 2**20) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = json.dumps(value).encode()
+        self._discard(key)
+        if len(data) > self.max_bytes:
+            return
+        self._entries[key] = (time.time() + ttl, data)
+        self.nbytes += len(data)
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.nbytes -= len(evicted)
+            self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= len(entry[1])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    On-disk store with the same behaviour as MemoryCacheBackend.
+
+    Values are kept as JSON, so cached responses survive a restart. Recency is
+    tracked per row and the least recently used rows are dropped once the stored
+    values exceed ``max_bytes``. Every call does disk I/O, so ResponseCache runs
+    them in a worker thread; the entry count and size are tracked in memory so
+    the status never queries the database.
+    """
+
+    blocking = True
+
+    def __init__(
+        self, path: Union[str, Path] = KASSAL_CACHE_PATH, max_bytes: int = 256 * 2**20
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed "
+                "ON responses (accessed_at)"
+            )
+            # Values are ASCII-only JSON, so their length is their size in bytes
+            self.entries, self.nbytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM responses"
+            ).fetchone()
+
+    def _delete(self, key: str) -> None:
+        row = self._conn.execute(
+            "SELECT LENGTH(value) FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.entries -= 1
+            self.nbytes -= row[0]
+
+    def get(self, key: str) -> Optional[Any]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._delete(key)
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        data = json.dumps(value)
+        now = time.time()
+        with self._lock, self._conn:
+            self._delete(key)
+            if len(data) > self.max_bytes:
+                return
+            self._conn.execute(
+                "INSERT INTO responses VALUES (?, ?, ?, ?)",
+                (key, data, now + ttl, now),
+            )
+            self.entries += 1
+            self.nbytes += len(data)
+            if self.nbytes > self.max_bytes:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Expired rows go first, then the least recently used until under the bound
+        rows = self._conn.execute(
+            "SELECT key, LENGTH(value), expires_at <= ? FROM responses "
+            "ORDER BY expires_at > ?, accessed_at",
+            (now, now),
+        )
+        excess = self.nbytes - self.max_bytes
+        evicted = []
+        for key, size, expired in rows:
+            if excess <= 0:
+                break
+            evicted.append((key,))
+            excess -= size
+            self.nbytes -= size
+            self.evictions += not expired
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        self.entries -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+            self.entries = self.nbytes = 0
+
+    def __len__(self) -> int:
+        return self.entries
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class ResponseCache:
+    """
+    Cache of raw Kassal JSON responses, keyed on endpoint and normalised params.
+
+    Only endpoints with a TTL in ``ttls`` are cached. Concurrent misses for the
+    same key are coalesced: the first caller fetches, the others await its result.
+    Failed fetches are not cached. Responses are cached before parsing, so every
+    caller gets its own model objects. Calls to a blocking backend run in a worker
+    thread so disk I/O never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        backend: Union[MemoryCacheBackend, SQLiteCacheBackend],
+        ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.backend = backend
+        self.ttls = DEFAULT_TTLS if ttls is None else ttls
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, int]] = {
+            prefix: {"hits": 0, "misses": 0, "coalesced": 0} for prefix in self.ttls
+        }
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _group(self, endpoint: str) -> Optional[str]:
+        for prefix in self.ttls:
+            if endpoint.startswith(prefix):
+                return prefix
+        return None
+
+    @staticmethod
+    def key(endpoint: str, params: Params = None) -> str:
+        """Endpoint plus query params in canonical order, unset params dropped."""
+        query = sorted(
+            (name, str(value).strip())
+            for name, value in (params or {}).items()
+            if value is not None
+        )
+        return f"{endpoint.strip('/')}?{urlencode(query)}"
+
+    async def get_or_fetch(
+        self,
+        endpoint: str,
+        params: Params,
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Return the cached response, or call ``fetch`` once and cache its result."""
+        group = self._group(endpoint)
+        if group is None:
+            return await fetch()
+
+        stats = self._stats[group]
+        key = self.key(endpoint, params)
+        while True:
+            value = await self._call(self.backend.get, key)
+            if value is not None:
+                stats["hits"] += 1
+                return value
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            stats["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The caller doing the fetch was cancelled, fetch it ourselves
+
+        stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            # Callers arriving while the value is stored get it from the future
+            future.set_result(value)
+            try:
+                await self._call(self.backend.set, key, value, self.ttls[group])
+            except Exception as e:
+                print(f"Failed to cache {key}: {e}")
+            return value
+        finally:
+            del self._inflight[key]
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(s["hits"] for s in self._stats.values())
+        lookups = hits + sum(s["misses"] + s["coalesced"] for s in self._stats.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "bytes": self.backend.nbytes,
+            "max_bytes": self.backend.max_bytes,
+            "evictions": self.backend.evictions,
+            "hits": hits,
+            "misses": sum(s["misses"] for s in self._stats.values()),
+            "coalesced": sum(s["coalesced"] for s in self._stats.values()),
+            "hit_ratio": hits / lookups if lookups else None,
+            "endpoints": {
+                prefix: {"ttl_s": self.ttls[prefix], **counts}
+                for prefix, counts in self._stats.items()
+            },
+        }
+
+
+def make_response_cache(
+    kind: str, path: str = KASSAL_CACHE_PATH, max_bytes: int = 32 * 2**20
+) -> Optional[ResponseCache]:
+    """
+    Build the response cache selected in the configuration.
+
+    Args:
+        kind (str): "memory", "sqlite" or "off".
+        path (str): Database file for the SQLite backend.
+        max_bytes (int): Size of the stored responses past which the least
+            recently used are evicted.
+    """
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return ResponseCache(MemoryCacheBackend(max_bytes))
+    if kind == "sqlite":
+        return ResponseCache(SQLiteCacheBackend(path, max_bytes))
+    raise ValueError(f"Unknown Kassal cache backend: {kind}")
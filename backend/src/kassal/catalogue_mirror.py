@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import re
+import sqlite3
+import threading
+import time
+from math import ceil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_products import (
+    Product,
+    ProductsLinks,
+    ProductsMeta,
+    ProductsResponse,
+)
+from src.kassal.rate_limiter import background_priority
+
+CATALOGUE_MIRROR_PATH = "data/catalogue_mirror.sqlite3"
+
+# The Kassal sort orders the mirror can reproduce; others go to the live API
+SORTS: Dict[str, str] = {
+    "name_asc": "p.name COLLATE NOCASE ASC",
+    "name_desc": "p.name COLLATE NOCASE DESC",
+    "price_asc": "p.current_price IS NULL, p.current_price ASC",
+    "price_desc": "p.current_price IS NULL, p.current_price DESC",
+    "date_asc": "p.updated_at ASC",
+    "date_desc": "p.updated_at DESC",
+}
+
+# Products per page when crawling, the most Kassal allows
+CRAWL_PAGE_SIZE = 100
+
+_WORD = re.compile(r"\w+")
+
+
+def fts_query(search: str) -> Optional[str]:
+    """Every word of the search as a quoted prefix term, all of them required."""
+    words = _WORD.findall(search.lower())
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+class CatalogueMirror:
+    """
+    Local copy of the Kassal product catalogue with a full-text index.
+
+    The mirror is filled by crawling /products page by page. The first crawl
+    walks the whole catalogue and can resume where it stopped; later crawls ask
+    for the most recently updated products first and stop at the first page
+    that holds nothing newer than the last crawl. Product names, brands and
+    vendors are indexed with SQLite FTS5, so /products searches and filters can
+    be answered locally once a full crawl has completed.
+    """
+
+    def __init__(self, path: Union[str, Path] = CATALOGUE_MIRROR_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS products (
+                    id INTEGER PRIMARY KEY, name TEXT NOT NULL, brand TEXT,
+                    vendor TEXT, ean TEXT, current_price REAL,
+                    updated_at TEXT NOT NULL, payload TEXT NOT NULL);
+                CREATE INDEX IF NOT EXISTS products_updated ON products (updated_at);
+                CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                    name, brand, vendor, content='products', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2');
+                CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products
+                BEGIN
+                    INSERT INTO products_fts (rowid, name, brand, vendor)
+                    VALUES (new.id, new.name, new.brand, new.vendor);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products
+                BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, name, brand, vendor)
+                    VALUES ('delete', old.id, old.name, old.brand, old.vendor);
+                END;
+                CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE ON products
+                BEGIN
+                    INSERT INTO products_fts (products_fts, rowid, name, brand, vendor)
+                    VALUES ('delete', old.id, old.name, old.brand, old.vendor);
+                    INSERT INTO products_fts (rowid, name, brand, vendor)
+                    VALUES (new.id, new.name, new.brand, new.vendor);
+                END;
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                """)
+        self.served = 0
+        self.fallbacks = 0
+        self.last_error: Optional[str] = None
+
+    def _get_state(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM state WHERE key = ?", (key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, **values: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in values.items()],
+            )
+
+    def state(self, key: str) -> Any:
+        value = self._get_state(key)
+        return json.loads(value) if value is not None else None
+
+    @property
+    def complete(self) -> bool:
+        """Whether a full crawl has finished, so the mirror can answer searches."""
+        return bool(self.state("complete"))
+
+    def upsert(self, products: List[Product]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET name = excluded.name, "
+                "brand = excluded.brand, vendor = excluded.vendor, "
+                "ean = excluded.ean, current_price = excluded.current_price, "
+                "updated_at = excluded.updated_at, payload = excluded.payload",
+                [
+                    (
+                        p.id,
+                        p.name,
+                        p.brand,
+                        p.vendor,
+                        p.ean,
+                        p.current_price,
+                        p.updated_at.isoformat(),
+                        p.model_dump_json(exclude={"sale"}),
+                    )
+                    for p in products
+                ],
+            )
+
+    async def crawl(
+        self,
+        api: AsyncKassalAPI,
+        max_pages: Optional[int] = None,
+        page_size: int = CRAWL_PAGE_SIZE,
+    ) -> int:
+        """
+        Fetch new and updated products from Kassal.
+
+        Args:
+            api (AsyncKassalAPI): Client used for the /products pages, at
+                background priority so interactive requests go first.
+            max_pages (Optional[int]): Stop after this many pages; the next crawl
+                continues a full crawl where this one stopped.
+            page_size (int): Products per page.
+
+        Returns:
+            int: The number of pages fetched.
+        """
+        complete = self.complete
+        high_water = self.state("high_water")
+        page = 1 if complete else self.state("next_page") or 1
+        # Newest update seen by this crawl, carried over when a full crawl resumes
+        newest: Optional[str] = None if complete else self.state("crawl_high_water")
+        started = time.time()
+        fetched = 0
+        with background_priority():
+            while max_pages is None or fetched < max_pages:
+                response = await api.get_products(
+                    page=page, size=page_size, sort="date_desc"
+                )
+                fetched += 1
+                products = response.data
+                await asyncio.to_thread(self.upsert, products)
+                stamps = [p.updated_at.isoformat() for p in products]
+                newest = max(filter(None, [newest, *stamps]), default=None)
+                last_page = response.meta.last_page
+                done = not products or (last_page is not None and page >= last_page)
+                if complete and high_water and stamps and min(stamps) <= high_water:
+                    done = True  # Everything further down is older than the last crawl
+                if done:
+                    # Only a finished crawl moves the high water mark, so an
+                    # interrupted incremental crawl is repeated in full
+                    self._set_state(
+                        complete=True,
+                        high_water=max(
+                            filter(None, [high_water, newest]), default=None
+                        ),
+                        next_page=1,
+                        crawl_high_water=None,
+                    )
+                    break
+                page += 1
+                if not complete:
+                    self._set_state(next_page=page, crawl_high_water=newest)
+        self._set_state(last_crawl=started, last_crawl_pages=fetched)
+        return fetched
+
+    def search(
+        self,
+        search: Optional[str] = None,
+        page: int = 1,
+        size: int = 10,
+        vendor: Optional[str] = None,
+        brand: Optional[str] = None,
+        price_min: Optional[Union[int, float]] = None,
+        price_max: Optional[Union[int, float]] = None,
+        unique: Optional[bool] = None,
+        exclude_without_ean: Optional[bool] = None,
+        sort: Optional[str] = None,
+    ) -> Optional[ProductsResponse]:
+        """
+        Answer a /products query from the mirror.
+
+        Takes the same filters as AsyncKassalAPI.get_products. Returns None when
+        the live API should be asked instead: before the first full crawl, for
+        filters the mirror cannot reproduce, and when nothing matches.
+        """
+        if not self.complete or unique or (sort and sort not in SORTS):
+            self.fallbacks += 1
+            return None
+
+        where: List[str] = []
+        args: List[Any] = []
+        source = "products p"
+        order = SORTS.get(sort or "", "p.id")
+        if search:
+            query = fts_query(search)
+            if query is None:
+                self.fallbacks += 1
+                return None
+            source = "products_fts JOIN products p ON p.id = products_fts.rowid"
+            where.append("products_fts MATCH ?")
+            args.append(query)
+            if not sort:
+                order = "products_fts.rank"
+        if vendor:
+            where.append("p.vendor = ? COLLATE NOCASE")
+            args.append(vendor)
+        if brand:
+            where.append("p.brand = ? COLLATE NOCASE")
+            args.append(brand)
+        if price_min is not None:
+            where.append("p.current_price >= ?")
+            args.append(price_min)
+        if price_max is not None:
+            where.append("p.current_price <= ?")
+            args.append(price_max)
+        if exclude_without_ean:
+            where.append("p.ean IS NOT NULL AND p.ean != ''")
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._lock:
+            (total,) = self._conn.execute(
+                f"SELECT COUNT(*) FROM {source} {clause}", args
+            ).fetchone()
+            rows = self._conn.execute(
+                f"SELECT p.payload FROM {source} {clause} "
+                f"ORDER BY {order}, p.id LIMIT ? OFFSET ?",
+                [*args, size, (page - 1) * size],
+            ).fetchall()
+        if not total:
+            self.fallbacks += 1
+            return None
+        self.served += 1
+
+        data = [Product.model_validate_json(payload) for (payload,) in rows]
+        last_page = ceil(total / size)
+        start = (page - 1) * size
+        base_path = "/products"
+        return ProductsResponse(
+            data=data,
+            links=ProductsLinks(
+                first=f"{base_path}?page=1&size={size}",
+                last=f"{base_path}?page={last_page}&size={size}",
+                prev=f"{base_path}?page={page-1}&size={size}" if page > 1 else None,
+                next=(
+                    f"{base_path}?page={page+1}&size={size}"
+                    if page < last_page
+                    else None
+                ),
+            ),
+            meta=ProductsMeta.model_validate(
+                {
+                    "current_page": page,
+                    "from": start + 1 if data else 0,
+                    "to": start + len(data),
+                    "per_page": size,
+                    "path": base_path,
+                    "total": total,
+                    "last_page": last_page,
+                }
+            ),
+        )
+
+    async def refresh_forever(self, api: AsyncKassalAPI, interval: float) -> None:
+        """Crawl every ``interval`` seconds; run as a background task."""
+        while True:
+            try:
+                await self.crawl(api)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Catalogue mirror crawl failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (products,) = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()
+        return {
+            "products": products,
+            "complete": self.complete,
+            "high_water": self.state("high_water"),
+            "next_page": self.state("next_page"),
+            "last_crawl": self.state("last_crawl"),
+            "last_crawl_pages": self.state("last_crawl_pages"),
+            "served": self.served,
+            "fallbacks": self.fallbacks,
+            "last_error": self.last_error,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    from src.configuration import KASSAL_API_KEY
+
+    parser = argparse.ArgumentParser(description="Crawl Kassal into the mirror")
+    parser.add_argument("--pages", type=int, help="Stop after this many pages")
+    args = parser.parse_args()
+
+    async def main() -> None:
+        mirror = CatalogueMirror()
+        async with AsyncKassalAPI(token=KASSAL_API_KEY) as api:
+            pages = await mirror.crawl(api, max_pages=args.pages)
+        print(f"Fetched {pages} pages")
+        print(mirror.stats())
+
+    asyncio.run(main())
@@ -1,6 +1,6 @@
-from typing import Optional, Union, Any, Dict
+from typing import Optional, Union, Any, Dict, Type, TypeVar
 import requests
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 
 from src.kassal.models_physical_stores import (
     PhysicalStoresResponse,
@@ -21,6 +21,16 @@ from src.kassal.models_products_compare import (
     ProductsCompareData,
 )
 
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def parse_response(model: Type[ModelT], raw_json: Dict[str, Any], name: str) -> ModelT:
+    """Validate a JSON payload, raising ValueError with a readable message on failure."""
+    try:
+        return model.model_validate(raw_json)
+    except ValidationError as e:
+        raise ValueError(f"Failed to parse {name}: {e}")
+
 
 class KassalAPI:
     """
@@ -101,14 +111,30 @@ class KassalAPI:
         GET /physical-stores
         Returns a PhysicalStoresResponse Pydantic model.
         """
+        params = self._physical_stores_params(search, page, size, lat, lng, km, group)
+        raw_json = self._get("physical-stores", params=params)
+        return parse_response(PhysicalStoresResponse, raw_json, "PhysicalStoresResponse")
+
+    @classmethod
+    def _physical_stores_params(
+        cls,
+        search: Optional[str],
+        page: int,
+        size: int,
+        lat: Optional[float],
+        lng: Optional[float],
+        km: float,
+        group: Optional[str],
+    ) -> Dict[str, Union[str, int, float]]:
+        """Validate the /physical-stores filters and build the query parameters."""
         if (lat is None) != (lng is None):
             raise ValueError(
                 "Both latitude and longitude must be set together or omitted."
             )
         if km < 0:
             raise ValueError("The radius (km) must be non-negative.")
-        if group and group not in self.GROUPS:
-            raise ValueError(f"Invalid group. Must be one of: {self.GROUPS}")
+        if group and group not in cls.GROUPS:
+            raise ValueError(f"Invalid group. Must be one of: {cls.GROUPS}")
 
         params: Dict[str, Union[str, int, float]] = {}
         if search:
@@ -121,12 +147,7 @@ class KassalAPI:
             params["km"] = km
         if group:
             params["group"] = group
-
-        raw_json = self._get("physical-stores", params=params)
-        try:
-            return PhysicalStoresResponse.model_validate(raw_json)
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse PhysicalStoresResponse: {e}")
+        return params
 
     def get_physical_store_by_id(self, store_id: str) -> PhysicalStore:
         """
@@ -135,11 +156,9 @@ class KassalAPI:
         The endpoint returns the store wrapped in {"data": {...}}.
         """
         raw_json = self._get(f"physical-stores/{store_id}")
-        try:
-            parsed = SinglePhysicalStoreResponse.model_validate(raw_json)
-            return parsed.data
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse SinglePhysicalStoreResponse: {e}")
+        return parse_response(
+            SinglePhysicalStoreResponse, raw_json, "SinglePhysicalStoreResponse"
+        ).data
 
     # ----------------------------
     # Products
@@ -161,6 +180,35 @@ class KassalAPI:
         GET /products
         Returns a ProductsResponse Pydantic model.
         """
+        params = self._products_params(
+            search,
+            page,
+            size,
+            vendor,
+            brand,
+            price_min,
+            price_max,
+            unique,
+            exclude_without_ean,
+            sort,
+        )
+        raw_json = self._get("products", params=params)
+        return parse_response(ProductsResponse, raw_json, "ProductsResponse")
+
+    @staticmethod
+    def _products_params(
+        search: Optional[str],
+        page: int,
+        size: int,
+        vendor: Optional[str],
+        brand: Optional[str],
+        price_min: Optional[Union[int, float]],
+        price_max: Optional[Union[int, float]],
+        unique: Optional[bool],
+        exclude_without_ean: Optional[bool],
+        sort: Optional[str],
+    ) -> Dict[str, Union[str, int, float]]:
+        """Build the /products query parameters, leaving out unset filters."""
         params: Dict[str, Union[str, int, float]] = {}
         if search:
             params["search"] = search
@@ -180,12 +228,7 @@ class KassalAPI:
             params["exclude_without_ean"] = str(exclude_without_ean).lower()
         if sort:
             params["sort"] = sort
-
-        raw_json = self._get("products", params=params)
-        try:
-            return ProductsResponse.model_validate(raw_json)
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse ProductsResponse: {e}")
+        return params
 
     def get_product_by_id(self, product_id: int) -> Product:
         """
@@ -194,11 +237,7 @@ class KassalAPI:
         The endpoint returns the product wrapped in {"data": {...}}.
         """
         raw_json = self._get(f"products/id/{product_id}")
-        try:
-            parsed = SingleProductResponse.model_validate(raw_json)
-            return parsed.data
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse Product: {e}")
+        return parse_response(SingleProductResponse, raw_json, "Product").data
 
     def get_product_by_ean(self, ean: str) -> ProductsByEanData:
         """
@@ -206,10 +245,9 @@ class KassalAPI:
         Returns the inner data (ProductsByEanData) from a ProductsByEanResponse.
         """
         raw_json = self._get(f"products/ean/{ean}")
-        try:
-            return ProductsByEanResponse.model_validate(raw_json).data
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse ProductsByEanResponse: {e}")
+        return parse_response(
+            ProductsByEanResponse, raw_json, "ProductsByEanResponse"
+        ).data
 
     def find_product_by_url_single(self, url: str) -> Product:
         """
@@ -218,11 +256,9 @@ class KassalAPI:
         """
         params: Dict[str, str] = {"url": url}
         raw_json = self._get("products/find-by-url/single", params=params)
-        try:
-            parsed = FindByUrlResponse.model_validate(raw_json)
-            return parsed.data
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse single-product response: {e}")
+        return parse_response(
+            FindByUrlResponse, raw_json, "single-product response"
+        ).data
 
     def find_product_by_url_compare(self, url: str) -> ProductsCompareData:
         """
@@ -231,7 +267,6 @@ class KassalAPI:
         """
         params: Dict[str, str] = {"url": url}
         raw_json = self._get("products/find-by-url/compare", params=params)
-        try:
-            return ProductsCompareResponse.model_validate(raw_json).data
-        except ValidationError as e:
-            raise ValueError(f"Failed to parse compare-products response: {e}")
+        return parse_response(
+            ProductsCompareResponse, raw_json, "compare-products response"
+        ).data
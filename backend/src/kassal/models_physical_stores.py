@@ -64,3 +64,8 @@ class PhysicalStoresResponse(BaseModel):
 
 class SinglePhysicalStoreResponse(BaseModel):
     data: PhysicalStore
+
+
+class NearbyStore(BaseModel):
+    store: PhysicalStore
+    distance_km: float
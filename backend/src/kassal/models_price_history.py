@@ -0,0 +1,47 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class PriceStats(BaseModel):
+    product_id: int
+    name: Optional[str]
+    min: float
+    max: float
+    median: float
+    mean: float
+    observations: int
+    current: float
+
+
+class DiscountCheck(BaseModel):
+    product_id: int
+    name: Optional[str]
+    current: float
+    since: int
+    reference_low: Optional[float]
+    discount_pct: Optional[float]
+    real_discount: bool
+
+
+class PriceDrop(BaseModel):
+    product_id: int
+    name: Optional[str]
+    current: float
+    previous_high: float
+    drop_pct: float
+
+
+class PriceStatsResponse(BaseModel):
+    days: float
+    data: List[PriceStats]
+
+
+class DiscountCheckResponse(BaseModel):
+    days: float
+    data: List[DiscountCheck]
+
+
+class PriceDropResponse(BaseModel):
+    days: float
+    min_drop_pct: float
+    data: List[PriceDrop]
@@ -74,6 +74,9 @@ class ProductsMeta(BaseModel):
     path: str
     per_page: int
     to: int
+    # Not sent by Kassal, filled in by endpoints that know the full result size
+    total: Optional[int] = None
+    last_page: Optional[int] = None
 
 
 class ProductsResponse(BaseModel):
@@ -0,0 +1,37 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from src.kassal.models_products import Product
+from src.kassal.models_products_ean import ProductsByEanData
+
+# Most ids or EANs accepted in one batch request
+MAX_BATCH_SIZE = 100
+
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE, description="Product ids"
+    )
+    eans: List[str] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE, description="EANs"
+    )
+
+
+class ProductBatchItem(BaseModel):
+    id: int
+    product: Optional[Product] = None
+    error: Optional[str] = None
+
+
+class EanBatchItem(BaseModel):
+    ean: str
+    data: Optional[ProductsByEanData] = None
+    error: Optional[str] = None
+
+
+class ProductBatchResponse(BaseModel):
+    """Results for every requested id and EAN, in the order they were requested."""
+
+    ids: List[ProductBatchItem]
+    eans: List[EanBatchItem]
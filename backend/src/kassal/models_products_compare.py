@@ -1,9 +1,10 @@
 from typing import List, Optional, Any
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.kassal.models_products_ean import CurrentPriceDetail
 from src.kassal.models_products import PriceHistory, Allergen, Nutrition, Store
+from src.sales_service import Sale
 
 
 class Kassalapp(BaseModel):
@@ -29,6 +30,11 @@ class ProductCompare(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+    sale: Optional[Sale] = Field(
+        None,
+        description="Optional sale information (price, percentage, or n-for-price)",
+    )
+
 
 class ProductsCompareData(BaseModel):
     ean: str
@@ -25,7 +25,7 @@ class EanProduct(BaseModel):
     ingredients: Optional[str]
     url: str
     image: str
-    store: Store
+    store: Optional[Store]
     current_price: CurrentPriceDetail
     weight: Optional[float]
     weight_unit: Optional[str]
@@ -0,0 +1,354 @@
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.kassal.catalogue_mirror import CATALOGUE_MIRROR_PATH
+
+PRICE_HISTORY_PATH = "data/price_history.sqlite3"
+
+DAY = 24 * 60 * 60
+
+# One price observation: product id, unix time in seconds, price
+PricePoint = Tuple[int, int, float]
+
+
+def _price_points(product: Any) -> Tuple[int, Optional[str], Optional[str], list]:
+    """
+    Id, name, store code and (time, price) history of a product.
+
+    Accepts Product, EanProduct and ProductCompare models as well as the raw
+    product dicts stored by the catalogue mirror.
+    """
+    if isinstance(product, dict):
+        store = product.get("store") or {}
+        return (
+            product["id"],
+            product.get("name"),
+            store.get("code"),
+            [
+                (int(datetime.fromisoformat(p["date"]).timestamp()), p["price"])
+                for p in product.get("price_history") or []
+            ],
+        )
+    store = getattr(product, "store", None)
+    return (
+        product.id,
+        product.name,
+        store.code if store is not None else None,
+        [(int(p.date.timestamp()), p.price) for p in product.price_history],
+    )
+
+
+def _window(ids: np.ndarray, ts: np.ndarray, start: Any, end: Any) -> np.ndarray:
+    """
+    Mask of the observations in ``[start, end)`` and of the price in effect at
+    ``start``, i.e. each product's last observation before it.
+
+    ``ids`` and ``ts`` are sorted by product and time; ``start`` and ``end`` are
+    scalars or arrays aligned with them, giving every product its own window.
+    """
+    start = np.broadcast_to(start, ts.shape)
+    last_of_product = np.ones(len(ids), dtype=bool)
+    last_of_product[:-1] = ids[1:] != ids[:-1]
+    next_ts = np.empty_like(ts)
+    next_ts[:-1] = ts[1:]
+    carried = (ts < start) & (last_of_product | (next_ts >= start))
+    return (carried | (ts >= start)) & (ts < end)
+
+
+def _segments(ids: np.ndarray) -> np.ndarray:
+    """Start of each product's run of rows in an array sorted by product."""
+    if not len(ids):
+        return np.empty(0, dtype=np.int64)
+    return np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+
+
+def to_records(frame: pd.DataFrame, names: Dict[int, str]) -> List[Dict[str, Any]]:
+    """Rows of an analytics frame as dicts with product_id and name, NaN as None."""
+    frame = frame.astype(object).where(frame.notna(), None)
+    records = frame.reset_index().to_dict("records")
+    for record in records:
+        record["name"] = names.get(record["product_id"])
+    return records
+
+
+class PriceHistoryStore:
+    """
+    Price observations of every product fetched from Kassal, with analytics.
+
+    Products returned by Kassal carry their price history. Each new observation
+    is appended to an SQLite table and, once the analytics have been used, to an
+    in-memory columnar frame (product id, time, price) sorted by product and
+    time. Window statistics, discount checks and price-drop detection are masks
+    and per-product NumPy reductions over the columns of that frame, for any
+    number of products at once.
+    """
+
+    def __init__(self, path: Union[str, Path] = PRICE_HISTORY_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS prices ("
+                "product_id INTEGER NOT NULL, ts INTEGER NOT NULL, "
+                "price REAL NOT NULL, PRIMARY KEY (product_id, ts)) WITHOUT ROWID;"
+                "CREATE TABLE IF NOT EXISTS products ("
+                "id INTEGER PRIMARY KEY, name TEXT, store TEXT);"
+            )
+            # Newest observation per product, so only new points are written
+            self._latest: Dict[int, int] = dict(
+                self._conn.execute(
+                    "SELECT product_id, MAX(ts) FROM prices GROUP BY product_id"
+                )
+            )
+            self.names: Dict[int, str] = {
+                product_id: name
+                for product_id, name in self._conn.execute(
+                    "SELECT id, name FROM products"
+                )
+            }
+        self._frame: Optional[pd.DataFrame] = None
+        self._pending: List[PricePoint] = []
+        self.recorded = 0
+
+    def record(self, products: Iterable[Any]) -> int:
+        """
+        Store the new price observations of fetched products.
+
+        Args:
+            products (Iterable[Any]): Product, EanProduct or ProductCompare
+                models, or raw product dicts from Kassal.
+
+        Returns:
+            int: The number of observations that were not known yet.
+        """
+        rows: List[PricePoint] = []
+        named: List[Tuple[int, Optional[str], Optional[str]]] = []
+        with self._lock:
+            for product in products:
+                product_id, name, store, points = _price_points(product)
+                if self.names.get(product_id) != name:
+                    self.names[product_id] = name
+                    named.append((product_id, name, store))
+                latest = self._latest.get(product_id, -1)
+                new = [(product_id, ts, price) for ts, price in points if ts > latest]
+                if new:
+                    self._latest[product_id] = max(ts for _, ts, _ in new)
+                    rows.extend(new)
+            if not rows and not named:
+                return 0
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO prices VALUES (?, ?, ?)", rows
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO products VALUES (?, ?, ?)", named
+                )
+            if self._frame is not None:
+                self._pending.extend(rows)
+            self.recorded += len(rows)
+        return len(rows)
+
+    def frame(self) -> pd.DataFrame:
+        """All observations as columns product_id, ts and price, by product and time."""
+        with self._lock:
+            if self._frame is None:
+                frame = pd.read_sql_query(
+                    "SELECT product_id, ts, price FROM prices "
+                    "ORDER BY product_id, ts",
+                    self._conn,
+                )
+                self._frame = frame.astype(
+                    {"product_id": np.int64, "ts": np.int64, "price": np.float64}
+                )
+                self._pending = []
+            elif self._pending:
+                new = pd.DataFrame(self._pending, columns=["product_id", "ts", "price"])
+                frame = pd.concat([self._frame, new], ignore_index=True)
+                self._frame = frame.sort_values(
+                    ["product_id", "ts"], kind="stable", ignore_index=True
+                )
+                self._pending = []
+            return self._frame
+
+    def _select(self, product_ids: Optional[Sequence[int]]) -> pd.DataFrame:
+        frame = self.frame()
+        if product_ids is None:
+            return frame
+        return frame[frame["product_id"].isin(list(product_ids))]
+
+    def window_stats(
+        self,
+        days: float = 30,
+        product_ids: Optional[Sequence[int]] = None,
+        now: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Price statistics of each product over the last ``days`` days.
+
+        The price in effect when the window opened counts as an observation, so
+        a product whose price has not changed in the window still has stats.
+
+        Returns:
+            pd.DataFrame: Indexed by product_id, with columns min, max, median,
+            mean, observations and current.
+        """
+        now = time.time() if now is None else now
+        frame = self._select(product_ids)
+        ids, ts = frame["product_id"].to_numpy(), frame["ts"].to_numpy()
+        keep = _window(ids, ts, now - days * DAY, np.inf)
+        ids, prices = ids[keep], frame["price"].to_numpy()[keep]
+
+        starts = _segments(ids)
+        counts = np.diff(np.r_[starts, len(ids)])
+        # Prices sorted within each product, for the medians
+        ordered = prices[np.lexsort((prices, ids))]
+        median = (
+            ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]
+        ) / 2
+        return pd.DataFrame(
+            {
+                "min": np.minimum.reduceat(prices, starts),
+                "max": np.maximum.reduceat(prices, starts),
+                "median": median,
+                "mean": np.add.reduceat(prices, starts) / counts,
+                "observations": counts,
+                "current": prices[starts + counts - 1],
+            },
+            index=pd.Index(ids[starts], name="product_id"),
+        )
+
+    def discounts(
+        self, days: float = 30, product_ids: Optional[Sequence[int]] = None
+    ) -> pd.DataFrame:
+        """
+        Compare each product's current price with its lowest price before it.
+
+        The reference is the lowest price in the ``days`` days before the current
+        price took effect, the way price reductions are judged against the
+        30-day low. A price that was raised just before a "sale" is therefore
+        not a real discount.
+
+        Returns:
+            pd.DataFrame: Indexed by product_id, with columns current, since (unix
+            time the current price took effect), reference_low, discount_pct and
+            real_discount. reference_low is NaN when there is no earlier price.
+        """
+        frame = self._select(product_ids)
+        ids = frame["product_id"].to_numpy()
+        ts = frame["ts"].to_numpy()
+        prices = frame["price"].to_numpy()
+        starts = _segments(ids)
+        ends = np.r_[starts[1:], len(ids)][: len(starts)]
+
+        # Consecutive observations with the same price form one run; the last
+        # run of each product is its current price
+        changed = np.ones(len(ids), dtype=bool)
+        changed[1:] = (ids[1:] != ids[:-1]) | (prices[1:] != prices[:-1])
+        run_start = np.maximum.accumulate(np.where(changed, np.arange(len(ids)), 0))
+        since = ts[run_start[ends - 1]]
+        current = prices[ends - 1]
+
+        row_since = np.repeat(since, ends - starts)
+        keep = _window(ids, ts, row_since - days * DAY, row_since)
+        reference = np.full(len(starts), np.nan)
+        if keep.any():
+            kept = starts.searchsorted(np.flatnonzero(keep), side="right") - 1
+            first = _segments(kept)
+            reference[kept[first]] = np.minimum.reduceat(prices[keep], first)
+
+        with np.errstate(invalid="ignore"):
+            return pd.DataFrame(
+                {
+                    "current": current,
+                    "since": since,
+                    "reference_low": reference,
+                    "discount_pct": (reference - current) / reference * 100,
+                    "real_discount": current < reference,
+                },
+                index=pd.Index(ids[starts], name="product_id"),
+            )
+
+    def price_drops(
+        self,
+        days: float = 7,
+        min_drop_pct: float = 10,
+        product_ids: Optional[Sequence[int]] = None,
+        now: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """
+        Products whose price has dropped recently, largest drop first.
+
+        A product is included when its current price is at least
+        ``min_drop_pct`` percent below its highest price in the last ``days`` days.
+
+        Returns:
+            pd.DataFrame: Indexed by product_id, with columns current,
+            previous_high and drop_pct.
+        """
+        stats = self.window_stats(days, product_ids, now)
+        drops = pd.DataFrame(
+            {
+                "current": stats["current"],
+                "previous_high": stats["max"],
+                "drop_pct": (stats["max"] - stats["current"]) / stats["max"] * 100,
+            }
+        )
+        drops = drops[drops["drop_pct"] >= min_drop_pct]
+        return drops.sort_values("drop_pct", ascending=False, kind="stable")
+
+    def import_mirror(self, path: Union[str, Path] = CATALOGUE_MIRROR_PATH) -> int:
+        """Record the price histories of every product in the catalogue mirror."""
+        conn = sqlite3.connect(str(path))
+        try:
+            recorded = 0
+            cursor = conn.execute("SELECT payload FROM products")
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    return recorded
+                recorded += self.record(json.loads(payload) for (payload,) in rows)
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (observations,) = self._conn.execute(
+                "SELECT COUNT(*) FROM prices"
+            ).fetchone()
+        return {
+            "products": len(self._latest),
+            "observations": observations,
+            "recorded": self.recorded,
+            "in_memory": self._frame is not None,
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill or inspect the price history")
+    parser.add_argument(
+        "--from-mirror",
+        nargs="?",
+        const=CATALOGUE_MIRROR_PATH,
+        help="Import the price histories of the catalogue mirror",
+    )
+    args = parser.parse_args()
+
+    store = PriceHistoryStore()
+    if args.from_mirror:
+        print(f"Recorded {store.import_mirror(args.from_mirror)} observations")
+    print(store.stats())
@@ -0,0 +1,203 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Number of recent waits kept per priority for the percentile metrics.
+WAIT_WINDOW = 1000
+
+_priority: ContextVar[int] = ContextVar("kassal_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """
+    Mark Kassal calls made in this context (and tasks started from it) as bulk work.
+
+    Queued background calls only get a token when no interactive call is waiting.
+    """
+    token = _priority.set(BACKGROUND)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def parse_retry_after(value: Optional[str], now: Optional[datetime] = None) -> Optional[float]:
+    """
+    Parse a Retry-After header, given either in seconds or as an HTTP date.
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    base: float = 1.0,
+    cap: float = 60.0,
+    rng: Optional[random.Random] = None,
+) -> float:
+    """
+    Exponential backoff with jitter for the given retry attempt (0-based).
+
+    Half of the delay is fixed and half random, so retries from many callers spread
+    out without ever retrying immediately.
+    """
+    delay = min(cap, base * 2**attempt)
+    return delay / 2 + (rng or random).uniform(0, delay / 2)
+
+
+class TokenBucketLimiter:
+    """
+    Asyncio token bucket that queues callers instead of failing them.
+
+    Tokens refill continuously at ``rate`` per ``per`` seconds up to ``burst``.
+    Callers that find the bucket empty wait in a priority queue (interactive
+    before background, then first come first served) and are granted tokens as
+    they refill. ``pause`` stops all grants for a while, e.g. after the server
+    answered 429 with a Retry-After header.
+    """
+
+    def __init__(self, rate: float = 60, per: float = 60.0, burst: int = 5) -> None:
+        if rate <= 0 or per <= 0 or burst < 1:
+            raise ValueError("rate, per and burst must be positive.")
+        self.rate = rate / per
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.max_queue_depth = 0
+        self._waits: Dict[int, deque] = {p: deque(maxlen=WAIT_WINDOW) for p in PRIORITY_NAMES}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _delay(self) -> float:
+        """Seconds until the next token can be granted."""
+        now = time.monotonic()
+        self._refill(now)
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """
+        Wait for a token.
+
+        Args:
+            priority (Optional[int]): INTERACTIVE or BACKGROUND, defaults to the
+                priority of the current context.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        priority = _priority.get() if priority is None else priority
+        start = time.monotonic()
+        if not self._queue and self._delay() == 0:
+            self._tokens -= 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._queue, (priority, next(self._seq), future))
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            self._dispatch()
+            try:
+                await future
+            except asyncio.CancelledError:
+                # A token granted just before cancellation goes back in the bucket
+                if future.done() and not future.cancelled():
+                    self._tokens += 1
+                self._dispatch()
+                raise
+        waited = time.monotonic() - start
+        self.granted += 1
+        self._waits[priority].append(waited)
+        return waited
+
+    def pause(self, seconds: float) -> None:
+        """Grant no tokens for ``seconds``, and restart from an empty bucket."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = min(self._tokens, 0.0)
+        self._paused_until = max(self._paused_until, now + seconds)
+
+    def _dispatch(self) -> None:
+        # Hand out available tokens in queue order, then sleep until the next one
+        while self._queue:
+            future = self._queue[0][2]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            delay = self._delay()
+            if delay > 0:
+                if self._timer is None:
+                    loop = asyncio.get_running_loop()
+                    self._timer = loop.call_later(delay, self._on_timer)
+                return
+            heapq.heappop(self._queue)
+            self._tokens -= 1
+            future.set_result(None)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
+
+    def metrics(self) -> Dict[str, Any]:
+        waits: Dict[str, Any] = {}
+        for priority, name in PRIORITY_NAMES.items():
+            recent = np.array(self._waits[priority]) * 1000
+            waits[name] = {
+                "count": len(recent),
+                "mean_ms": float(recent.mean()) if len(recent) else None,
+                "p50_ms": float(np.percentile(recent, 50)) if len(recent) else None,
+                "p99_ms": float(np.percentile(recent, 99)) if len(recent) else None,
+            }
+        return {
+            "rate_per_minute": self.rate * 60,
+            "burst": self.burst,
+            "tokens": round(max(self._tokens, 0.0), 3),
+            "paused_for_s": max(0.0, self._paused_until - time.monotonic()),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "granted": self.granted,
+            "wait": waits,
+        }
@@ -0,0 +1,371 @@
+import asyncio
+import json
+import os
+import time
+from math import ceil, cos, radians
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.kassal_service import KassalAPI
+from src.kassal.models_physical_stores import (
+    Links,
+    Meta,
+    PhysicalStore,
+    PhysicalStoresResponse,
+)
+from src.kassal.rate_limiter import background_priority
+
+PHYSICAL_STORES_PATH = "data/physical_stores.json"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195  # Along a meridian, and along the equator
+
+
+def haversine_km(
+    lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray
+) -> np.ndarray:
+    """Great-circle distances in km from one point to arrays of points, in degrees."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    lats, lngs = np.radians(lats), np.radians(lngs)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class StoreIndex:
+    """
+    Grid index over store positions for radius and nearest-k queries.
+
+    Stores are bucketed into cells of ``cell_deg`` degrees and kept sorted by
+    cell (cell ``c`` spans ``spans[c]``). A radius query visits only the cells
+    overlapping the bounding box of the circle and computes exact haversine
+    distances for the stores in them. Nearest-k grows the radius until k stores
+    are inside it.
+    """
+
+    def __init__(self, stores: List[PhysicalStore], cell_deg: float = 0.1) -> None:
+        self.cell_deg = cell_deg
+        cells = [self._cell(s.position.lat, s.position.lng) for s in stores]
+        order = sorted(range(len(stores)), key=lambda i: cells[i])
+        self.stores = [stores[i] for i in order]
+        self.lats = np.array([s.position.lat for s in self.stores], dtype=np.float64)
+        self.lngs = np.array([s.position.lng for s in self.stores], dtype=np.float64)
+        self.groups = np.array([s.group for s in self.stores], dtype=object)
+        self.texts = [f"{s.name} {s.address}".lower() for s in self.stores]
+        self.by_id = {s.id: s for s in self.stores}
+
+        self.spans: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for position, i in enumerate(order):
+            start, _ = self.spans.get(cells[i], (position, position))
+            self.spans[cells[i]] = (start, position + 1)
+        # Cells of one latitude row are adjacent, so any run of them is one slice
+        self.rows: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for (i, j), (start, end) in self.spans.items():
+            self.rows.setdefault(i, ([], [], []))
+            for column, value in zip(self.rows[i], (j, start, end)):
+                column.append(value)
+        self.rows = {i: tuple(map(np.array, row)) for i, row in self.rows.items()}
+
+    def __len__(self) -> int:
+        return len(self.stores)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(np.floor(lat / self.cell_deg)), int(np.floor(lng / self.cell_deg))
+
+    def _candidates(self, lat: float, lng: float, km: float) -> np.ndarray:
+        """Positions of the stores in the cells overlapping the circle's bounding box."""
+        dlat = km / KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles; past them, take every longitude
+        shrink = cos(radians(min(abs(lat) + dlat, 90.0)))
+        dlng = km / (KM_PER_DEGREE * shrink) if shrink > 1e-6 else 360.0
+        lat_cells = range(
+            self._cell(lat - dlat, 0)[0], self._cell(lat + dlat, 0)[0] + 1
+        )
+        if dlng >= 180:
+            lng_cells = None
+        else:
+            lng_cells = range(
+                self._cell(0, lng - dlng)[1], self._cell(0, lng + dlng)[1] + 1
+            )
+        if lng_cells is None or len(lat_cells) * len(lng_cells) > len(self.spans):
+            # Fewer cells in the index than in the box, check them all
+            return np.arange(len(self.stores))
+        # Split a box crossing the antimeridian in two
+        half = round(180 / self.cell_deg)
+        first, last = lng_cells[0], lng_cells[-1]
+        lng_ranges = [(max(first, -half), min(last, half - 1))]
+        if first < -half:
+            lng_ranges.append((first + 2 * half, half - 1))
+        if last >= half:
+            lng_ranges.append((-half, last - 2 * half))
+        slices = []
+        for i in lat_cells:
+            row = self.rows.get(i)
+            if row is None:
+                continue
+            columns, starts, ends = row
+            for low, high in lng_ranges:
+                lo = np.searchsorted(columns, low, side="left")
+                hi = np.searchsorted(columns, high, side="right")
+                if lo < hi:
+                    slices.append(np.arange(starts[lo], ends[hi - 1]))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def _filter(
+        self, positions: np.ndarray, group: Optional[str], search: Optional[str]
+    ) -> np.ndarray:
+        if group:
+            positions = positions[self.groups[positions] == group]
+        if search:
+            needle = search.lower()
+            positions = positions[[needle in self.texts[p] for p in positions]]
+        return positions
+
+    def _query(
+        self,
+        lat: float,
+        lng: float,
+        km: float,
+        group: Optional[str],
+        search: Optional[str],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions and distances of the matching stores within ``km``, nearest first."""
+        positions = self._filter(self._candidates(lat, lng, km), group, search)
+        distances = haversine_km(lat, lng, self.lats[positions], self.lngs[positions])
+        inside = distances <= km
+        positions, distances = positions[inside], distances[inside]
+        order = np.lexsort((positions, distances))
+        return positions[order], distances[order]
+
+    def _pairs(
+        self, positions: np.ndarray, distances: np.ndarray
+    ) -> List[Tuple[PhysicalStore, float]]:
+        stores = self.stores
+        return [(stores[p], d) for p, d in zip(positions.tolist(), distances.tolist())]
+
+    def within(
+        self,
+        lat: float,
+        lng: float,
+        km: float,
+        group: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> List[Tuple[PhysicalStore, float]]:
+        """Stores within ``km`` of a point, nearest first, with their distances."""
+        return self._pairs(*self._query(lat, lng, km, group, search))
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        group: Optional[str] = None,
+        search: Optional[str] = None,
+        max_km: Optional[float] = None,
+    ) -> List[Tuple[PhysicalStore, float]]:
+        """The ``k`` stores nearest to a point, optionally no further than ``max_km``."""
+        limit = max_km if max_km is not None else np.pi * EARTH_RADIUS_KM
+        km = min(self.cell_deg * KM_PER_DEGREE, limit)
+        while True:
+            positions, distances = self._query(lat, lng, km, group, search)
+            if len(positions) >= k or km >= limit:
+                return self._pairs(positions[:k], distances[:k])
+            km = min(km * 2, limit)
+
+    def filter(
+        self, group: Optional[str] = None, search: Optional[str] = None
+    ) -> List[PhysicalStore]:
+        """Stores matching the group and text filters, by id."""
+        positions = self._filter(np.arange(len(self.stores)), group, search)
+        return sorted((self.stores[p] for p in positions), key=lambda s: s.id)
+
+
+def _page(stores: List[PhysicalStore], page: int, size: int) -> PhysicalStoresResponse:
+    """A /physical-stores response page, shaped like the Kassal one."""
+    total = len(stores)
+    last_page = max(1, ceil(total / size))
+    start = (page - 1) * size
+    data = stores[start : start + size]
+    base_path = "/physical-stores"
+    return PhysicalStoresResponse(
+        data=data,
+        links=Links(
+            first=f"{base_path}?page=1",
+            last=f"{base_path}?page={last_page}",
+            prev=f"{base_path}?page={page - 1}" if page > 1 else None,
+            next=f"{base_path}?page={page + 1}" if page < last_page else None,
+        ),
+        meta=Meta.model_validate(
+            {
+                "current_page": page,
+                "from": start + 1 if data else 0,
+                "last_page": last_page,
+                "links": [],
+                "path": base_path,
+                "per_page": size,
+                "to": start + len(data),
+                "total": total,
+            }
+        ),
+    )
+
+
+class StoreDirectory:
+    """
+    All Kassal physical stores, synced to disk and indexed in memory.
+
+    Store locations rarely change, so the full list is fetched page by page at
+    background priority once per ``max_age`` seconds, saved to ``path`` and
+    shared by restarts. Radius, nearest-k, group and text queries are then
+    answered from the StoreIndex without calling Kassal. A sync builds a new
+    index and swaps it in, so queries never see a partial list.
+    """
+
+    def __init__(
+        self,
+        api: AsyncKassalAPI,
+        path: Optional[str] = PHYSICAL_STORES_PATH,
+        max_age: float = 24 * 60 * 60,
+        page_size: int = 100,
+    ) -> None:
+        self.api = api
+        self.path = Path(path) if path else None
+        self.max_age = max_age
+        self.page_size = page_size
+
+        self.index: Optional[StoreIndex] = None
+        self.synced_at: Optional[float] = None
+        self.sync_seconds: Optional[float] = None
+        self.served = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.index is not None
+
+    def load(self) -> bool:
+        """Adopt the store list saved on disk, however old."""
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            stores = [PhysicalStore.model_validate(s) for s in saved["stores"]]
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring saved physical stores: {e}")
+            return False
+        self.index = StoreIndex(stores)
+        self.synced_at = saved.get("synced_at")
+        return True
+
+    async def sync(self) -> None:
+        """Fetch every store from Kassal and swap in a new index."""
+        start = time.perf_counter()
+        stores: List[PhysicalStore] = []
+        page = 1
+        with background_priority():
+            while True:
+                response = await self.api.get_physical_stores(
+                    page=page, size=self.page_size
+                )
+                stores.extend(response.data)
+                if not response.data or page >= response.meta.last_page:
+                    break
+                page += 1
+        index = await asyncio.to_thread(StoreIndex, stores)
+        self.index, self.synced_at = index, time.time()
+        self.sync_seconds = time.perf_counter() - start
+        self._save(stores)
+
+    def _save(self, stores: List[PhysicalStore]) -> None:
+        if self.path is None:
+            return
+        payload = {
+            "synced_at": self.synced_at,
+            "stores": [s.model_dump(mode="json", by_alias=True) for s in stores],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    async def refresh_forever(self) -> None:
+        """Sync whenever the list is older than ``max_age``; run as a background task."""
+        while True:
+            age = time.time() - (self.synced_at or 0)
+            if age >= self.max_age:
+                try:
+                    await self.sync()
+                    self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    print(f"Physical store sync failed: {e}")
+                    age = self.max_age - 60 * 60  # Try again in an hour
+                else:
+                    age = 0
+            await asyncio.sleep(self.max_age - age)
+
+    def search(
+        self,
+        search: Optional[str] = None,
+        page: int = 1,
+        size: int = 10,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        km: float = 5,
+        group: Optional[str] = None,
+    ) -> Optional[PhysicalStoresResponse]:
+        """
+        Answer a /physical-stores query from the index, None before the first sync.
+
+        With a position the stores within ``km`` are returned nearest first,
+        otherwise all stores matching the filters by id. Invalid parameters
+        raise the same ValueError as the live API.
+        """
+        index = self.index
+        if index is None:
+            return None
+        KassalAPI._physical_stores_params(search, page, size, lat, lng, km, group)
+        self.served += 1
+        if lat is not None and lng is not None:
+            stores = [s for s, _ in index.within(lat, lng, km, group, search)]
+        else:
+            stores = index.filter(group, search)
+        return _page(stores, page, size)
+
+    def get(self, store_id: int) -> Optional[PhysicalStore]:
+        """A store by id, None if unknown or before the first sync."""
+        index = self.index
+        return index.by_id.get(store_id) if index is not None else None
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int,
+        group: Optional[str] = None,
+        search: Optional[str] = None,
+        max_km: Optional[float] = None,
+    ) -> Optional[List[Tuple[PhysicalStore, float]]]:
+        """The ``k`` nearest stores with their distances, None before the first sync."""
+        index = self.index
+        if index is None:
+            return None
+        KassalAPI._physical_stores_params(search, 1, k, lat, lng, max_km or 0, group)
+        self.served += 1
+        return index.nearest(lat, lng, k, group, search, max_km)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "stores": len(self.index) if self.index else 0,
+            "cells": len(self.index.spans) if self.index else 0,
+            "synced_at": self.synced_at,
+            "sync_seconds": self.sync_seconds,
+            "served": self.served,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_products import Product
+from src.kassal.rate_limiter import background_priority
+from src.sale_matcher import SaleMatcher
+from src.sale_resolution import SaleIndex, SaleResolver
+from src.sales_service import ProductSales
+
+ON_SALE_PRODUCTS_PATH = "data/on_sale_products.json"
+
+# Seconds before a failed build of the same sales version is started again
+RETRY_AFTER = 300.0
+
+
+class OnSaleCatalog:
+    """
+    Materialised list of the Kassal products that match the current sales data.
+
+    Resolving every sale item name to a product takes one Kassal search per name,
+    so it is done once per sales data version by a background job with at most
+    ``concurrency`` searches in flight, at background priority. The endpoint then
+    serves pages by slicing the finished list. While a new version is being built
+    the previous list keeps being served. The list is written to ``path`` so a
+    restart with unchanged sales data does not search again.
+
+    With a ``resolver`` the list holds the products the sale items of each
+    vendor were resolved to, so a product is never listed because of another
+    chain's offer; only the items of vendors Kassal does not cover are searched
+    for by name. Without one, every sale item name is searched for and the
+    results are matched against the sale names.
+
+    A build that fails is not started again for the same sales version until
+    ``retry_after`` seconds have passed; the error is kept for the status.
+
+    The order is stable: products appear in the order of the sale items that
+    found them, and a product found by several items is listed once.
+    """
+
+    def __init__(
+        self,
+        api: AsyncKassalAPI,
+        path: Optional[str] = ON_SALE_PRODUCTS_PATH,
+        concurrency: int = 8,
+        resolver: Optional[SaleResolver] = None,
+        retry_after: float = RETRY_AFTER,
+    ) -> None:
+        self.api = api
+        self.path = Path(path) if path else None
+        self.concurrency = concurrency
+        self.resolver = resolver
+        self.retry_after = retry_after
+
+        self.ready = False
+        self.version: Optional[str] = None
+        self.products: List[Product] = []
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self.searched = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+        self._failed_version: Optional[str] = None
+        self._building: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def building(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def retry_at(self) -> Optional[float]:
+        if self.failed_at is None:
+            return None
+        return self.failed_at + self.retry_after
+
+    def _fail(self, version: Optional[str], error: str) -> None:
+        self.last_error = error
+        self.failed_at, self._failed_version = time.time(), version
+        print(f"Failed to build the on-sale products: {error}")
+
+    def load(self, version: Optional[str]) -> bool:
+        """Adopt the list saved on disk if it was built from the given sales version."""
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            if saved["version"] != version:
+                return False
+            products = [Product.model_validate(p) for p in saved["products"]]
+        except (ValueError, KeyError) as e:
+            print(f"Ignoring saved on-sale products: {e}")
+            return False
+        self.products, self.version, self.ready = products, version, True
+        self.built_at = saved.get("built_at")
+        return True
+
+    def ensure(
+        self,
+        sales_list: List[ProductSales],
+        matcher: SaleMatcher,
+        version: Optional[str],
+    ) -> Optional[asyncio.Task]:
+        """
+        Start building the list for ``version`` unless it is current or in progress.
+
+        Must be called from a running event loop. Returns the build task, or None if
+        the list is already current or its last build failed less than
+        ``retry_after`` seconds ago. Without sales data (``version`` None) the list
+        is empty and nothing is built.
+        """
+        if self.ready and self.version == version:
+            return None
+        if version is None:
+            # A build of older sales still running is discarded when it finishes
+            self._building = None
+            self.products, self.version, self.ready = [], None, True
+            return None
+        if self.building and self._building == version:
+            return self._task
+        if (
+            self.failed_at is not None
+            and self._failed_version == version
+            and time.time() < self.retry_at
+        ):
+            return None
+        self._building = version
+        self._task = asyncio.create_task(self._build(sales_list, matcher, version))
+        return self._task
+
+    async def _build(
+        self,
+        sales_list: List[ProductSales],
+        matcher: SaleMatcher,
+        version: Optional[str],
+    ) -> None:
+        start = time.perf_counter()
+        enricher: Union[SaleIndex, SaleMatcher] = matcher
+        product_ids: List[int] = []
+        if self.resolver is not None:
+            try:
+                index = await self.resolver.index_for(sales_list, version)
+                error = self.resolver.last_error
+            except Exception as e:
+                index, error = None, str(e)
+            if index is None:
+                self._fail(version, f"Sale resolution failed: {error}")
+                return
+            # Vendors Kassal does not cover are still found by name
+            enricher, product_ids, names = index, list(index.by_id), index.by_name.names
+        else:
+            names = list(
+                dict.fromkeys(
+                    item.name for ps in sales_list for item in ps.products.products
+                )
+            )
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(product_id: int) -> List[Product]:
+            async with semaphore:
+                return [await self.api.get_product_by_id(product_id)]
+
+        async def search(name: str) -> List[Product]:
+            async with semaphore:
+                return (await self.api.get_products(search=name, size=1)).data
+
+        lookups = [fetch(pid) for pid in product_ids] + [search(n) for n in names]
+        try:
+            with background_priority():
+                results = await asyncio.gather(*lookups, return_exceptions=True)
+        except Exception as e:
+            self._fail(version, str(e))
+            return
+
+        found: Dict[int, Product] = {}
+        failed = 0
+        for result in results:
+            if isinstance(result, Exception):
+                failed += 1
+                continue
+            for product in result:
+                found.setdefault(product.id, product)
+        if lookups and failed == len(lookups):
+            self._fail(version, f"All {failed} product lookups failed")
+            return
+        products = enricher.enrich(list(found.values()))
+
+        if version != self._building:
+            return  # A newer sales version was loaded meanwhile
+        self.products, self.version, self.ready = products, version, True
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - start
+        self.searched, self.failed = len(lookups), failed
+        self.last_error = self.failed_at = self._failed_version = None
+        self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        payload = {
+            "version": self.version,
+            "built_at": self.built_at,
+            "products": [p.model_dump(mode="json") for p in self.products],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    async def wait(self, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for a running build."""
+        if self.building:
+            await asyncio.wait({self._task}, timeout=timeout)
+
+    async def close(self) -> None:
+        if self.building:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def page(self, page: int, size: int) -> Tuple[List[Product], int]:
+        """Return one page of the list and the total number of products."""
+        products = self.products
+        start = (page - 1) * size
+        return products[start : start + size], len(products)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "products": len(self.products),
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "searched": self.searched,
+            "failed": self.failed,
+            "building": self.building,
+            "last_error": self.last_error,
+            "failed_at": self.failed_at,
+            "retry_at": self.retry_at,
+        }
@@ -9,12 +9,14 @@ from tensorflow.keras.optimizers import Adam
 from typing import Tuple
 import joblib
 
+from src.recommenders.ingestion import RECIPES, load_columns
+from src.recommenders.numpy_autoencoder import export_weights
+
 
 def load_and_preprocess_data(
     filepath: str,
 ) -> Tuple[pd.DataFrame, np.ndarray, MinMaxScaler]:
-    """Load and preprocess the dataset."""
-    data = pd.read_csv(filepath)
+    """Load and preprocess the dataset, reading only the columns the model uses."""
     selected_columns = [
         "Calories",
         "FatContent",
@@ -26,6 +28,8 @@ def load_and_preprocess_data(
         "SugarContent",
         "ProteinContent",
     ]
+    # Typed Parquet partitions of the CSV, ingested on first use
+    data = load_columns(RECIPES, ["RecipeId", "Name", *selected_columns], filepath)
     df = data[selected_columns]
 
     scaler = MinMaxScaler()
@@ -93,9 +97,12 @@ def save_model(
     scaler: MinMaxScaler,
     model_path: str = "models/autoencoder_model.keras",
     scaler_path: str = "models/scaler.pkl",
+    weights_path: str = "models/autoencoder_weights.npz",
 ) -> None:
     model.save(model_path)
     joblib.dump(scaler, scaler_path)
+    # The API serves the NumPy export, keep it in sync with the Keras model
+    export_weights(model_path, scaler_path, weights_path)
 
 
 def load_trained_model(
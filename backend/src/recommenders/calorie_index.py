@@ -0,0 +1,69 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+class CalorieIndex:
+    """
+    Sorted view of the Calories column for range queries.
+
+    Holds the calories in ascending order together with the permutation back to
+    store rows, so a ``[goal - tolerance, goal + tolerance]`` window is two
+    ``searchsorted`` calls and a slice instead of a full scan. Missing calories
+    sort last and never fall inside a finite window, matching the boolean mask
+    it replaces.
+    """
+
+    def __init__(self, calories: np.ndarray, order: Optional[np.ndarray] = None) -> None:
+        if order is None:
+            order = np.argsort(calories, kind="stable")
+        self.order = np.asarray(order, dtype=np.int64)
+        self.sorted_calories = np.asarray(calories)[self.order]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def window(
+        self, caloric_goal: float, tolerance: float, limit: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Return the store rows whose calories lie within tolerance of the goal.
+
+        Args:
+            caloric_goal (float): Target calories.
+            tolerance (float): Allowable difference from the target calories.
+            limit (Optional[int]): Return at most this many rows.
+
+        Returns:
+            np.ndarray: Matching row positions in dataset order.
+        """
+        return self.windows([caloric_goal], tolerance, limit)[0]
+
+    def windows(
+        self,
+        caloric_goals: Sequence[float],
+        tolerance: float,
+        limit: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """
+        Answer several calorie windows in one pass.
+
+        Args:
+            caloric_goals (Sequence[float]): Target calories, e.g. one per meal.
+            tolerance (float): Allowable difference from the target calories.
+            limit (Optional[int]): Return at most this many rows per window.
+
+        Returns:
+            List[np.ndarray]: Matching row positions in dataset order, one array per goal.
+        """
+        goals = np.asarray(caloric_goals, dtype=np.float64)
+        starts = np.searchsorted(self.sorted_calories, goals - tolerance, side="left")
+        ends = np.searchsorted(self.sorted_calories, goals + tolerance, side="right")
+
+        results = []
+        for start, end in zip(starts, ends):
+            # Sorting the k hits restores dataset order, which is what callers
+            # (and the previous boolean mask) take the head of.
+            rows = np.sort(self.order[start:end])
+            results.append(rows if limit is None else rows[:limit])
+        return results
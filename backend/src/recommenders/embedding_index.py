@@ -0,0 +1,396 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from src.recommenders.model_registry import LoadedModel, ModelRegistry, model_registry
+from src.recommenders.recipe_store import (
+    NUTRITION_COLUMNS,
+    RecipeStore,
+    get_recipe_store,
+    save_npz,
+)
+
+EMBEDDING_INDEX_FILE = "embedding_index.npz"
+
+
+class EmbeddingIndex:
+    """
+    Inverted-file (IVF) index for cosine top-k search over recipe embeddings.
+
+    Embeddings are L2-normalised and clustered with spherical k-means. Vectors are
+    stored grouped by cluster (list ``i`` spans ``offsets[i]:offsets[i + 1]``), so
+    a query scores the centroids, scans only the ``nprobe`` closest lists and
+    returns the best ``k`` store rows. When those lists hold fewer than ``k``
+    rows, the next closest lists are scanned as well, so a search returns ``k``
+    rows whenever the index has that many.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        vectors: np.ndarray,
+        version: str = "",
+        nprobe: int = 16,
+    ) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+        self.vectors = vectors
+        self.version = version
+        self.nprobe = nprobe
+        # The autoencoder the vectors were embedded with, so queries are embedded
+        # with the same one while an index for a newer model is being built
+        self.model: Optional[LoadedModel] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_iter: int = 20,
+        sample_size: int = 100_000,
+        seed: int = 0,
+        version: str = "",
+    ) -> "EmbeddingIndex":
+        """
+        Cluster the embeddings and lay them out as inverted lists.
+
+        Args:
+            embeddings (np.ndarray): One embedding per store row.
+            n_lists (Optional[int]): Number of clusters, defaults to sqrt(N).
+            n_iter (int): k-means iterations.
+            sample_size (int): Number of embeddings the centroids are trained on.
+            seed (int): Seed for the centroid initialisation and training sample.
+            version (str): Identifier of the data and model the embeddings came from.
+
+        Returns:
+            EmbeddingIndex: The built index.
+        """
+        vectors = _normalise(np.asarray(embeddings, dtype=np.float32))
+        n = len(vectors)
+        n_lists = n_lists or max(1, int(np.sqrt(n)))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(seed)
+
+        training = vectors[rng.choice(n, size=min(n, sample_size), replace=False)]
+        centroids = training[rng.choice(len(training), size=n_lists, replace=False)]
+        for _ in range(n_iter):
+            assignment = _assign(training, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, training)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(counts[:, None] > 0, _normalise(sums), centroids)
+
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, offsets, order.astype(np.int64), vectors[order], version)
+
+    def search(
+        self, query: np.ndarray, k: int = 10, nprobe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return the k store rows most cosine-similar to the query.
+
+        Args:
+            query (np.ndarray): A single embedding.
+            k (int): Number of neighbours.
+            nprobe (Optional[int]): Number of lists to scan at least, defaults to
+                self.nprobe.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Store rows and their similarity, best first.
+        """
+        q = _normalise(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        similarity = self.centroids @ q
+        probed = np.argpartition(-similarity, nprobe - 1)[:nprobe]
+        sizes = np.diff(self.offsets)
+        wanted = min(k, len(self.rows))
+        if sizes[probed].sum() < wanted:
+            # Widen to the closest lists that together hold k rows
+            closest = np.argsort(-similarity, kind="stable")
+            probed = closest[: np.searchsorted(np.cumsum(sizes[closest]), wanted) + 1]
+
+        slices = [slice(self.offsets[i], self.offsets[i + 1]) for i in probed]
+        candidates = np.concatenate([self.rows[s] for s in slices])
+        scores = np.concatenate([self.vectors[s] @ q for s in slices])
+        return _top_k(candidates, scores, k)
+
+    def save(self, path: Union[str, Path]) -> None:
+        save_npz(
+            path,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            rows=self.rows,
+            vectors=self.vectors,
+            version=np.array(self.version),
+            nprobe=np.array(self.nprobe),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EmbeddingIndex":
+        with np.load(path) as data:
+            return cls(
+                data["centroids"],
+                data["offsets"],
+                data["rows"],
+                data["vectors"],
+                version=str(data["version"]),
+                nprobe=int(data["nprobe"]),
+            )
+
+
+def _normalise(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray, batch_size: int = 65_536):
+    """Index of the most similar centroid for every vector, in memory-bounded batches."""
+    return np.concatenate(
+        [
+            np.argmax(vectors[start : start + batch_size] @ centroids.T, axis=1)
+            for start in range(0, len(vectors), batch_size)
+        ]
+    )
+
+
+def _top_k(candidates: np.ndarray, scores: np.ndarray, k: int):
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=int)
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return candidates[best], scores[best]
+
+
+def brute_force_search(
+    embeddings: np.ndarray, query: np.ndarray, k: int = 10
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact cosine top-k over all embeddings, used as the reference for recall."""
+    vectors = _normalise(np.asarray(embeddings, dtype=np.float32))
+    q = _normalise(np.asarray(query, dtype=np.float32).reshape(1, -1))[0]
+    return _top_k(np.arange(len(vectors)), vectors @ q, k)
+
+
+def recall_at_k(
+    index: EmbeddingIndex,
+    embeddings: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    nprobe: Optional[int] = None,
+) -> float:
+    """Fraction of the exact top-k neighbours the index returns, averaged over queries."""
+    hits = 0
+    for query in queries:
+        exact, _ = brute_force_search(embeddings, query, k)
+        approximate, _ = index.search(query, k, nprobe)
+        hits += len(np.intersect1d(exact, approximate))
+    return hits / (k * len(queries))
+
+
+def embed_recipes(
+    recipes: RecipeStore,
+    registry: ModelRegistry,
+    batch_size: int = 65_536,
+    model: Optional[LoadedModel] = None,
+) -> np.ndarray:
+    """Run every recipe's nutrition values through the autoencoder."""
+    embeddings = []
+    for start in range(0, len(recipes), batch_size):
+        rows = np.arange(start, min(start + batch_size, len(recipes)))
+        features = recipes.numeric(NUTRITION_COLUMNS, rows=rows)
+        embeddings.append(registry.predict(features, model=model))
+    return np.concatenate(embeddings).astype(np.float32)
+
+
+def _index_version(recipes: RecipeStore, model: LoadedModel) -> str:
+    return f"{recipes.version}-{model.version}"
+
+
+def build_embedding_index(
+    recipes: RecipeStore,
+    path: Optional[Union[str, Path]] = None,
+    recall_queries: int = 200,
+    k: int = 10,
+    registry: ModelRegistry = model_registry,
+    model: Optional[LoadedModel] = None,
+) -> EmbeddingIndex:
+    """
+    Offline job: embed the whole corpus, build the IVF index and save it.
+
+    Recall@k against brute-force search is measured on a sample of the corpus and
+    printed, so a regression in index quality is visible when it is rebuilt.
+
+    Args:
+        recipes (RecipeStore): Store to embed.
+        path (Optional[Union[str, Path]]): Output file, defaults to the store directory.
+        recall_queries (int): Number of recipes used as queries for the recall check.
+        k (int): Neighbour count for the recall check.
+        registry (ModelRegistry): Source of the autoencoder.
+        model (Optional[LoadedModel]): Autoencoder to embed with, defaults to the
+            registry's current one.
+
+    Returns:
+        EmbeddingIndex: The built index.
+    """
+    path = Path(path or recipes.store_dir / EMBEDDING_INDEX_FILE)
+    model = model or registry.get()
+
+    start = time.perf_counter()
+    embeddings = embed_recipes(recipes, registry, model=model)
+    index = EmbeddingIndex.build(embeddings, version=_index_version(recipes, model))
+    index.model = model
+    print(f"Embedded and indexed {len(index)} recipes in {time.perf_counter() - start:.1f}s")
+
+    if recall_queries:
+        rng = np.random.default_rng(0)
+        queries = embeddings[
+            rng.choice(len(embeddings), size=min(recall_queries, len(embeddings)), replace=False)
+        ]
+        recall = recall_at_k(index, embeddings, queries, k)
+        print(f"recall@{k} (nprobe={index.nprobe}, lists={index.n_lists}): {recall:.3f}")
+
+    index.save(path)
+    return index
+
+
+def load_embedding_index(
+    recipes: RecipeStore,
+    model: Optional[LoadedModel] = None,
+    registry: ModelRegistry = model_registry,
+) -> EmbeddingIndex:
+    """Load the index for this store, rebuilding it if the data or model changed."""
+    model = model or registry.get()
+    path = recipes.store_dir / EMBEDDING_INDEX_FILE
+    if path.exists():
+        index = EmbeddingIndex.load(path)
+        if index.version == _index_version(recipes, model):
+            index.model = model
+            return index
+    return build_embedding_index(recipes, path, registry=registry, model=model)
+
+
+class EmbeddingIndexRegistry:
+    """
+    Process-wide holder of the embedding index of the shared recipe store.
+
+    The first access loads (or builds) the index. When the model registry swaps
+    in a new autoencoder, ``rebuild`` embeds the corpus and builds its index in
+    a background thread while requests keep using the previous index together
+    with the model it was built with. The new index is first written to the store
+    directory with an atomic rename, so other workers never load a partial file,
+    then replaces the served one, carrying the new model, as a single reference.
+    A failed rebuild keeps the previous pair.
+    """
+
+    def __init__(
+        self,
+        recipes: Callable[[], RecipeStore] = get_recipe_store,
+        registry: ModelRegistry = model_registry,
+    ) -> None:
+        self.recipes = recipes
+        self.registry = registry
+        self._current: Optional[EmbeddingIndex] = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._wanted: Optional[LoadedModel] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self.rebuild_count = 0
+        self.rebuild_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def building(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def get(self) -> EmbeddingIndex:
+        """The index being served, loaded on first use."""
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = load_embedding_index(
+                        self.recipes(), registry=self.registry
+                    )
+                current = self._current
+        return current
+
+    def rebuild(self, model: LoadedModel) -> Optional[threading.Thread]:
+        """
+        Build the index for ``model`` in the background and swap it in when done.
+
+        Returns the build thread, or None if the served index already uses it.
+        """
+        current = self._current
+        if current is None or (
+            current.model is not None and current.model.version == model.version
+        ):
+            return None
+        self._wanted = model
+        thread = threading.Thread(
+            target=self._rebuild, args=(model,), name="embedding-index", daemon=True
+        )
+        self._thread = thread
+        thread.start()
+        return thread
+
+    def _rebuild(self, model: LoadedModel) -> None:
+        # One build at a time; a build for a model replaced meanwhile is skipped
+        with self._build_lock:
+            if model is not self._wanted:
+                return
+            start = time.perf_counter()
+            try:
+                # Adopts the index another worker already published for this
+                # model, or builds it and publishes it with an atomic rename
+                # before it is swapped in here
+                index = load_embedding_index(self.recipes(), model, self.registry)
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Failed to rebuild the embedding index: {e}")
+                return
+            if model is not self._wanted:
+                return
+            self._current = index
+            self.rebuild_count += 1
+            self.rebuild_seconds = time.perf_counter() - start
+            self.last_error = None
+
+    def status(self) -> Dict[str, Any]:
+        current = self._current
+        return {
+            "loaded": current is not None,
+            "version": current.version if current else None,
+            "recipes": len(current) if current else None,
+            "building": self.building,
+            "rebuild_count": self.rebuild_count,
+            "rebuild_seconds": self.rebuild_seconds,
+            "last_error": self.last_error,
+        }
+
+
+embedding_indexes = EmbeddingIndexRegistry()
+
+
+def get_embedding_index() -> EmbeddingIndex:
+    """Process-wide embedding index for the shared recipe store."""
+    return embedding_indexes.get()
+
+
+if __name__ == "__main__":
+    build_embedding_index(get_recipe_store())
@@ -0,0 +1,348 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as pa_ds
+import pyarrow.parquet as pq
+
+from src.recommenders.recipe_store import NUTRITION_COLUMNS, RECIPES_CSV_PATH
+
+REVIEWS_CSV_PATH = "data/reviews.csv"
+DATASETS_DIR = "data/datasets"
+
+# Bump when the partition layout or a schema changes so stale partitions are rebuilt.
+INGEST_FORMAT = 1
+
+# Bytes of CSV parsed per batch. The reader keeps several blocks in flight, so
+# this bounds most of the memory an ingestion needs.
+BLOCK_SIZE = 2**20
+
+# Rows collected from the batches before they are written as one row group
+ROW_GROUP_ROWS = 32_768
+
+_TEXT = pa.string()
+# Low-cardinality text, stored once per row group as a dictionary
+_CATEGORY = pa.dictionary(pa.int32(), pa.string())
+_TIMESTAMP = pa.timestamp("s", tz="UTC")
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """
+    Typed layout of one CSV data file.
+
+    Only the listed columns are read. Rows without a ``key`` or with a value
+    outside ``ranges`` are dropped and counted in the manifest.
+    """
+
+    name: str
+    columns: Dict[str, pa.DataType]
+    key: str
+    ranges: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    @property
+    def arrow_schema(self) -> pa.Schema:
+        return pa.schema(list(self.columns.items()))
+
+
+RECIPES = DatasetSchema(
+    name="recipes",
+    columns={
+        "RecipeId": pa.int64(),
+        "Name": _TEXT,
+        "AuthorId": pa.int64(),
+        "AuthorName": _CATEGORY,
+        "CookTime": _CATEGORY,
+        "PrepTime": _CATEGORY,
+        "TotalTime": _CATEGORY,
+        "DatePublished": _TIMESTAMP,
+        "Description": _TEXT,
+        "Images": _TEXT,
+        "RecipeCategory": _CATEGORY,
+        "Keywords": _TEXT,
+        "RecipeIngredientQuantities": _TEXT,
+        "RecipeIngredientParts": _TEXT,
+        "AggregatedRating": pa.float32(),
+        "ReviewCount": pa.float32(),
+        **{column: pa.float64() for column in NUTRITION_COLUMNS},
+        "RecipeServings": pa.float32(),
+        "RecipeYield": _CATEGORY,
+        "RecipeInstructions": _TEXT,
+    },
+    key="RecipeId",
+    ranges={
+        "AggregatedRating": (0, 5),
+        "ReviewCount": (0, np.inf),
+        **{column: (0, np.inf) for column in NUTRITION_COLUMNS},
+    },
+)
+
+# The review text and author name are not used by any stage; list them here
+# to keep them.
+REVIEWS = DatasetSchema(
+    name="reviews",
+    columns={
+        "ReviewId": pa.int64(),
+        "RecipeId": pa.int64(),
+        "AuthorId": pa.int64(),
+        "Rating": pa.int8(),
+        "DateSubmitted": _TIMESTAMP,
+        "DateModified": _TIMESTAMP,
+    },
+    key="RecipeId",
+    ranges={"Rating": (0, 5)},
+)
+
+DATASETS = {schema.name: schema for schema in (RECIPES, REVIEWS)}
+SOURCES = {"recipes": RECIPES_CSV_PATH, "reviews": REVIEWS_CSV_PATH}
+
+
+def _source_signature(csv_path: Path) -> Dict[str, int]:
+    stat = csv_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _dataset_version(schema: DatasetSchema, signature: Dict[str, int]) -> str:
+    payload = json.dumps(
+        {
+            "format": INGEST_FORMAT,
+            "schema": {name: str(dtype) for name, dtype in schema.columns.items()},
+            "ranges": schema.ranges,
+            **signature,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def _valid_rows(batch: pa.RecordBatch, schema: DatasetSchema) -> pa.Array:
+    """Mask of the rows that have a key and every value inside its range."""
+    mask = pc.is_valid(batch.column(schema.key))
+    for name, (low, high) in schema.ranges.items():
+        values = batch.column(name)
+        inside = pc.and_(pc.greater_equal(values, low), pc.less_equal(values, high))
+        mask = pc.and_(mask, pc.or_kleene(pc.is_null(values), inside))
+    return mask
+
+
+def ingest_csv(
+    schema: DatasetSchema,
+    csv_path: Union[str, Path],
+    datasets_dir: Union[str, Path] = DATASETS_DIR,
+    rows_per_file: int = 250_000,
+    row_group_rows: int = ROW_GROUP_ROWS,
+    block_size: int = BLOCK_SIZE,
+) -> Path:
+    """
+    Convert a CSV data file into typed, validated Parquet partitions.
+
+    The CSV is streamed in blocks of ``block_size`` bytes with the types of the
+    schema, so neither the whole text nor an untyped frame is ever held in
+    memory. Columns outside the schema are skipped while parsing. The partitions
+    are written to a temporary directory and moved into place once complete,
+    together with a manifest of row counts and dropped rows.
+
+    Args:
+        schema (DatasetSchema): Columns, key and value ranges of the file.
+        csv_path (Union[str, Path]): Path to the CSV file.
+        datasets_dir (Union[str, Path]): Directory holding one directory per dataset.
+        rows_per_file (int): Rows after which a new partition file is started.
+        row_group_rows (int): Rows per Parquet row group.
+        block_size (int): Bytes of CSV parsed per batch.
+
+    Returns:
+        Path: The directory of the dataset's partitions.
+    """
+    csv_path = Path(csv_path)
+    out_dir = Path(datasets_dir) / schema.name
+    tmp_dir = out_dir.with_name(f"{out_dir.name}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    malformed = 0
+
+    def skip_malformed(row) -> str:
+        nonlocal malformed
+        malformed += 1
+        return "skip"
+
+    reader = pa_csv.open_csv(
+        csv_path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        parse_options=pa_csv.ParseOptions(
+            newlines_in_values=True, invalid_row_handler=skip_malformed
+        ),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=schema.columns,
+            include_columns=list(schema.columns),
+            strings_can_be_null=True,
+        ),
+    )
+    arrow_schema = schema.arrow_schema
+    start = time.perf_counter()
+    files: List[Dict[str, Any]] = []
+    writer: Optional[pq.ParquetWriter] = None
+    pending: List[pa.RecordBatch] = []
+    rows = dropped = 0
+    keys: List[np.ndarray] = []
+
+    def write_row_group() -> None:
+        nonlocal writer
+        if writer is None or files[-1]["rows"] >= rows_per_file:
+            if writer is not None:
+                writer.close()
+            files.append({"path": f"part-{len(files):05d}.parquet", "rows": 0})
+            writer = pq.ParquetWriter(
+                tmp_dir / files[-1]["path"], arrow_schema, compression="zstd"
+            )
+        table = pa.Table.from_batches(pending, arrow_schema)
+        writer.write_table(table, row_group_size=table.num_rows)
+        files[-1]["rows"] += table.num_rows
+        pending.clear()
+
+    try:
+        for batch in reader:
+            valid = batch.filter(_valid_rows(batch, schema))
+            dropped += batch.num_rows - valid.num_rows
+            if valid.num_rows == 0:
+                continue
+            pending.append(valid)
+            rows += valid.num_rows
+            keys.append(valid.column(schema.key).to_numpy())
+            if sum(b.num_rows for b in pending) >= row_group_rows:
+                write_row_group()
+        if pending:
+            write_row_group()
+    finally:
+        if writer is not None:
+            writer.close()
+
+    signature = _source_signature(csv_path)
+    all_keys = np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64)
+    manifest = {
+        "format": INGEST_FORMAT,
+        "dataset": schema.name,
+        "rows": rows,
+        "dropped_rows": dropped,
+        "malformed_rows": malformed,
+        "distinct_keys": int(len(np.unique(all_keys))),
+        "columns": {name: str(dtype) for name, dtype in schema.columns.items()},
+        "files": files,
+        "source": {"path": str(csv_path), **signature},
+        "version": _dataset_version(schema, signature),
+        "ingest_seconds": round(time.perf_counter() - start, 3),
+    }
+    (tmp_dir / "manifest.json").write_text(
+        json.dumps(manifest, indent=2), encoding="utf-8"
+    )
+
+    old_dir = out_dir.with_name(f"{out_dir.name}.old-{os.getpid()}")
+    if out_dir.exists():
+        out_dir.rename(old_dir)
+    tmp_dir.rename(out_dir)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    return out_dir
+
+
+def read_manifest(
+    schema: DatasetSchema, datasets_dir: Union[str, Path] = DATASETS_DIR
+) -> Optional[Dict[str, Any]]:
+    """Return the manifest of an ingested dataset, or None if it was never ingested."""
+    path = Path(datasets_dir) / schema.name / "manifest.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def is_dataset_stale(
+    schema: DatasetSchema,
+    csv_path: Union[str, Path],
+    datasets_dir: Union[str, Path] = DATASETS_DIR,
+) -> bool:
+    """Return True if the partitions are missing or were written from a different CSV."""
+    manifest = read_manifest(schema, datasets_dir)
+    if manifest is None:
+        return True
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        # Shipping prebuilt partitions without the CSV is fine.
+        return False
+    return manifest.get("version") != _dataset_version(
+        schema, _source_signature(csv_path)
+    )
+
+
+def open_dataset(
+    schema: DatasetSchema, datasets_dir: Union[str, Path] = DATASETS_DIR
+) -> pa_ds.Dataset:
+    """
+    Open the partitions of an ingested dataset without reading them.
+
+    Stages read what they need from the returned dataset, e.g.
+    ``to_batches(columns=[...])`` to stream a few columns.
+    """
+    directory = Path(datasets_dir) / schema.name
+    manifest = read_manifest(schema, datasets_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"Dataset not ingested: {directory}")
+    files = [str(directory / part["path"]) for part in manifest["files"]]
+    return pa_ds.dataset(files, schema=schema.arrow_schema, format="parquet")
+
+
+def load_columns(
+    schema: DatasetSchema,
+    columns: Sequence[str],
+    csv_path: Optional[Union[str, Path]] = None,
+    datasets_dir: Union[str, Path] = DATASETS_DIR,
+) -> pd.DataFrame:
+    """
+    Read some columns of a dataset, ingesting the CSV first if it is missing or stale.
+
+    Args:
+        schema (DatasetSchema): The dataset to read.
+        columns (Sequence[str]): Columns to load.
+        csv_path (Optional[Union[str, Path]]): Source CSV. Defaults to the file under data/.
+        datasets_dir (Union[str, Path]): Directory holding one directory per dataset.
+
+    Returns:
+        pd.DataFrame: The columns, with categories as pandas categoricals.
+    """
+    csv_path = csv_path or SOURCES[schema.name]
+    if is_dataset_stale(schema, csv_path, datasets_dir):
+        ingest_csv(schema, csv_path, datasets_dir)
+    table = open_dataset(schema, datasets_dir).to_table(columns=list(columns))
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Ingest the CSV data files into typed Parquet partitions"
+    )
+    parser.add_argument(
+        "datasets", nargs="*", choices=sorted(DATASETS), default=sorted(DATASETS)
+    )
+    parser.add_argument("--datasets-dir", default=DATASETS_DIR)
+    args = parser.parse_args()
+
+    for name in args.datasets:
+        schema = DATASETS[name]
+        ingest_csv(schema, SOURCES[name], args.datasets_dir)
+        manifest = read_manifest(schema, args.datasets_dir)
+        print(
+            f"Ingested {manifest['rows']} {name} rows into {len(manifest['files'])} "
+            f"partitions in {manifest['ingest_seconds']:.1f}s "
+            f"({manifest['dropped_rows']} invalid, {manifest['malformed_rows']} malformed)"
+        )
@@ -1,46 +1,59 @@
-from typing import Tuple
-import pandas as pd
+from typing import Optional, Tuple
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
-from src.recommenders.autoencoder import load_trained_model
+from src.recommenders.embedding_index import EmbeddingIndex, load_embedding_index
+from src.recommenders.model_registry import model_registry
+from src.recommenders.recipe_store import RecipeStore
+from src.recommenders.review_ranking import ReviewScores
 
 
-def generate_meal_plan(
+def daily_caloric_target(
     category: str,
     body_weight: float,
     body_height: float,
     age: int,
     activity_intensity: str,
     objective: str,
-    recipes_df: pd.DataFrame,
-    tolerance: int = 50,
-) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+) -> int:
     """
-    Generate food recommendations based on user profile and dietary goals.
+    Calculate the daily caloric intake of a user profile.
 
     Args:
         category (str): Gender of the user ('male' or 'female').
         body_weight (float): Weight of the user in kilograms.
         body_height (float): Height of the user in centimeters.
         age (int): Age of the user in years.
-        activity_intensity (str): Physical activity level of the user ('sedentary', 'lightly_active',
-                                  'moderately_active', 'very_active', 'extra_active').
-        objective (str): Dietary goal of the user ('weight_loss', 'muscle_gain', 'maintain_health').
-        recipes_df (pd.DataFrame): DataFrame containing recipe names and calories.
-        tolerance (int): Allowable difference from the target calories.
+        activity_intensity (str): Physical activity level of the user.
+        objective (str): Dietary goal of the user.
 
     Returns:
-        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: Recommended recipes for breakfast, lunch, and dinner.
+        int: Total daily caloric intake.
     """
     # Calculate the Basal Metabolic Rate (BMR)
     bmr_value = _compute_bmr(category, body_weight, body_height, age)
 
     # Calculate the total daily caloric intake based on activity intensity and goal
-    daily_caloric_intake = _compute_daily_caloric_intake(
-        bmr_value, activity_intensity, objective
-    )
+    return _compute_daily_caloric_intake(bmr_value, activity_intensity, objective)
 
+
+def meal_plan_rows(
+    daily_caloric_intake: float,
+    recipes: RecipeStore,
+    tolerance: int = 50,
+    limit: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the store rows of breakfast, lunch and dinner for a daily caloric intake.
+
+    Args:
+        daily_caloric_intake (float): Total daily caloric intake of the user.
+        recipes (RecipeStore): Memory-mapped store containing the recipes.
+        tolerance (int): Allowable difference from the target calories.
+        limit (Optional[int]): Maximum number of recipes returned per meal.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Store rows for breakfast, lunch, and dinner.
+    """
     # Define the proportions of daily calories for each meal
     meal_proportions = {"breakfast": 0.50, "lunch": 0.40, "dinner": 0.10}
 
@@ -50,89 +63,91 @@ def generate_meal_plan(
         for meal, prop in meal_proportions.items()
     }
 
-    # Get recipe recommendations for each meal
-    breakfast_options = _find_recipes_near_target(
-        caloric_targets["breakfast"], recipes_df, tolerance
-    )
-    lunch_options = _find_recipes_near_target(
-        caloric_targets["lunch"], recipes_df, tolerance
-    )
-    dinner_options = _find_recipes_near_target(
-        caloric_targets["dinner"], recipes_df, tolerance
+    # Get recipe recommendations for all meals in one pass over the calorie index
+    breakfast_rows, lunch_rows, dinner_rows = recipes.calorie_index.windows(
+        [
+            caloric_targets["breakfast"],
+            caloric_targets["lunch"],
+            caloric_targets["dinner"],
+        ],
+        tolerance,
+        limit,
     )
+    return breakfast_rows, lunch_rows, dinner_rows
 
-    return breakfast_options, lunch_options, dinner_options
 
-
-def suggest_recipes(
-    category: str,
-    body_weight: float,
-    body_height: float,
-    age: int,
-    activity_intensity: str,
-    objective: str,
-    data: pd.DataFrame,
+def suggestion_rows(
+    daily_caloric_intake: float,
+    recipes: RecipeStore,
     suggestions: int = 5,
-) -> pd.DataFrame:
+    index: Optional[EmbeddingIndex] = None,
+) -> np.ndarray:
     """
-    Generate food recommendations based on the user's profile and dietary goals.
-
-    To learn more about the Basal Metabolic Rate (BMR) calculation, you can refer to the following link:
-    * https://www.maxhealthcare.in/calculator/bmr#:~:text=The%20Mifflin%20St%20Jeor%20equation,age%20in%20years%20%2D%20161.
+    Find the store rows of the recipes the autoencoder suggests for a daily caloric intake.
 
     Args:
-        category (str): Gender category of the user ('male' or 'female').
-        body_weight (float): Weight of the user in kilograms.
-        body_height (float): Height of the user in centimeters.
-        age (int): Age of the user in years.
-        activity_intensity (str): Physical activity level of the user ('sedentary', 'lightly_active', 'moderately_active', 'very_active', 'extra_active').
-        objective (str): Dietary objective of the user ('weight_loss', 'muscle_gain', 'health_maintenance').
+        daily_caloric_intake (float): Total daily caloric intake of the user.
+        recipes (RecipeStore): Memory-mapped store containing the recipes.
+        suggestions (int): Number of recipes to return.
+        index (Optional[EmbeddingIndex]): Nearest-neighbour index over the recipe embeddings.
 
     Return:
-        pd.DataFrame: Recommended recipes including name and calorie content.
+        np.ndarray: Store rows of the most similar recipes.
     """
-    model, scaler = load_trained_model()
-    selected_columns = [
-        "Calories",
-        "FatContent",
-        "SaturatedFatContent",
-        "CholesterolContent",
-        "SodiumContent",
-        "CarbohydrateContent",
-        "FiberContent",
-        "SugarContent",
-        "ProteinContent",
-    ]
-    X_scaled = scaler.transform(data[selected_columns].sample(6000))
-    predicted_latent_features = model.predict(X_scaled)
-    recommendations_dict = _generate_recipe_recommendations(predicted_latent_features)
-
-    # Calculate the Basal Metabolic Rate (BMR) for the user
-    bmr = _compute_bmr(category, body_weight, body_height, age)
-
-    # Calculate the total daily caloric intake based on activity intensity and dietary objective
-    total_calories = _compute_daily_caloric_intake(bmr, activity_intensity, objective)
+    if index is None:
+        index = load_embedding_index(recipes)
 
     # Prepare input data for the model with desired total calories
-    user_input_features = np.array([[total_calories, 0, 0, 0, 0, 0, 0, 0, 0]])
+    user_input_features = np.array([[daily_caloric_intake, 0, 0, 0, 0, 0, 0, 0, 0]])
 
-    # Scale the input data to match the model's training scale
-    scaled_input_features = scaler.transform(user_input_features)
+    # Scale the input data to match the model's training scale and predict latent
+    # features with the model shared by all requests, the one the index was built
+    # with while an index for a newer model is still being built
+    predicted_latent_features = model_registry.predict(
+        user_input_features, model=index.model
+    )
 
-    # Predict latent features for the input data
-    predicted_latent_features = model.predict(scaled_input_features)
+    # Retrieve the recipes whose embeddings are most similar to the user's
+    similar_rows, _ = index.search(predicted_latent_features[0], k=suggestions)
+    return similar_rows
 
-    # Find the index with the highest prediction probability
-    top_prediction_index = np.argmax(predicted_latent_features.flatten())
 
-    # Retrieve recommended recipes based on the highest prediction
-    similar_recipe_indices = np.array(recommendations_dict[top_prediction_index])
-    recommended_recipes = data.iloc[similar_recipe_indices[:, 1].astype(int)]
-    #recommended_recipes = data.iloc[similar_recipe_indices[:, 1].astype(int)][
-    #    ["RecipeId","Name", "Calories"]
-    #]
+def plan_rows(
+    daily_caloric_intake: float,
+    recipes: RecipeStore,
+    tolerance: int,
+    suggestions: int,
+    index: Optional[EmbeddingIndex] = None,
+    ranking: Optional[ReviewScores] = None,
+    pool: int = 4,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find the store rows of breakfast, lunch, dinner and suggestions for a daily caloric intake.
 
-    return recommended_recipes.head(suggestions)
+    With ``ranking``, ``pool`` times as many candidates are looked up for every
+    list and the best reviewed ``suggestions`` of them are kept.
+
+    Args:
+        daily_caloric_intake (float): Total daily caloric intake of the user.
+        recipes (RecipeStore): Memory-mapped store containing the recipes.
+        tolerance (int): Allowable difference from the target calories.
+        suggestions (int): Number of recipes per list.
+        index (Optional[EmbeddingIndex]): Nearest-neighbour index over the recipe embeddings.
+        ranking (Optional[ReviewScores]): Review scores to re-rank the candidates by.
+        pool (int): Candidates looked up per returned recipe when re-ranking.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: Store rows for
+        breakfast, lunch, dinner and the suggestions.
+    """
+    candidates = suggestions * pool if ranking is not None else suggestions
+    rows = (
+        *meal_plan_rows(daily_caloric_intake, recipes, tolerance, limit=candidates),
+        suggestion_rows(daily_caloric_intake, recipes, candidates, index=index),
+    )
+    if ranking is None:
+        return rows
+    return tuple(ranking.rank(r, suggestions) for r in rows)
 
 
 def _compute_bmr(gender, body_weight, body_height, age):
@@ -194,49 +209,3 @@ def _compute_daily_caloric_intake(bmr, activity_intensity, objective):
     total_caloric_intake = maintenance_calories * objective_adjustments[objective]
 
     return round(total_caloric_intake)
-
-
-def _generate_recipe_recommendations(predicted_latent_features):
-    recommendations_dict = {}
-    similarity_matrix = cosine_similarity(predicted_latent_features)
-
-    # Iterate over each item in the dataset
-    for item_index in range(len(predicted_latent_features)):
-        # Sort indices based on similarity in descending order
-        sorted_indices = similarity_matrix[item_index].argsort()[::-1]
-
-        # Create a list of tuples with similarity scores and indices, excluding the item itself
-        similar_items_list = [
-            (similarity_matrix[item_index][idx], idx)
-            for idx in sorted_indices
-            if idx != item_index
-        ]
-
-        # Store the list of similar items for the current item in the recommendations dictionary
-        recommendations_dict[item_index] = similar_items_list
-    return recommendations_dict
-
-
-def _find_recipes_near_target(caloric_goal, recipes_df, tolerance=50):
-    """
-    Find recipes close to the caloric goal.
-
-    Args:
-        caloric_goal (int): Target calories for the meal.
-        recipes_df (pd.DataFrame): DataFrame containing recipe names and calories.
-        tolerance (int): Allowable difference from the target calories.
-
-    Returns:
-        pd.DataFrame: Recommended recipes close to the caloric goal.
-    """
-    # Filter recipes within the tolerance range of the caloric goal
-    matching_recipes = recipes_df[
-        (recipes_df["Calories"] >= caloric_goal - tolerance)
-        & (recipes_df["Calories"] <= caloric_goal + tolerance)
-    ]
-
-    # Return an empty DataFrame if no recipes match the caloric goal
-    if matching_recipes.empty:
-        return pd.DataFrame()
-
-    return matching_recipes
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.recommenders.numpy_autoencoder import WEIGHTS_PATH, load_numpy_autoencoder
+
+MODEL_PATH = "models/autoencoder_model.keras"
+SCALER_PATH = "models/scaler.pkl"
+
+# Number of recent predict latencies kept for the percentile metrics.
+LATENCY_WINDOW = 1000
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """An autoencoder and the scaler it was trained with, loaded together."""
+
+    model: Any
+    scaler: Any
+    version: str
+    loaded_at: float
+    load_seconds: float
+
+
+class ModelRegistry:
+    """
+    Process-wide holder of the recipe autoencoder and its MinMaxScaler.
+
+    The model is loaded once per worker and reused by every request. When the
+    files on disk change, the next access (checked at most every
+    ``check_interval`` seconds) loads the new pair in full and then swaps a single
+    reference, so concurrent requests see either the old or the new model, never
+    a mix. Load time and predict latency are kept for the status endpoint.
+    """
+
+    def __init__(
+        self,
+        model_path: str = MODEL_PATH,
+        scaler_path: str = SCALER_PATH,
+        check_interval: float = 5.0,
+        loader: Optional[Callable[[str, str], Tuple[Any, Any]]] = None,
+    ) -> None:
+        self.model_path = model_path
+        self.scaler_path = scaler_path
+        self.check_interval = check_interval
+        self.loader = loader
+        self._current: Optional[LoadedModel] = None
+        self._reload_lock = threading.Lock()
+        self._last_check = 0.0
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+
+        self.load_count = 0
+        self.last_error: Optional[str] = None
+        self._predict_count = 0
+        self._predict_total = 0.0
+        self._latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def file_version(self) -> str:
+        """Identifier of the model files currently on disk."""
+        signature = {}
+        for path in (self.model_path, self.scaler_path):
+            stat = Path(path).stat()
+            signature[path] = [stat.st_size, stat.st_mtime_ns]
+        payload = json.dumps(signature, sort_keys=True).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+    def on_reload(self, callback: Callable[[LoadedModel], None]) -> None:
+        """Register a callback run after a new model has been swapped in."""
+        self._listeners.append(callback)
+
+    def get(self) -> LoadedModel:
+        """Return the current model, loading or hot-reloading it if needed."""
+        current = self._current
+        if current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    self._load()
+            return self._current
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            # Only one caller reloads; everybody else keeps serving the old model.
+            if self._reload_lock.acquire(blocking=False):
+                try:
+                    if self.file_version() != current.version:
+                        self._load()
+                except Exception as e:
+                    self.last_error = str(e)
+                finally:
+                    self._reload_lock.release()
+        return self._current
+
+    def _load(self) -> None:
+        loader = self.loader
+        if loader is None:
+            # Imported lazily, TensorFlow is only needed once a model is loaded
+            from src.recommenders.autoencoder import load_trained_model as loader
+
+        version = self.file_version()
+        start = time.perf_counter()
+        model, scaler = loader(self.model_path, self.scaler_path)
+        loaded = LoadedModel(
+            model=model,
+            scaler=scaler,
+            version=version,
+            loaded_at=time.time(),
+            load_seconds=time.perf_counter() - start,
+        )
+        self._current = loaded
+        self.load_count += 1
+        self.last_error = None
+        for callback in self._listeners:
+            callback(loaded)
+
+    def predict(
+        self, features: np.ndarray, model: Optional[LoadedModel] = None
+    ) -> np.ndarray:
+        """
+        Scale raw nutrition features and run them through the autoencoder.
+
+        Args:
+            features (np.ndarray): Unscaled (n_rows, 9) nutrition values.
+            model (Optional[LoadedModel]): Model to use instead of the current one,
+                e.g. the one an embedding index was built with.
+
+        Returns:
+            np.ndarray: The autoencoder output for every row.
+        """
+        loaded = model or self.get()
+        start = time.perf_counter()
+        output = loaded.model.predict(loaded.scaler.transform(features), verbose=0)
+        elapsed = time.perf_counter() - start
+        self._predict_count += 1
+        self._predict_total += elapsed
+        self._latencies.append(elapsed)
+        return output
+
+    def warm(self) -> None:
+        """Load the model and run a dummy predict so the first request is not slow."""
+        self.predict(np.zeros((1, len(self.get().scaler.data_min_))))
+
+    def metrics(self) -> Dict[str, Any]:
+        current = self._current
+        latencies = np.array(self._latencies) * 1000
+        return {
+            "loaded": current is not None,
+            "version": current.version if current else None,
+            "loaded_at": current.loaded_at if current else None,
+            "load_seconds": current.load_seconds if current else None,
+            "load_count": self.load_count,
+            "last_error": self.last_error,
+            "predict_count": self._predict_count,
+            "predict_mean_ms": (
+                self._predict_total * 1000 / self._predict_count
+                if self._predict_count
+                else None
+            ),
+            "predict_p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "predict_p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
+
+
+def _default_registry() -> ModelRegistry:
+    # Serve the exported NumPy weights when present so workers never import
+    # TensorFlow; fall back to the Keras model otherwise.
+    if Path(WEIGHTS_PATH).exists():
+        return ModelRegistry(WEIGHTS_PATH, WEIGHTS_PATH, loader=load_numpy_autoencoder)
+    return ModelRegistry()
+
+
+model_registry = _default_registry()
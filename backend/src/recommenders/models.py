@@ -1,7 +1,8 @@
 import math
 from enum import Enum
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 from datetime import datetime
+import numpy as np
 import pandas as pd
 from pydantic import BaseModel, Field
 
@@ -22,6 +23,10 @@ class ObjectiveEnum(str, Enum):
     muscle_gain = "muscle_gain"
     health_maintenance = "health_maintenance"
 
+class RecommendationView(str, Enum):
+    full = "full"
+    summary = "summary"
+
 class MealRecommendationRequest(BaseModel):
     category: GenderEnum
     body_weight: float
@@ -74,4 +79,99 @@ def _transform_df_to_pydantic(df: pd.DataFrame) -> list[MealRecommendationRespon
         data = {key: (None if isinstance(value, float) and math.isnan(value) else value)
                 for key, value in data.items()}
         responses.append(MealRecommendationResponse(**data))
-    return responses
\ No newline at end of file
+    return responses
+
+
+# Fields of a recommended recipe, in response order
+RESPONSE_FIELDS: List[str] = list(MealRecommendationResponse.model_fields)
+
+# Fields of the summary view: enough to list a recipe, the rest comes from
+# GET /recipes/{RecipeId}
+SUMMARY_FIELDS: List[str] = [
+    "RecipeId",
+    "Name",
+    "TotalTime",
+    "RecipeCategory",
+    "AggregatedRating",
+    "ReviewCount",
+    "Calories",
+    "FatContent",
+    "CarbohydrateContent",
+    "ProteinContent",
+]
+
+
+def _response_fields(fields: Optional[Sequence[str]]) -> List[str]:
+    if fields is None:
+        return RESPONSE_FIELDS
+    known = MealRecommendationResponse.model_fields
+    unknown = [name for name in fields if name not in known]
+    if unknown:
+        raise ValueError(f"Unknown recipe fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def _isoformat(value: Any) -> Any:
+    """A DatePublished value formatted like the response model serialises it."""
+    if not isinstance(value, str):
+        return value
+    formatted = datetime.fromisoformat(value).isoformat()
+    return formatted[:-6] + "Z" if formatted.endswith("+00:00") else formatted
+
+
+def view_fields(
+    view: RecommendationView = RecommendationView.full,
+    fields: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """
+    The response fields to send: the requested fields if any, else those of the view.
+
+    Fields may be given one per value or comma-separated.
+
+    Raises:
+        ValueError: If a requested field is not a recipe field.
+    """
+    names = [name.strip() for value in fields or [] for name in value.split(",")]
+    if any(names):
+        return _response_fields([name for name in names if name])
+    return SUMMARY_FIELDS if view == RecommendationView.summary else RESPONSE_FIELDS
+
+
+def _column_values(df: pd.DataFrame, name: str) -> List[Any]:
+    """One column as JSON-ready Python values, NaN as None."""
+    if name not in df.columns:
+        return [None] * len(df)
+    array = df[name].to_numpy()
+    values = array.tolist()
+    if array.dtype.kind in "fO":
+        for i in np.flatnonzero(pd.isna(array)).tolist():
+            values[i] = None
+    if name == "DatePublished":
+        values = [_isoformat(value) for value in values]
+    return values
+
+
+def recommendation_rows(
+    df: pd.DataFrame, fields: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Recipes of a recommendation DataFrame as plain dicts, built column by column.
+
+    The bulk counterpart of _transform_df_to_pydantic for the response path: the
+    columns are projected onto the response fields and NaN-normalised as whole
+    columns, then zipped into rows that orjson serialises directly, with no
+    per-row model validation.
+
+    Args:
+        df (pd.DataFrame): Recipes as returned by the recipe store.
+        fields (Optional[Sequence[str]]): Response fields to include, in order.
+            Defaults to all fields of MealRecommendationResponse.
+
+    Returns:
+        List[Dict[str, Any]]: One dict per recipe with the requested fields.
+    """
+    names = _response_fields(fields)
+    if len(df) == 0:
+        return []
+    columns = [_column_values(df, name) for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
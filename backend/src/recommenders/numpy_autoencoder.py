@@ -0,0 +1,178 @@
+import io
+import json
+import zipfile
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+
+KERAS_MODEL_PATH = "models/autoencoder_model.keras"
+SCALER_PATH = "models/scaler.pkl"
+WEIGHTS_PATH = "models/autoencoder_weights.npz"
+
+# The NumPy forward pass runs in float32 like Keras. Outputs agree with
+# model.predict to within these tolerances, checked on export.
+PREDICT_RTOL = 1e-4
+PREDICT_ATOL = 1e-5
+
+_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "sigmoid": lambda x: 1 / (1 + np.exp(-x)),
+    "tanh": np.tanh,
+}
+
+
+class NumpyMinMaxScaler:
+    """The ``transform`` half of a fitted sklearn MinMaxScaler."""
+
+    def __init__(self, scale: np.ndarray, min_: np.ndarray, data_min: np.ndarray) -> None:
+        self.scale_ = scale
+        self.min_ = min_
+        self.data_min_ = data_min
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.min_
+
+
+class NumpyAutoencoder:
+    """
+    Inference-only forward pass of the Dense/LeakyReLU stack from train_autoencoder.
+
+    Dropout is the identity at inference time and is dropped on export, so the
+    model is a list of dense and activation steps over float32 arrays.
+    """
+
+    def __init__(self, layers: List[dict], arrays: dict) -> None:
+        self.layers = layers
+        self.arrays = arrays
+
+    @classmethod
+    def load(cls, path: Union[str, Path] = WEIGHTS_PATH) -> "NumpyAutoencoder":
+        with np.load(path) as data:
+            layers = json.loads(str(data["layers"]))
+            arrays = {k: data[k].astype(np.float32) for k in data.files if k != "layers"}
+        return cls(layers, arrays)
+
+    def predict(
+        self, X: np.ndarray, batch_size: int = 65_536, verbose: int = 0
+    ) -> np.ndarray:
+        """
+        Run a batched forward pass.
+
+        Args:
+            X (np.ndarray): Scaled input features, one row per recipe.
+            batch_size (int): Rows per matrix multiplication, bounds peak memory.
+            verbose (int): Ignored, accepted for compatibility with Keras.
+
+        Returns:
+            np.ndarray: The reconstructed features as float32.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        return np.concatenate(
+            [
+                self._forward(X[start : start + batch_size])
+                for start in range(0, max(len(X), 1), batch_size)
+            ]
+        )
+
+    def _forward(self, x: np.ndarray) -> np.ndarray:
+        for i, layer in enumerate(self.layers):
+            if layer["type"] == "dense":
+                x = x @ self.arrays[f"kernel_{i}"]
+                x += self.arrays[f"bias_{i}"]
+                x = _ACTIVATIONS[layer["activation"]](x)
+            else:
+                # For slopes in [0, 1], LeakyReLU(x) == max(x, slope * x)
+                np.maximum(x, x * np.float32(layer["negative_slope"]), out=x)
+        return x
+
+
+def export_weights(
+    model_path: Union[str, Path] = KERAS_MODEL_PATH,
+    scaler_path: Union[str, Path] = SCALER_PATH,
+    weights_path: Union[str, Path] = WEIGHTS_PATH,
+) -> Path:
+    """
+    Write the layer weights of a saved .keras model and its scaler to an .npz file.
+
+    The .keras archive is read directly (config.json plus the HDF5 weights), so
+    exporting does not need TensorFlow. If TensorFlow is installed, the exported
+    model is checked against model.predict.
+
+    Args:
+        model_path: Saved Keras model.
+        scaler_path: Pickled MinMaxScaler.
+        weights_path: Output .npz file.
+
+    Returns:
+        Path: The written weights file.
+    """
+    import h5py
+    import joblib
+
+    with zipfile.ZipFile(model_path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+
+    layers, arrays = [], {}
+    for layer in config["config"]["layers"]:
+        kind, layer_config = layer["class_name"], layer["config"]
+        if kind == "Dense":
+            if layer_config["activation"] not in _ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {layer_config['activation']}")
+            variables = weights[f"layers/{layer_config['name']}/vars"]
+            arrays[f"kernel_{len(layers)}"] = np.asarray(variables["0"], dtype=np.float32)
+            arrays[f"bias_{len(layers)}"] = np.asarray(variables["1"], dtype=np.float32)
+            layers.append({"type": "dense", "activation": layer_config["activation"]})
+        elif kind == "LeakyReLU":
+            slope = layer_config.get("negative_slope", layer_config.get("alpha", 0.3))
+            if not 0 <= slope <= 1:
+                raise ValueError(f"Unsupported LeakyReLU slope: {slope}")
+            layers.append({"type": "leaky_relu", "negative_slope": slope})
+        elif kind not in ("InputLayer", "Dropout"):
+            raise ValueError(f"Unsupported layer for NumPy inference: {kind}")
+    weights.close()
+
+    scaler = joblib.load(scaler_path)
+    np.savez(
+        weights_path,
+        layers=np.array(json.dumps(layers)),
+        scaler_scale=scaler.scale_,
+        scaler_min=scaler.min_,
+        scaler_data_min=scaler.data_min_,
+        **arrays,
+    )
+    _check_against_keras(model_path, weights_path, scaler.n_features_in_)
+    return Path(weights_path)
+
+
+def _check_against_keras(model_path, weights_path, num_features: int) -> None:
+    try:
+        from tensorflow.keras.models import load_model
+    except ImportError:
+        print("TensorFlow not installed, skipping the Keras equivalence check")
+        return
+
+    X = np.random.default_rng(0).uniform(size=(4096, num_features)).astype(np.float32)
+    expected = load_model(model_path).predict(X, verbose=0)
+    actual = NumpyAutoencoder.load(weights_path).predict(X)
+    np.testing.assert_allclose(actual, expected, rtol=PREDICT_RTOL, atol=PREDICT_ATOL)
+    print(f"NumPy outputs match model.predict (max abs diff {np.abs(actual - expected).max():.2e})")
+
+
+def load_numpy_autoencoder(
+    weights_path: Union[str, Path] = WEIGHTS_PATH,
+    scaler_path: Union[str, Path] = WEIGHTS_PATH,
+) -> Tuple[NumpyAutoencoder, NumpyMinMaxScaler]:
+    """Load the exported autoencoder and scaler, mirroring load_trained_model."""
+    with np.load(scaler_path) as data:
+        scaler = NumpyMinMaxScaler(
+            data["scaler_scale"], data["scaler_min"], data["scaler_data_min"]
+        )
+    return NumpyAutoencoder.load(weights_path), scaler
+
+
+if __name__ == "__main__":
+    path = export_weights()
+    print(f"Exported autoencoder weights to {path} ({path.stat().st_size / 1024:.0f} KB)")
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from src.recommenders.embedding_index import EmbeddingIndex
+from src.recommenders.recipe_store import RecipeStore
+from src.recommenders.review_ranking import ReviewScores
+
+# Rough size of an entry besides its row arrays: the key, the tuple and four
+# array headers
+ENTRY_OVERHEAD = 512
+
+PlanRows = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class PlanKey(NamedTuple):
+    """What a meal plan depends on once the profile is reduced to calories."""
+
+    daily_calories: int
+    tolerance: int
+    suggestions: int
+    version: str
+
+
+def plan_version(
+    recipes: RecipeStore,
+    index: Optional[EmbeddingIndex],
+    ranking: Optional[ReviewScores] = None,
+) -> str:
+    """Identifier of the recipe data, model and reviews the plans are computed from."""
+    # The index version already combines the store and the model file versions
+    version = index.version if index is not None and index.version else recipes.version
+    return f"{version}/{ranking.version}" if ranking is not None else version
+
+
+class PlanCache:
+    """
+    Least-recently-used cache of meal plans, keyed by daily calorie target.
+
+    Profiles are reduced to their daily caloric intake, rounded to ``bucket``
+    kcal, so users with near-identical profiles share an entry. Callers compute
+    a missing plan for the rounded ``key.daily_calories``, not the exact target,
+    so an entry does not depend on which profile of the bucket missed first. Entries hold the
+    store rows of breakfast, lunch, dinner and suggestions, not the recipes, so
+    each request still loads only the columns it sends. The cache is bounded by
+    the bytes of those rows; a key with a new data or model version drops every
+    entry of the previous one.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 2**20, bucket: int = 10) -> None:
+        self.max_bytes = max_bytes
+        self.bucket = max(1, bucket)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._version: Optional[str] = None
+        self._entries: "OrderedDict[PlanKey, Tuple[PlanRows, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(
+        self, daily_calories: float, tolerance: int, suggestions: int, version: str
+    ) -> PlanKey:
+        """
+        Build the key of a request, rounding the calories to the bucket.
+
+        The plan for the key is computed for ``key.daily_calories``, up to half a
+        bucket from ``daily_calories``.
+        """
+        rounded = int(round(daily_calories / self.bucket)) * self.bucket
+        return PlanKey(rounded, tolerance, suggestions, version)
+
+    def get_or_compute(self, key: PlanKey, compute: Callable[[], PlanRows]) -> PlanRows:
+        """
+        Return the rows cached for ``key``, computing and storing them on a miss.
+
+        Args:
+            key (PlanKey): Key from ``key``.
+            compute (Callable[[], PlanRows]): Computes the rows for ``key``.
+
+        Returns:
+            PlanRows: Breakfast, lunch, dinner and suggestion rows.
+        """
+        with self._lock:
+            if key.version != self._version:
+                self._clear()
+                self._version = key.version
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Owned, read-only copies: an entry never keeps a replaced index alive
+        # and the requests sharing it cannot change it
+        rows = tuple(np.array(r, dtype=np.int64) for r in compute())
+        for r in rows:
+            r.flags.writeable = False
+        size = sum(r.nbytes for r in rows) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return rows
+
+        with self._lock:
+            if key.version != self._version or key in self._entries:
+                return rows
+            self._entries[key] = (rows, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+                self.evictions += 1
+        return rows
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the model was reloaded."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def status(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.nbytes,
+            "max_bytes": self.max_bytes,
+            "bucket_kcal": self.bucket,
+            "version": self._version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,383 @@
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import threading
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.recommenders.calorie_index import CalorieIndex
+
+RECIPES_CSV_PATH = "data/recipes.csv"
+RECIPE_STORE_DIR = "data/recipe_store"
+
+# Bump when the on-disk layout changes so stale stores are rebuilt.
+STORE_FORMAT = 1
+
+NUTRITION_COLUMNS = [
+    "Calories",
+    "FatContent",
+    "SaturatedFatContent",
+    "CholesterolContent",
+    "SodiumContent",
+    "CarbohydrateContent",
+    "FiberContent",
+    "SugarContent",
+    "ProteinContent",
+]
+
+# Columns stored as fixed-width numeric arrays. Every other column is stored as text.
+NUMERIC_COLUMNS: Dict[str, str] = {
+    "RecipeId": "int64",
+    "AuthorId": "int64",
+    "AggregatedRating": "float64",
+    "ReviewCount": "float64",
+    **{column: "float64" for column in NUTRITION_COLUMNS},
+    "RecipeServings": "float64",
+}
+
+# Numeric columns that get an argsort permutation persisted next to them.
+SORTED_COLUMNS = ["Calories", "RecipeId"]
+
+
+class RecipeStore:
+    """
+    Read-only, memory-mapped view of the recipes dataset.
+
+    Numeric columns are ``.npy`` arrays opened with ``mmap_mode="r"``; text columns
+    are a UTF-8 blob addressed through an ``offsets`` array (row ``i`` spans
+    ``offsets[i]:offsets[i + 1]``) plus a null mask. Pages are shared between all
+    worker processes through the OS page cache, and only the rows that are
+    actually returned get decoded.
+    """
+
+    def __init__(self, store_dir: Union[str, Path] = RECIPE_STORE_DIR) -> None:
+        self.store_dir = Path(store_dir)
+        meta_path = self.store_dir / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"Recipe store not found: {self.store_dir}")
+        self.meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        self.version: str = self.meta["version"]
+        self.columns: List[str] = [c["name"] for c in self.meta["columns"]]
+
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._offsets: Dict[str, np.ndarray] = {}
+        self._nulls: Dict[str, np.ndarray] = {}
+        self._blobs: Dict[str, Union[mmap.mmap, bytes]] = {}
+        for column in self.meta["columns"]:
+            name = column["name"]
+            if column["kind"] == "numeric":
+                self._numeric[name] = np.load(
+                    self.store_dir / f"{name}.npy", mmap_mode="r"
+                )
+            else:
+                self._offsets[name] = np.load(
+                    self.store_dir / f"{name}.offsets.npy", mmap_mode="r"
+                )
+                self._nulls[name] = np.load(
+                    self.store_dir / f"{name}.null.npy", mmap_mode="r"
+                )
+                self._blobs[name] = _map_blob(self.store_dir / f"{name}.bin")
+
+    def __len__(self) -> int:
+        return int(self.meta["rows"])
+
+    @cached_property
+    def calorie_index(self) -> CalorieIndex:
+        """Calories sorted once per process, using the permutation saved at build time."""
+        order_path = self.store_dir / "Calories.order.npy"
+        order = np.load(order_path, mmap_mode="r") if order_path.exists() else None
+        return CalorieIndex(self.column("Calories"), order)
+
+    @cached_property
+    def _recipe_ids(self) -> Tuple[np.ndarray, np.ndarray]:
+        """RecipeIds in ascending order and the permutation back to store rows."""
+        order_path = self.store_dir / "RecipeId.order.npy"
+        ids = self.column("RecipeId")
+        if order_path.exists():
+            order = np.load(order_path)
+        else:
+            order = np.argsort(ids, kind="stable")
+        return np.asarray(ids)[order], order
+
+    def row_of(self, recipe_id: int) -> Optional[int]:
+        """Return the store row of a recipe by its RecipeId, or None if unknown."""
+        sorted_ids, order = self._recipe_ids
+        position = int(np.searchsorted(sorted_ids, recipe_id))
+        if position < len(sorted_ids) and sorted_ids[position] == recipe_id:
+            return int(order[position])
+        return None
+
+    def rows_of(self, recipe_ids: Sequence[int]) -> np.ndarray:
+        """Return the store row of every RecipeId, -1 where the id is unknown."""
+        sorted_ids, order = self._recipe_ids
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        if len(sorted_ids) == 0:
+            return np.full(len(recipe_ids), -1, dtype=np.int64)
+        positions = np.searchsorted(sorted_ids, recipe_ids)
+        positions[positions == len(sorted_ids)] = 0
+        found = sorted_ids[positions] == recipe_ids
+        return np.where(found, order[positions], -1).astype(np.int64)
+
+    def column(self, name: str) -> np.ndarray:
+        """Return the memory-mapped array backing a numeric column."""
+        if name not in self._numeric:
+            raise KeyError(f"'{name}' is not a numeric column of the recipe store")
+        return self._numeric[name]
+
+    def numeric(
+        self, columns: Sequence[str], rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Stack numeric columns into an (n_rows, n_columns) float array."""
+        arrays = [self.column(name) for name in columns]
+        if rows is not None:
+            arrays = [array[rows] for array in arrays]
+        return np.column_stack(arrays).astype(np.float64, copy=False)
+
+    def take(
+        self, rows: Sequence[int], columns: Optional[Sequence[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Materialise the given rows as a DataFrame.
+
+        Args:
+            rows: Row positions in the store, returned in the given order.
+            columns: Columns to load. Defaults to all columns.
+
+        Returns:
+            pd.DataFrame: One row per position, indexed by the row position.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        names = list(columns) if columns is not None else self.columns
+        data = {}
+        for name in names:
+            if name in self._numeric:
+                data[name] = np.asarray(self._numeric[name][rows])
+            elif name in self._blobs:
+                data[name] = self._take_text(name, rows)
+            else:
+                raise KeyError(f"Unknown recipe column: {name}")
+        return pd.DataFrame(data, index=rows, columns=names)
+
+    def _take_text(self, name: str, rows: np.ndarray) -> List[Optional[str]]:
+        offsets = self._offsets[name]
+        nulls = self._nulls[name]
+        blob = self._blobs[name]
+        starts = offsets[rows].tolist()
+        ends = offsets[rows + 1].tolist()
+        is_null = nulls[rows].tolist()
+        return [
+            None if null else blob[start:end].decode("utf-8")
+            for start, end, null in zip(starts, ends, is_null)
+        ]
+
+
+def _map_blob(path: Path) -> Union[mmap.mmap, bytes]:
+    # mmap cannot map an empty file, which happens when a column is entirely null.
+    if path.stat().st_size == 0:
+        return b""
+    with path.open("rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def save_npz(path: Union[str, Path], **arrays: np.ndarray) -> None:
+    """
+    Write arrays to ``path`` as .npz without readers ever seeing a partial file.
+
+    Artefacts next to the store (embedding index, review scores) are built
+    lazily by every worker, so they are written to a file of their own and
+    renamed into place, like the store itself.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        with tmp_path.open("wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def _source_signature(csv_path: Path) -> Dict[str, int]:
+    stat = csv_path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _store_version(signature: Dict[str, int]) -> str:
+    payload = json.dumps({"format": STORE_FORMAT, **signature}, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def build_recipe_store(
+    csv_path: Union[str, Path] = RECIPES_CSV_PATH,
+    store_dir: Union[str, Path] = RECIPE_STORE_DIR,
+    chunksize: int = 50_000,
+) -> Path:
+    """
+    Convert the recipes CSV into the columnar on-disk layout read by RecipeStore.
+
+    The CSV is parsed in chunks so the conversion never holds the whole text of
+    the dataset in memory. The store is written to a temporary directory and
+    moved into place once complete, so readers never observe a partial build.
+    Rows with a missing or non-numeric value in an integer column (RecipeId,
+    AuthorId) are dropped and counted in the store's meta.json.
+
+    Args:
+        csv_path: Path to recipes.csv.
+        store_dir: Directory to write the store to.
+        chunksize: Number of CSV rows parsed per chunk.
+
+    Returns:
+        Path: The store directory.
+    """
+    csv_path = Path(csv_path)
+    store_dir = Path(store_dir)
+    tmp_dir = store_dir.with_name(f"{store_dir.name}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    header = pd.read_csv(csv_path, nrows=0).columns.tolist()
+    text_columns = [c for c in header if c not in NUMERIC_COLUMNS]
+    numeric_parts: Dict[str, List[np.ndarray]] = {
+        c: [] for c in header if c in NUMERIC_COLUMNS
+    }
+    offsets: Dict[str, List[np.ndarray]] = {c: [] for c in text_columns}
+    nulls: Dict[str, List[np.ndarray]] = {c: [] for c in text_columns}
+    written = {c: 0 for c in text_columns}
+    blobs = {c: (tmp_dir / f"{c}.bin").open("wb") for c in text_columns}
+
+    int_columns = [c for c in numeric_parts if NUMERIC_COLUMNS[c] == "int64"]
+    rows = dropped = 0
+    try:
+        chunks = pd.read_csv(
+            csv_path, chunksize=chunksize, dtype={c: str for c in text_columns}
+        )
+        for chunk in chunks:
+            numeric = {
+                name: pd.to_numeric(chunk[name], errors="coerce")
+                for name in numeric_parts
+            }
+            # Integer columns have no NaN to stand in for a missing value
+            valid = np.ones(len(chunk), dtype=bool)
+            for name in int_columns:
+                valid &= numeric[name].notna().to_numpy()
+            if not valid.all():
+                dropped += int((~valid).sum())
+                chunk = chunk[valid]
+                numeric = {name: values[valid] for name, values in numeric.items()}
+            rows += len(chunk)
+            for name, parts in numeric_parts.items():
+                parts.append(numeric[name].to_numpy(dtype=NUMERIC_COLUMNS[name]))
+            for name in text_columns:
+                is_null = chunk[name].isna().to_numpy()
+                encoded = [
+                    value.encode("utf-8") for value in chunk[name].fillna("").tolist()
+                ]
+                lengths = np.fromiter(
+                    (len(value) for value in encoded), dtype=np.int64, count=len(encoded)
+                )
+                offsets[name].append(written[name] + np.cumsum(lengths))
+                nulls[name].append(is_null)
+                blobs[name].write(b"".join(encoded))
+                written[name] += int(lengths.sum())
+    finally:
+        for blob in blobs.values():
+            blob.close()
+
+    columns = []
+    for name in header:
+        if name in numeric_parts:
+            values = _concat(numeric_parts[name], name)
+            np.save(tmp_dir / f"{name}.npy", values)
+            if name in SORTED_COLUMNS:
+                np.save(
+                    tmp_dir / f"{name}.order.npy", np.argsort(values, kind="stable")
+                )
+            columns.append(
+                {"name": name, "kind": "numeric", "dtype": NUMERIC_COLUMNS[name]}
+            )
+        else:
+            np.save(
+                tmp_dir / f"{name}.offsets.npy",
+                np.concatenate([np.zeros(1, dtype=np.int64), *offsets[name]]),
+            )
+            np.save(
+                tmp_dir / f"{name}.null.npy",
+                np.concatenate(nulls[name]) if nulls[name] else np.zeros(0, bool),
+            )
+            columns.append({"name": name, "kind": "text"})
+
+    signature = _source_signature(csv_path)
+    meta = {
+        "format": STORE_FORMAT,
+        "rows": rows,
+        "dropped_rows": dropped,
+        "columns": columns,
+        "source": {"path": str(csv_path), **signature},
+        "version": _store_version(signature),
+    }
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+
+    # Swap the finished build into place. Open mappings of a previous build stay
+    # valid after its files are unlinked.
+    old_dir = store_dir.with_name(f"{store_dir.name}.old-{os.getpid()}")
+    if store_dir.exists():
+        store_dir.rename(old_dir)
+    tmp_dir.rename(store_dir)
+    if old_dir.exists():
+        shutil.rmtree(old_dir)
+    return store_dir
+
+
+def _concat(parts: List[np.ndarray], name: str) -> np.ndarray:
+    if not parts:
+        return np.zeros(0, dtype=NUMERIC_COLUMNS[name])
+    return np.concatenate(parts)
+
+
+def is_store_stale(
+    csv_path: Union[str, Path] = RECIPES_CSV_PATH,
+    store_dir: Union[str, Path] = RECIPE_STORE_DIR,
+) -> bool:
+    """Return True if the store is missing or was built from a different CSV."""
+    meta_path = Path(store_dir) / "meta.json"
+    if not meta_path.exists():
+        return True
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        # Shipping a prebuilt store without the CSV is fine.
+        return False
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    return meta.get("version") != _store_version(_source_signature(csv_path))
+
+
+def load_recipe_store(
+    csv_path: Union[str, Path] = RECIPES_CSV_PATH,
+    store_dir: Union[str, Path] = RECIPE_STORE_DIR,
+) -> RecipeStore:
+    """Open the recipe store, building it first if it is missing or stale."""
+    if is_store_stale(csv_path, store_dir):
+        build_recipe_store(csv_path, store_dir)
+    return RecipeStore(store_dir)
+
+
+@lru_cache(maxsize=1)
+def get_recipe_store() -> RecipeStore:
+    """Process-wide recipe store shared by all requests."""
+    return load_recipe_store()
+
+
+if __name__ == "__main__":
+    # Build the store ahead of time, e.g. as part of the deployment.
+    path = build_recipe_store()
+    store = RecipeStore(path)
+    print(
+        f"Built recipe store {store.version} with {len(store)} rows at {path} "
+        f"({store.meta['dropped_rows']} invalid rows dropped)"
+    )
@@ -0,0 +1,361 @@
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pyarrow as pa
+
+from src.recommenders.ingestion import (
+    DATASETS_DIR,
+    REVIEWS,
+    REVIEWS_CSV_PATH,
+    ingest_csv,
+    is_dataset_stale,
+    open_dataset,
+    read_manifest,
+)
+from src.recommenders.recipe_store import RecipeStore, get_recipe_store, save_npz
+
+REVIEW_SCORES_FILE = "review_scores.npz"
+
+# Reviews a recipe needs before its own ratings outweigh the mean of all reviews
+PRIOR_WEIGHT = 10.0
+
+# Days after which the evidence of a recipe's latest review counts half
+RECENCY_HALF_LIFE_DAYS = 3 * 365.0
+
+DAY = 86400
+
+# Seconds before loading scores that were unavailable is tried again
+RETRY_AFTER = 300.0
+
+
+class ReviewScores:
+    """
+    Per-recipe review aggregates, aligned with the rows of the recipe store.
+
+    ``bayesian_average`` is the mean rating shrunk toward the mean of all
+    reviews by ``prior_weight`` virtual reviews, so a single 5-star review does
+    not outrank hundreds of 4.8s. ``score`` additionally pulls recipes whose
+    latest review is old back toward that mean. Ranking a candidate set only
+    gathers and sorts its scores, O(k) work per request.
+    """
+
+    def __init__(
+        self,
+        bayesian_average: np.ndarray,
+        review_count: np.ndarray,
+        last_review: np.ndarray,
+        score: np.ndarray,
+        prior_mean: float,
+        prior_weight: float,
+        version: str = "",
+    ) -> None:
+        self.bayesian_average = bayesian_average
+        self.review_count = review_count
+        self.last_review = last_review
+        self.score = score
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.version = version
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+    @classmethod
+    def from_totals(
+        cls,
+        review_count: np.ndarray,
+        rating_sum: np.ndarray,
+        last_review: np.ndarray,
+        prior_weight: float = PRIOR_WEIGHT,
+        half_life_days: float = RECENCY_HALF_LIFE_DAYS,
+        version: str = "",
+    ) -> "ReviewScores":
+        """
+        Derive the scores from per-row review counts, rating sums and latest review.
+
+        Args:
+            review_count (np.ndarray): Reviews per store row.
+            rating_sum (np.ndarray): Sum of the ratings per store row.
+            last_review (np.ndarray): Unix time of the latest review, 0 if none.
+            prior_weight (float): Virtual reviews at the mean rating added to every recipe.
+            half_life_days (float): Age of the latest review at which its weight halves.
+            version (str): Identifier of the store and reviews the totals came from.
+
+        Returns:
+            ReviewScores: The scores.
+        """
+        total = review_count.sum()
+        prior_mean = float(rating_sum.sum() / total) if total else 0.0
+        bayesian_average = (prior_mean * prior_weight + rating_sum) / (
+            prior_weight + review_count
+        )
+        # Age relative to the newest review, so a dataset snapshot ranks the
+        # same whenever it is scored
+        newest = last_review.max() if len(last_review) else 0
+        age_days = (newest - last_review) / DAY
+        decay = np.where(review_count > 0, 0.5 ** (age_days / half_life_days), 0.0)
+        score = prior_mean + (bayesian_average - prior_mean) * decay
+        return cls(
+            bayesian_average.astype(np.float32),
+            review_count.astype(np.int32),
+            last_review.astype(np.int64),
+            score.astype(np.float32),
+            prior_mean,
+            prior_weight,
+            version,
+        )
+
+    def rank(self, rows: Sequence[int], k: Optional[int] = None) -> np.ndarray:
+        """
+        Reorder candidate store rows by score, best first.
+
+        Args:
+            rows (Sequence[int]): Candidate store rows, e.g. a calorie window.
+            k (Optional[int]): Number of rows to keep. Defaults to all.
+
+        Returns:
+            np.ndarray: The ``k`` best candidates, ties kept in their given order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.argsort(-self.score[rows], kind="stable")
+        return rows[order[:k]]
+
+    def status(self) -> Dict[str, Any]:
+        reviewed = self.review_count > 0
+        return {
+            "version": self.version,
+            "recipes": len(self),
+            "reviewed_recipes": int(reviewed.sum()),
+            "reviews": int(self.review_count.sum()),
+            "prior_mean": self.prior_mean,
+            "prior_weight": self.prior_weight,
+        }
+
+    def save(self, path: Union[str, Path]) -> None:
+        save_npz(
+            path,
+            bayesian_average=self.bayesian_average,
+            review_count=self.review_count,
+            last_review=self.last_review,
+            score=self.score,
+            prior_mean=np.array(self.prior_mean),
+            prior_weight=np.array(self.prior_weight),
+            version=np.array(self.version),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ReviewScores":
+        with np.load(path) as data:
+            return cls(
+                data["bayesian_average"],
+                data["review_count"],
+                data["last_review"],
+                data["score"],
+                float(data["prior_mean"]),
+                float(data["prior_weight"]),
+                version=str(data["version"]),
+            )
+
+
+def _scores_version(recipes: RecipeStore, datasets_dir: Union[str, Path]) -> str:
+    manifest = read_manifest(REVIEWS, datasets_dir)
+    return f"{recipes.version}-{manifest['version'] if manifest else 'none'}"
+
+
+def build_review_scores(
+    recipes: RecipeStore,
+    path: Optional[Union[str, Path]] = None,
+    reviews_csv: Union[str, Path] = REVIEWS_CSV_PATH,
+    datasets_dir: Union[str, Path] = DATASETS_DIR,
+    batch_size: int = 65_536,
+) -> ReviewScores:
+    """
+    Offline job: aggregate every review per recipe and save the scores.
+
+    The reviews are ingested into Parquet partitions first if needed, then
+    streamed a batch at a time, reading only the recipe, rating and date
+    columns, into per-row totals the size of the recipe store.
+
+    Args:
+        recipes (RecipeStore): Store the scores are aligned with.
+        path (Optional[Union[str, Path]]): Output file, defaults to the store directory.
+        reviews_csv (Union[str, Path]): Path to reviews.csv.
+        datasets_dir (Union[str, Path]): Directory of the ingested datasets.
+        batch_size (int): Reviews aggregated at once.
+
+    Returns:
+        ReviewScores: The built scores.
+    """
+    path = Path(path or recipes.store_dir / REVIEW_SCORES_FILE)
+    if is_dataset_stale(REVIEWS, reviews_csv, datasets_dir):
+        ingest_csv(REVIEWS, reviews_csv, datasets_dir)
+
+    start = time.perf_counter()
+    n = len(recipes)
+    review_count = np.zeros(n, dtype=np.int64)
+    rating_sum = np.zeros(n, dtype=np.float64)
+    last_review = np.zeros(n, dtype=np.int64)
+    unknown = 0
+    batches = open_dataset(REVIEWS, datasets_dir).to_batches(
+        columns=["RecipeId", "Rating", "DateSubmitted"], batch_size=batch_size
+    )
+    for batch in batches:
+        ratings = batch.column("Rating")
+        rated = ratings.is_valid().to_numpy(zero_copy_only=False)
+        rows = recipes.rows_of(batch.column("RecipeId").to_numpy())
+        unknown += int((rows < 0).sum())
+        keep = rated & (rows >= 0)
+        rows = rows[keep]
+        review_count += np.bincount(rows, minlength=n)
+        rating_sum += np.bincount(
+            rows,
+            weights=ratings.fill_null(0).to_numpy()[keep],
+            minlength=n,
+        )
+        submitted = batch.column("DateSubmitted").cast(pa.int64()).fill_null(0)
+        np.maximum.at(last_review, rows, submitted.to_numpy()[keep])
+
+    scores = ReviewScores.from_totals(
+        review_count,
+        rating_sum,
+        last_review,
+        version=_scores_version(recipes, datasets_dir),
+    )
+    print(
+        f"Aggregated {int(review_count.sum())} reviews of "
+        f"{int((review_count > 0).sum())} recipes in {time.perf_counter() - start:.1f}s"
+        f" ({unknown} reviews of unknown recipes skipped)"
+    )
+    scores.save(path)
+    return scores
+
+
+def load_review_scores(
+    recipes: RecipeStore,
+    reviews_csv: Union[str, Path] = REVIEWS_CSV_PATH,
+    datasets_dir: Union[str, Path] = DATASETS_DIR,
+) -> Optional[ReviewScores]:
+    """
+    Load the scores for this store, rebuilding them if the recipes or reviews changed.
+
+    Returns None when there are neither saved scores nor reviews to build them from.
+    """
+    path = recipes.store_dir / REVIEW_SCORES_FILE
+    has_reviews = (
+        Path(reviews_csv).exists() or read_manifest(REVIEWS, datasets_dir) is not None
+    )
+    if path.exists():
+        scores = ReviewScores.load(path)
+        fresh = not has_reviews or (
+            not is_dataset_stale(REVIEWS, reviews_csv, datasets_dir)
+            and scores.version == _scores_version(recipes, datasets_dir)
+        )
+        if fresh and scores.version.startswith(recipes.version):
+            return scores
+    if not has_reviews:
+        return None
+    return build_review_scores(recipes, path, reviews_csv, datasets_dir)
+
+
+class ReviewScoresRegistry:
+    """
+    Process-wide review scores of the shared recipe store.
+
+    ``load`` loads (or builds) the scores and blocks, for the startup of a
+    worker. ``get`` is what requests call: it only returns the scores already
+    loaded for the current store. When there are none for the current store
+    version, it starts a load in a background thread and returns None
+    meanwhile. A load that found no scores, or failed, is retried once
+    ``retry_after`` seconds have passed, so ranking recovers without a restart.
+    """
+
+    def __init__(
+        self,
+        recipes: Callable[[], RecipeStore] = get_recipe_store,
+        reviews_csv: Union[str, Path] = REVIEWS_CSV_PATH,
+        datasets_dir: Union[str, Path] = DATASETS_DIR,
+        retry_after: float = RETRY_AFTER,
+    ) -> None:
+        self.recipes = recipes
+        self.reviews_csv = reviews_csv
+        self.datasets_dir = datasets_dir
+        self.retry_after = retry_after
+        self.last_error: Optional[str] = None
+        # Store version and its scores, replaced together
+        self._loaded: Tuple[Optional[str], Optional[ReviewScores]] = (None, None)
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def building(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _is_current(self, recipes: RecipeStore) -> bool:
+        version, scores = self._loaded
+        return version == recipes.version and (
+            scores is not None or time.monotonic() < self._loaded_at + self.retry_after
+        )
+
+    def _scores_of(self, recipes: RecipeStore) -> Optional[ReviewScores]:
+        # Scores of another store version are not aligned with its rows
+        version, scores = self._loaded
+        return scores if version == recipes.version else None
+
+    def get(self) -> Optional[ReviewScores]:
+        """The scores loaded for the current recipe store, None if there are none."""
+        recipes = self.recipes()
+        if not self._is_current(recipes):
+            self._start_load(recipes)
+        return self._scores_of(recipes)
+
+    def load(self) -> Optional[ReviewScores]:
+        """Load the scores for the current recipe store, building them if needed."""
+        recipes = self.recipes()
+        self._load(recipes)
+        return self._scores_of(recipes)
+
+    def _start_load(self, recipes: RecipeStore) -> None:
+        with self._start_lock:
+            if self.building:
+                return
+            self._thread = threading.Thread(
+                target=self._load, args=(recipes,), name="review-scores", daemon=True
+            )
+            self._thread.start()
+
+    def _load(self, recipes: RecipeStore) -> None:
+        with self._lock:
+            if self._is_current(recipes):
+                return
+            try:
+                scores = load_review_scores(
+                    recipes, self.reviews_csv, self.datasets_dir
+                )
+                self.last_error = None
+            except Exception as e:
+                # Ranking stays off until the retry rather than failing requests
+                print(f"Review ranking unavailable: {e}")
+                scores, self.last_error = None, str(e)
+            self._loaded_at = time.monotonic()
+            self._loaded = (recipes.version, scores)
+
+
+review_scores = ReviewScoresRegistry()
+
+
+def get_review_scores() -> Optional[ReviewScores]:
+    """
+    Process-wide review scores for the shared recipe store, None if unavailable.
+
+    Never loads or builds them on the caller's thread, see ReviewScoresRegistry.
+    """
+    return review_scores.get()
+
+
+if __name__ == "__main__":
+    build_review_scores(get_recipe_store())
@@ -0,0 +1,110 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.sales_service import ProductSales, Sale
+
+# Sentinel rank for states that do not complete any sale name.
+_NO_MATCH = (float("inf"), 0)
+
+
+class SaleMatcher:
+    """
+    Aho–Corasick automaton over lowercased sale item names.
+
+    Built once when the sales data is loaded. Matching a product name walks the
+    automaton once, so the cost is linear in the length of the name no matter how
+    many sale names there are.
+
+    Two deterministic strategies are supported:
+
+    * ``longest_match=False`` (default): the sale whose name comes first in the
+      sales data wins, exactly like the previous substring scan.
+    * ``longest_match=True``: the longest sale name found in the product name wins,
+      ties broken by position in the sales data.
+    """
+
+    def __init__(
+        self, entries: Iterable[Tuple[str, Sale]], longest_match: bool = False
+    ) -> None:
+        self.longest_match = longest_match
+
+        # Same semantics as building a dict: the first occurrence of a name fixes
+        # its position, the last occurrence provides the sale.
+        sale_map: Dict[str, Sale] = {}
+        for name, sale in entries:
+            sale_map[name.lower()] = sale
+        self.names: List[str] = list(sale_map)
+        self.sales: List[Sale] = list(sale_map.values())
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Best pattern ending in each state, as a sortable (priority, rank) key
+        self._best: List[Tuple[float, int]] = [_NO_MATCH]
+        for rank, name in enumerate(self.names):
+            self._add(name, rank)
+        self._link()
+
+    @classmethod
+    def from_sales(
+        cls, sales_list: List[ProductSales], longest_match: bool = False
+    ) -> "SaleMatcher":
+        return cls(
+            ((item.name, item.sale) for ps in sales_list for item in ps.products.products),
+            longest_match=longest_match,
+        )
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _key(self, name: str, rank: int) -> Tuple[float, int]:
+        return (-len(name), rank) if self.longest_match else (rank, 0)
+
+    def _add(self, name: str, rank: int) -> None:
+        state = 0
+        for char in name:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(_NO_MATCH)
+            state = next_state
+        self._best[state] = min(self._best[state], self._key(name, rank))
+
+    def _link(self) -> None:
+        # Breadth-first, so a state's failure target is final before its children
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                # Fold the best match of the suffix into this state
+                self._best[child] = min(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+
+    def match(self, product_name: str) -> Optional[Sale]:
+        """Return the sale whose name occurs in the product name, if any."""
+        best = self._best[0]
+        state = 0
+        goto, fail, best_at = self._goto, self._fail, self._best
+        for char in product_name.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best_at[state] < best:
+                best = best_at[state]
+        if best == _NO_MATCH:
+            return None
+        rank = best[1] if self.longest_match else best[0]
+        return self.sales[rank]
+
+    def enrich(self, products: list) -> list:
+        """Attach the matching sale to every product that has one."""
+        for p in products:
+            sale = self.match(p.name)
+            if sale is not None:
+                p.sale = sale
+        return products
@@ -0,0 +1,433 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_products import Product
+from src.kassal.rate_limiter import background_priority
+from src.sale_matcher import SaleMatcher
+from src.sales_service import ProductSales, Sale
+
+SALE_INDEX_PATH = "data/sale_index.json"
+
+# Seconds before a failed resolution of the same sales version is started again
+RETRY_AFTER = 300.0
+
+# Kassal store codes of the vendors scraped by scrape_discounts.py. Vendors not
+# listed here (e.g. holdbart, gigaboks, jacobs, matkroken, eurocash-se) are not
+# covered by Kassal; their sales are attached by name instead.
+VENDOR_STORE_CODES: Dict[str, str] = {
+    "bunnpris-no": "BUNNPRIS",
+    "coop-extra-no": "COOP_EXTRA",
+    "coop-mega-no": "COOP_MEGA",
+    "coop-prix-no": "COOP_PRIX",
+    "europris-no": "EUROPRIS_NO",
+    "joker-no": "JOKER_NO",
+    "kiwi-no": "KIWI",
+    "meny-no": "MENY_NO",
+}
+
+# Fraction of the sale name's words that must occur in a product name
+MIN_NAME_SCORE = 0.67
+# Kassal search results considered per sale item
+SEARCH_SIZE = 10
+
+_WORD = re.compile(r"\w+(?:,\d+)?")
+
+
+def name_tokens(name: str) -> List[str]:
+    """Lowercased words of a name, keeping decimals such as ``1,5l`` together."""
+    return _WORD.findall(name.lower())
+
+
+def name_score(sale_name: str, product_name: str) -> float:
+    """Fraction of the words in the sale name that occur in the product name."""
+    sale_words = set(name_tokens(sale_name))
+    if not sale_words:
+        return 0.0
+    return len(sale_words & set(name_tokens(product_name))) / len(sale_words)
+
+
+@dataclass
+class SaleResolution:
+    """
+    The Kassal products a sale item from a vendor's catalogue applies to.
+
+    Attributes:
+        vendor: Vendor the sale was extracted for.
+        store: Kassal store code of the vendor, None if Kassal does not cover it.
+        name: Sale item name as extracted.
+        sale: The sale.
+        product_ids: Kassal ids of the vendor's products the sale applies to.
+        eans: EANs of those products.
+        method: "search" if found among the search results, "ean" if a product
+            of another store led to the vendor's listing by EAN.
+        score: Name score of the chosen products.
+        ambiguous: Several different products matched equally well; the sale is
+            attached to all of them.
+        reason: Why nothing was resolved: "unknown_vendor", "no_match" or "error".
+    """
+
+    vendor: Optional[str]
+    store: Optional[str]
+    name: str
+    sale: Sale
+    product_ids: List[int] = field(default_factory=list)
+    eans: List[str] = field(default_factory=list)
+    method: Optional[str] = None
+    score: float = 0.0
+    ambiguous: bool = False
+    reason: Optional[str] = None
+
+    @property
+    def resolved(self) -> bool:
+        return bool(self.product_ids)
+
+    def to_json(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["sale"] = self.sale.model_dump()
+        return payload
+
+    @classmethod
+    def from_json(cls, payload: Dict[str, Any]) -> "SaleResolution":
+        return cls(**{**payload, "sale": Sale.model_validate(payload["sale"])})
+
+
+class SaleIndex:
+    """
+    Sales keyed by Kassal product, for constant-time enrichment.
+
+    Products are looked up by id, then by (EAN, store code) so another listing
+    of the same product in the same store still gets the sale. When several sale
+    items resolve to one product the first in the sales data wins. Sales of
+    vendors without a Kassal store code cannot be resolved; products without a
+    resolved sale are matched against their names, like before resolution.
+    """
+
+    def __init__(self, resolutions: List[SaleResolution]) -> None:
+        self.by_id: Dict[int, Sale] = {}
+        self.by_ean: Dict[Tuple[str, str], Sale] = {}
+        for resolution in resolutions:
+            for product_id in resolution.product_ids:
+                self.by_id.setdefault(product_id, resolution.sale)
+            for ean in resolution.eans:
+                self.by_ean.setdefault((ean, resolution.store), resolution.sale)
+        self.by_name = SaleMatcher(
+            (r.name, r.sale) for r in resolutions if r.reason == "unknown_vendor"
+        )
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def match(self, product: Product) -> Optional[Sale]:
+        sale = self.by_id.get(product.id)
+        # Compared listings share the EAN of their comparison and carry none
+        ean = getattr(product, "ean", None)
+        if sale is None and ean and product.store is not None:
+            sale = self.by_ean.get((ean, product.store.code))
+        if sale is None and len(self.by_name):
+            sale = self.by_name.match(product.name)
+        return sale
+
+    def enrich(self, products: list) -> list:
+        """Attach the sale of every product that has one."""
+        for p in products:
+            sale = self.match(p)
+            if sale is not None:
+                p.sale = sale
+        return products
+
+
+async def resolve_sale_item(
+    api: AsyncKassalAPI, vendor: Optional[str], name: str, sale: Sale
+) -> SaleResolution:
+    """
+    Find the vendor's Kassal products for one sale item.
+
+    The item name is searched for and the results are scored by how much of the
+    name they contain. The best results from the vendor's own store are used. If
+    only other stores carry the product, its EAN is looked up to find the
+    vendor's listing.
+    """
+    store = VENDOR_STORE_CODES.get(vendor or "")
+    resolution = SaleResolution(vendor=vendor, store=store, name=name, sale=sale)
+    if store is None:
+        resolution.reason = "unknown_vendor"
+        return resolution
+
+    candidates = (await api.get_products(search=name, size=SEARCH_SIZE)).data
+    scored = [(name_score(name, product.name), product) for product in candidates]
+    scored = [(score, p) for score, p in scored if score >= MIN_NAME_SCORE]
+    own = [(score, p) for score, p in scored if p.store and p.store.code == store]
+    if own:
+        best = max(score for score, _ in own)
+        chosen = [p for score, p in own if score == best]
+        resolution.product_ids = [p.id for p in chosen]
+        resolution.eans = sorted({p.ean for p in chosen if p.ean})
+        resolution.method, resolution.score = "search", best
+        resolution.ambiguous = len(resolution.product_ids) > 1
+        return resolution
+
+    # Only the best matches from other stores are looked up by EAN, each EAN once
+    best = max((score for score, _ in scored), default=0.0)
+    eans = dict.fromkeys(p.ean for score, p in scored if score == best and p.ean)
+    for ean in eans:
+        listings = (await api.get_product_by_ean(ean)).products
+        ids = [p.id for p in listings if p.store is not None and p.store.code == store]
+        if ids:
+            resolution.product_ids, resolution.eans = ids, [ean]
+            resolution.method, resolution.score = "ean", best
+            return resolution
+    resolution.reason = "no_match"
+    return resolution
+
+
+async def resolve_sales(
+    api: AsyncKassalAPI, sales: List[ProductSales], concurrency: int = 8
+) -> List[SaleResolution]:
+    """
+    Resolve every sale item, in the order of the sales data.
+
+    Items with the same vendor and name are searched for once. Searches run at
+    background priority with at most ``concurrency`` in flight.
+    """
+    items: Dict[Tuple[Optional[str], str], Tuple[str, Sale]] = {}
+    for ps in sales:
+        for item in ps.products.products:
+            items.setdefault((ps.vendor, item.name.lower()), (item.name, item.sale))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(vendor: Optional[str], name: str, sale: Sale) -> SaleResolution:
+        async with semaphore:
+            try:
+                return await resolve_sale_item(api, vendor, name, sale)
+            except Exception:
+                return SaleResolution(
+                    vendor=vendor,
+                    store=VENDOR_STORE_CODES.get(vendor or ""),
+                    name=name,
+                    sale=sale,
+                    reason="error",
+                )
+
+    with background_priority():
+        return list(
+            await asyncio.gather(
+                *(resolve(vendor, *item) for (vendor, _), item in items.items())
+            )
+        )
+
+
+def resolution_stats(resolutions: List[SaleResolution]) -> Dict[str, Any]:
+    """Match rate, ambiguity and failure reasons, overall and per vendor."""
+    resolved = [r for r in resolutions if r.resolved]
+    ambiguous = sum(r.ambiguous for r in resolved)
+    vendors: Dict[str, Dict[str, Any]] = {}
+    for r in resolutions:
+        stats = vendors.setdefault(r.vendor or "", {"items": 0, "resolved": 0})
+        stats["items"] += 1
+        stats["resolved"] += r.resolved
+    for stats in vendors.values():
+        stats["match_rate"] = stats["resolved"] / stats["items"]
+    return {
+        "items": len(resolutions),
+        "resolved": len(resolved),
+        "match_rate": len(resolved) / len(resolutions) if resolutions else None,
+        "ambiguous": ambiguous,
+        "ambiguity_rate": ambiguous / len(resolved) if resolved else None,
+        "products": len({pid for r in resolved for pid in r.product_ids}),
+        "by_method": dict(Counter(r.method for r in resolved)),
+        "unresolved": dict(Counter(r.reason for r in resolutions if r.reason)),
+        "vendors": vendors,
+    }
+
+
+class SaleResolver:
+    """
+    Sale items of the current sales data resolved to Kassal products.
+
+    Resolution takes a few Kassal searches per sale item, so like the on-sale
+    list it is built once per sales version by a background job and saved to
+    ``path``. Until the first build is done the index is not ready and callers
+    fall back to matching sale names; afterwards the previous index is served
+    while a new version is resolved. A failed build is not started again for
+    the same sales version until ``retry_after`` seconds have passed.
+    """
+
+    def __init__(
+        self,
+        api: AsyncKassalAPI,
+        path: Optional[str] = SALE_INDEX_PATH,
+        concurrency: int = 8,
+        retry_after: float = RETRY_AFTER,
+    ) -> None:
+        self.api = api
+        self.path = Path(path) if path else None
+        self.concurrency = concurrency
+        self.retry_after = retry_after
+
+        self.ready = False
+        self.version: Optional[str] = None
+        self.index = SaleIndex([])
+        self.stats: Dict[str, Any] = {}
+        self.built_at: Optional[float] = None
+        self.build_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.failed_at: Optional[float] = None
+        self._failed_version: Optional[str] = None
+        self._building: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def building(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def retry_at(self) -> Optional[float]:
+        if self.failed_at is None:
+            return None
+        return self.failed_at + self.retry_after
+
+    def _fail(self, version: Optional[str], error: str) -> None:
+        self.last_error = error
+        self.failed_at, self._failed_version = time.time(), version
+        print(f"Failed to resolve the sales: {error}")
+
+    def _adopt(self, resolutions: List[SaleResolution], version: Optional[str]) -> None:
+        self.index = SaleIndex(resolutions)
+        self.stats = resolution_stats(resolutions)
+        self.version, self.ready = version, True
+
+    def load(self, version: Optional[str]) -> bool:
+        """Adopt the index saved on disk if it was built from the given sales version."""
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            saved = json.loads(self.path.read_text(encoding="utf-8"))
+            if saved["version"] != version:
+                return False
+            resolutions = [SaleResolution.from_json(r) for r in saved["resolutions"]]
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Ignoring saved sale index: {e}")
+            return False
+        self._adopt(resolutions, version)
+        self.built_at = saved.get("built_at")
+        return True
+
+    def ensure(
+        self, sales: List[ProductSales], version: Optional[str]
+    ) -> Optional[asyncio.Task]:
+        """
+        Start resolving the sales of ``version`` unless it is current or in progress.
+
+        Must be called from a running event loop. Returns the build task, or None if
+        the index is already current or its last build failed less than
+        ``retry_after`` seconds ago. Without sales data (``version`` None: an empty
+        sales store or a failed first load) the index is empty and nothing is built.
+        """
+        if self.ready and self.version == version:
+            return None
+        if version is None:
+            # A build of older sales still running is discarded when it finishes
+            self._building = None
+            self._adopt([], None)
+            return None
+        if self.building and self._building == version:
+            return self._task
+        if (
+            self.failed_at is not None
+            and self._failed_version == version
+            and time.time() < self.retry_at
+        ):
+            return None
+        self._building = version
+        self._task = asyncio.create_task(self._build(sales, version))
+        return self._task
+
+    async def _build(self, sales: List[ProductSales], version: Optional[str]) -> None:
+        start = time.perf_counter()
+        try:
+            resolutions = await resolve_sales(self.api, sales, self.concurrency)
+        except Exception as e:
+            self._fail(version, str(e))
+            return
+        errors = sum(r.reason == "error" for r in resolutions)
+        if resolutions and errors == len(resolutions):
+            self._fail(version, f"All {errors} sale item lookups failed")
+            return
+        if version != self._building:
+            return  # A newer sales version was loaded meanwhile
+        self._adopt(resolutions, version)
+        self.built_at = time.time()
+        self.build_seconds = time.perf_counter() - start
+        self.last_error = self.failed_at = self._failed_version = None
+        self._save(resolutions)
+
+    def _save(self, resolutions: List[SaleResolution]) -> None:
+        if self.path is None:
+            return
+        payload = {
+            "version": self.version,
+            "built_at": self.built_at,
+            "resolutions": [r.to_json() for r in resolutions],
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    async def index_for(
+        self, sales: List[ProductSales], version: Optional[str]
+    ) -> Optional[SaleIndex]:
+        """The index of ``version``, resolved first if needed; None if that failed."""
+        task = self.ensure(sales, version)
+        if task is not None:
+            # Shielded: a cancelled caller does not stop the shared build
+            await asyncio.shield(task)
+        return self.index if self.ready and self.version == version else None
+
+    async def wait(self, timeout: float) -> None:
+        """Wait up to ``timeout`` seconds for a running build."""
+        if self.building:
+            await asyncio.wait({self._task}, timeout=timeout)
+
+    async def close(self) -> None:
+        if self.building:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "indexed_products": len(self.index),
+            "name_matched_sales": len(self.index.by_name),
+            "built_at": self.built_at,
+            "build_seconds": self.build_seconds,
+            "building": self.building,
+            "last_error": self.last_error,
+            "failed_at": self.failed_at,
+            "retry_at": self.retry_at,
+            **self.stats,
+        }
+
+
+if __name__ == "__main__":
+    # Resolve the current sales ahead of time, e.g. right after scraping, so the
+    # API workers load the saved index instead of searching themselves
+    from src.configuration import KASSAL_API_KEY
+    from src.sales_dao import get_sales_version, load_product_sales
+
+    async def main() -> None:
+        async with AsyncKassalAPI(token=KASSAL_API_KEY) as api:
+            resolver = SaleResolver(api)
+            await resolver.ensure(list(load_product_sales()), get_sales_version())
+        print(json.dumps(resolver.status(), indent=2))
+
+    asyncio.run(main())
@@ -1,49 +1,58 @@
-import json
-from typing import List, Union
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
 
-from pydantic import BaseModel
-
-from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+from src.sales_service import ProductSales
+from src.sales_store import SALES_DB_PATH, SalesStore
 
+# Sales were previously stored in this JSON file; it is imported into the sales
+# store the first time the store is opened empty.
 DB_SALES_PATH = "data/sales_data.json"
 
 
+@lru_cache(maxsize=1)
+def get_sales_store() -> SalesStore:
+    """Process-wide sales store, seeded from the legacy JSON file if empty."""
+    store = SalesStore(SALES_DB_PATH)
+    if store.is_empty() and Path(DB_SALES_PATH).exists():
+        imported = store.import_json(DB_SALES_PATH)
+        print(f"Imported {imported} sales pages from {DB_SALES_PATH}")
+    return store
+
+
 def save_product_sales(
     product_sales: Union[ProductSales, List[ProductSales]],
-    indent: int = 2,
 ) -> None:
-    # Ensure directory exists
-    file_path = Path(DB_SALES_PATH)
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Prepare raw JSON data
-    if isinstance(product_sales, list):
-        raw = [ps.model_dump_json() for ps in product_sales]
-    else:
-        raw = product_sales.model_dump_json()
-
-    # Write to file
-    with file_path.open("w", encoding="utf-8") as f:
-        if isinstance(raw, list):
-            # Join individual JSON strings into a JSON array
-            data = [json.loads(item) for item in raw]
-            json.dump(data, f, ensure_ascii=False, indent=indent)
-        else:
-            json.dump(json.loads(raw), f, ensure_ascii=False, indent=indent)
-
-
-def load_product_sales() -> Union[ProductSales, List[ProductSales]]:
-
-    file_path = Path(DB_SALES_PATH)
-    if not file_path.exists():
-        raise FileNotFoundError(f"File not found: {file_path}")
-
-    content = file_path.read_text(encoding="utf-8")
-    parsed = json.loads(content)
-
-    # Determine if it's a list or single object
-    if isinstance(parsed, list):
-        return [ProductSales.model_validate(item) for item in parsed]
-    else:
-        return ProductSales.model_validate(parsed)
+    """
+    Store the sales of the vendors present in ``product_sales``.
+
+    Each vendor gets a new snapshot replacing its previous sales; vendors not
+    present keep theirs.
+    """
+    if not isinstance(product_sales, list):
+        product_sales = [product_sales]
+    get_sales_store().upsert(product_sales)
+
+
+def save_vendor_sales(vendor: str, product_sales: List[ProductSales]) -> int:
+    """Replace the sales of one vendor, returning the new snapshot id."""
+    return get_sales_store().upsert_vendor(vendor, product_sales)
+
+
+def load_product_sales(
+    raw: bool = False,
+) -> Iterator[Union[ProductSales, Dict[str, Any]]]:
+    """
+    Stream the current sales of all vendors, page by page.
+
+    With ``raw`` the pages are the stored JSON as dicts, skipping the models.
+    """
+    store = get_sales_store()
+    if store.is_empty():
+        raise FileNotFoundError(f"No sales data in {store.path}")
+    return store.iter_sales(raw=raw)
+
+
+def get_sales_version() -> Optional[str]:
+    """Identifier of the current sales data, or None if there is none."""
+    return get_sales_store().version()
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from src.sale_matcher import SaleMatcher
+from src.sales_dao import get_sales_version, load_product_sales
+from src.sales_service import ProductSales
+
+
+@dataclass(frozen=True)
+class LoadedSales:
+    """A sales snapshot and the sale matcher built from it, swapped in together."""
+
+    sales: List[ProductSales] = field(default_factory=list)
+    matcher: SaleMatcher = field(default_factory=lambda: SaleMatcher([]))
+    version: Optional[str] = None
+    loaded_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+
+    @property
+    def items(self) -> int:
+        return sum(len(ps.products.products) for ps in self.sales)
+
+
+class SalesRegistry:
+    """
+    Process-wide holder of the sales data and its sale matcher.
+
+    A background task checks the sales version every ``check_interval`` seconds.
+    When a new snapshot appears it is loaded and indexed in a worker thread, off
+    the request path, and then swapped in as a single reference, so requests see
+    either the old or the new sales, never a mix. A snapshot that fails to load
+    leaves the previous one in place and is reported on the status endpoint
+    instead of silently disabling sale enrichment.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Iterable[ProductSales]] = load_product_sales,
+        version: Callable[[], Optional[str]] = get_sales_version,
+        check_interval: float = 30.0,
+    ) -> None:
+        self.loader = loader
+        self.version = version
+        self.check_interval = check_interval
+        self.current = LoadedSales()
+        self._listeners: List[Callable[[LoadedSales], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+
+        self.load_count = 0
+        self.last_check: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def on_reload(self, callback: Callable[[LoadedSales], None]) -> None:
+        """Register a callback run after new sales have been swapped in."""
+        self._listeners.append(callback)
+
+    def load(self) -> bool:
+        """
+        Load the current snapshot if it differs from the one being served.
+
+        Returns:
+            bool: Whether new sales were swapped in.
+        """
+        self.last_check = time.time()
+        try:
+            version = self.version()
+            if version == self.current.version:
+                return False
+            start = time.perf_counter()
+            sales = list(self.loader())
+            loaded = LoadedSales(
+                sales=sales,
+                matcher=SaleMatcher.from_sales(sales),
+                version=version,
+                loaded_at=time.time(),
+                load_seconds=time.perf_counter() - start,
+            )
+        except Exception as e:
+            # Only report a broken snapshot once, keep serving the last good one
+            if self.last_error != str(e):
+                print(f"Failed to load the sales data: {e}")
+            self.last_error = str(e)
+            return False
+        self.current = loaded
+        self.load_count += 1
+        self.last_error = None
+        return True
+
+    async def refresh(self) -> bool:
+        """Load new sales in a worker thread and notify the listeners."""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            reloaded = await asyncio.to_thread(self.load)
+        if reloaded:
+            for callback in self._listeners:
+                callback(self.current)
+        return reloaded
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.refresh()
+
+    def start(self) -> None:
+        """Start watching for new sales snapshots, from a running event loop."""
+        if self.check_interval and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._watch())
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        current = self.current
+        return {
+            "version": current.version,
+            "loaded_at": current.loaded_at,
+            "load_seconds": current.load_seconds,
+            "pages": len(current.sales),
+            "items": current.items,
+            "sale_names": len(current.matcher),
+            "load_count": self.load_count,
+            "last_check": self.last_check,
+            "check_interval": self.check_interval,
+            "watching": self._task is not None and not self._task.done(),
+            "last_error": self.last_error,
+        }
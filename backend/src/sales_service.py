@@ -1,16 +1,23 @@
 from pathlib import Path
-from typing import Literal, Optional, List
+from typing import Awaitable, Callable, Literal, Optional, List, Union
 from langchain_openai import ChatOpenAI
 from pydantic import BaseModel, Field
 
+import asyncio
 import base64
-from io import BytesIO
 from langchain_core.messages import HumanMessage
 from langchain_openai import ChatOpenAI
 
 from PIL import Image
 
 from src.configuration import OPENAI_API_KEY
+from src.image_preprocessing import (
+    DEFAULT_PREPROCESS,
+    PreprocessConfig,
+    encode_jpeg,
+    prepare_image,
+    preprocess_page,
+)
 
 
 class Sale(BaseModel):
@@ -47,52 +54,142 @@ class ProductSales(BaseModel):
     vendor: Optional[str] = Field(None, description="Vendor of the products")
 
 
-def convert_to_base64(pil_image):
+def convert_to_base64(pil_image, config: PreprocessConfig = DEFAULT_PREPROCESS):
     """
     Convert PIL images to Base64 encoded strings
 
     :param pil_image: PIL image
+    :param config: Downscaling, grayscale and JPEG quality options
     :return: Re-sized Base64 string
     """
 
-    buffered = BytesIO()
-    pil_image.save(buffered, format="JPEG")  # You can change the format if needed
-    img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
+    jpeg = encode_jpeg(prepare_image(pil_image, config), config)
+    img_str = base64.b64encode(jpeg).decode("utf-8")
     return img_str
 
 
+def _normalised_item_key(item: SalesItem) -> tuple:
+    return (" ".join(item.name.casefold().split()), item.sale.model_dump_json())
+
+
+def merge_tile_catalogs(catalogs: List[SalesCatalog]) -> SalesCatalog:
+    """
+    Combine the extractions of the tiles of one page, top to bottom.
+
+    A product in the overlap of two neighbouring tiles is extracted from both; an
+    item equal (by normalised name and sale) to one in the previous tile is
+    dropped.
+    """
+    merged: List[SalesItem] = []
+    previous_keys: set = set()
+    for catalog in catalogs:
+        keys = set()
+        for item in catalog.products:
+            key = _normalised_item_key(item)
+            if key not in previous_keys:
+                merged.append(item)
+            keys.add(key)
+        previous_keys = keys
+    return SalesCatalog(products=merged)
+
+
+EXTRACTION_MODEL = "gpt-4o-2024-08-06"
+EXTRACTION_PROMPT = "This is an image of a page from a promotional catalog containing multiple grocery products. For each product shown in the image, please extract: The product name and The price corresponding to that product"
+# Bump whenever the prompt, the SalesCatalog schema or the image encoding changes
+# in a way that changes extraction results; cached extractions are keyed on it.
+EXTRACTION_PROMPT_VERSION = "2"
+
+# Async callable turning one catalogue page into its sales. Extractors from
+# make_openai_extractor also carry the ``model_name`` and ``preprocess`` they use,
+# which ExtractionCache keys its entries on.
+Extractor = Callable[[Union[str, Path]], Awaitable[SalesCatalog]]
+
+
+def _build_extraction_messages(
+    images_path: Union[str, Path], config: PreprocessConfig = DEFAULT_PREPROCESS
+) -> List[HumanMessage]:
+    """One message per tile of the page, a single one if the page is not tiled."""
+    with Image.open(images_path) as pil_image:
+        tiles = preprocess_page(pil_image, config)
+    return [
+        _extraction_message(base64.b64encode(tile).decode("utf-8")) for tile in tiles
+    ]
+
+
+def _extraction_message(image_data: str) -> HumanMessage:
+    return HumanMessage(
+        content=[
+            {
+                "type": "text",
+                "text": EXTRACTION_PROMPT,
+            },
+            {
+                "type": "image_url",
+                "image_url": {"url": f"data:image/jpeg;base64,{image_data}"},
+            },
+        ],
+    )
+
+
+def _structured_extraction_model(
+    model_name: str = EXTRACTION_MODEL,
+    api_key: Optional[str] = OPENAI_API_KEY,
+    base_url: Optional[str] = None,
+):
+    model = ChatOpenAI(model=model_name, api_key=api_key, base_url=base_url)
+    return model.with_structured_output(SalesCatalog)
+
+
+def make_openai_extractor(
+    model_name: str = EXTRACTION_MODEL,
+    api_key: Optional[str] = OPENAI_API_KEY,
+    base_url: Optional[str] = None,
+    preprocess: PreprocessConfig = DEFAULT_PREPROCESS,
+) -> Extractor:
+    """
+    Create an async extractor backed by one shared ChatOpenAI client.
+
+    Args:
+        model_name: Vision model used for the extraction.
+        api_key: OpenAI API key.
+        base_url: Alternative OpenAI-compatible endpoint, e.g. a local fake.
+        preprocess: How pages are downscaled, encoded and tiled. The tiles of a
+            page are extracted concurrently and merged.
+
+    Returns:
+        Extractor: Coroutine function mapping an image path to a SalesCatalog.
+    """
+    model_with_structure = _structured_extraction_model(model_name, api_key, base_url)
+
+    async def extract(images_path: Union[str, Path]) -> SalesCatalog:
+        # Decoding and re-encoding the image is CPU work, keep it off the event loop
+        messages = await asyncio.to_thread(
+            _build_extraction_messages, images_path, preprocess
+        )
+        catalogs = await asyncio.gather(
+            *(model_with_structure.ainvoke([message]) for message in messages)
+        )
+        return merge_tile_catalogs(catalogs) if len(catalogs) > 1 else catalogs[0]
+
+    extract.model_name = model_name
+    extract.preprocess = preprocess
+    return extract
+
+
 def _extract_sales_from_images(
     images_paths: List[str], shop_name: list[str]
 ) -> List[ProductSales]:
     """
-    Extracts sales from a list of images.
-    This is a placeholder function and should be implemented with actual logic.
+    Extracts sales from a list of images, one page at a time.
+    See src.extraction_pipeline for the concurrent, resumable version.
     """
-    # Placeholder implementation
+    model_with_structure = _structured_extraction_model()
     products_on_sale = []
     for images_path in images_paths:
-
-        model = ChatOpenAI(
-            model="gpt-4o-2024-08-06",
-            api_key=OPENAI_API_KEY,
-        )
-        model_with_structure = model.with_structured_output(SalesCatalog)
-        pil_image = Image.open(images_path)
-        image_data = convert_to_base64(pil_image)
-
-        message = HumanMessage(
-            content=[
-                {
-                    "type": "text",
-                    "text": "This is an image of a page from a promotional catalog containing multiple grocery products. For each product shown in the image, please extract: The product name and The price corresponding to that product",
-                },
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{image_data}"},
-                },
-            ],
+        messages = _build_extraction_messages(images_path)
+        response: SalesCatalog = merge_tile_catalogs(
+            [model_with_structure.invoke([message]) for message in messages]
         )
-        response: SalesCatalog = model_with_structure.invoke([message])
         products_on_sale.append(response)
 
     # Add vendor information to products and create ProductSales objects
@@ -108,6 +205,18 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 DEFAULT_IMAGES_ROOT = ROOT_DIR / "data" / "downloaded_images"
 
 
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png")
+
+
+def find_vendor_images(vendor_dir: Path) -> List[Path]:
+    """Catalogue page images in a vendor folder, in file name order."""
+    return sorted(
+        p
+        for p in vendor_dir.iterdir()
+        if p.is_file() and p.suffix.lower() in IMAGE_SUFFIXES
+    )
+
+
 def get_all_sales_from_vendor(
     vendor: str,
     images_root: Path = DEFAULT_IMAGES_ROOT,
@@ -133,11 +242,7 @@ def get_all_sales_from_vendor(
     # Gather all valid image files
     # for p in vendor_dir.iterdir():
 
-    image_files = [
-        str(p)
-        for p in vendor_dir.iterdir()
-        if p.is_file() and p.suffix.lower() in (".jpg", ".jpeg", ".png")
-    ]
+    image_files = [str(p) for p in find_vendor_images(vendor_dir)]
     print(f"Image files found: {image_files}")
     if not image_files:
         raise FileNotFoundError(f"No images found in {vendor_dir}")
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from src.sales_service import ProductSales
+
+SALES_DB_PATH = "data/sales.sqlite3"
+
+
+def _validated_page(page: Union[ProductSales, Dict[str, Any]]) -> ProductSales:
+    """A page checked in full, so every stored page is valid JSON of ProductSales."""
+    if isinstance(page, ProductSales):
+        # Validating a model instance returns it unchecked, validate its data
+        page = page.model_dump()
+    return ProductSales.model_validate(page)
+
+
+class SalesStore:
+    """
+    Append-only store of the extracted sales, one snapshot per vendor scrape.
+
+    Writing a vendor's sales adds a new snapshot for that vendor and makes it
+    current; the other vendors and the earlier snapshots are left untouched, so
+    a scrape can be rolled back. Each page is stored as its own JSON row, so
+    loading streams the pages one by one instead of parsing one large file.
+    Pages are validated in full once, when they are written.
+
+    The order of vendors is the order in which they were first written, and the
+    pages keep their order within a snapshot, so matching sale names by
+    position behaves like it did with the JSON file.
+    """
+
+    def __init__(self, path: Union[str, Path] = SALES_DB_PATH) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, vendor TEXT NOT NULL, "
+                "created_at REAL NOT NULL, pages INTEGER NOT NULL, "
+                "items INTEGER NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "snapshot_id INTEGER NOT NULL, position INTEGER NOT NULL, "
+                "payload TEXT NOT NULL, PRIMARY KEY (snapshot_id, position));"
+                "CREATE TABLE IF NOT EXISTS current ("
+                "vendor TEXT PRIMARY KEY, snapshot_id INTEGER NOT NULL);"
+            )
+
+    def upsert_vendor(self, vendor: str, sales: Iterable[ProductSales]) -> int:
+        """
+        Replace the current sales of one vendor.
+
+        Args:
+            vendor (str): The vendor the pages belong to.
+            sales (Iterable[ProductSales]): The vendor's pages, in order.
+
+        Returns:
+            int: The id of the new snapshot.
+        """
+        pages = [_validated_page(ps) for ps in sales]
+        items = sum(len(ps.products.products) for ps in pages)
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO snapshots (vendor, created_at, pages, items) "
+                "VALUES (?, ?, ?, ?)",
+                (vendor, time.time(), len(pages), items),
+            )
+            snapshot_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?)",
+                (
+                    (snapshot_id, position, ps.model_dump_json())
+                    for position, ps in enumerate(pages)
+                ),
+            )
+            self._set_current(vendor, snapshot_id)
+        return snapshot_id
+
+    def upsert(self, sales: Iterable[ProductSales]) -> Dict[str, int]:
+        """Write pages of several vendors, one new snapshot per vendor."""
+        by_vendor: Dict[str, List[ProductSales]] = {}
+        for ps in sales:
+            by_vendor.setdefault(ps.vendor or "", []).append(ps)
+        return {
+            vendor: self.upsert_vendor(vendor, pages)
+            for vendor, pages in by_vendor.items()
+        }
+
+    def _set_current(self, vendor: str, snapshot_id: int) -> None:
+        # Updating in place keeps the row, and so the vendor's position
+        self._conn.execute(
+            "INSERT INTO current VALUES (?, ?) "
+            "ON CONFLICT (vendor) DO UPDATE SET snapshot_id = excluded.snapshot_id",
+            (vendor, snapshot_id),
+        )
+
+    def rollback(self, vendor: str, snapshot_id: int) -> None:
+        """Make an earlier snapshot of a vendor current again."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT vendor FROM snapshots WHERE id = ?", (snapshot_id,)
+            ).fetchone()
+            if row is None or row[0] != vendor:
+                raise ValueError(f"No snapshot {snapshot_id} for vendor {vendor!r}")
+            self._set_current(vendor, snapshot_id)
+
+    def prune(self, keep: int = 3) -> int:
+        """
+        Delete all but the ``keep`` newest snapshots of each vendor.
+
+        The current snapshot is always kept. Returns the number deleted.
+        """
+        with self._lock, self._conn:
+            stale = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM ("
+                    "SELECT id, ROW_NUMBER() OVER "
+                    "(PARTITION BY vendor ORDER BY id DESC) AS age FROM snapshots) "
+                    "WHERE age > ? AND id NOT IN (SELECT snapshot_id FROM current)",
+                    (keep,),
+                )
+            ]
+            self._conn.executemany(
+                "DELETE FROM pages WHERE snapshot_id = ?", ((i,) for i in stale)
+            )
+            self._conn.executemany(
+                "DELETE FROM snapshots WHERE id = ?", ((i,) for i in stale)
+            )
+        return len(stale)
+
+    def iter_sales(
+        self, raw: bool = False
+    ) -> Iterator[Union[ProductSales, Dict[str, Any]]]:
+        """
+        Stream the current pages of all vendors.
+
+        Args:
+            raw (bool): Yield the stored JSON of each page as a dict instead of
+                a ProductSales model, for callers that only read the values.
+
+        Returns:
+            Iterator[Union[ProductSales, Dict[str, Any]]]: The pages, in order.
+        """
+        # A connection of its own reads one consistent snapshot of the database
+        # and lets writers carry on while the caller consumes the pages
+        conn = sqlite3.connect(str(self.path))
+        try:
+            rows = conn.execute(
+                "SELECT pages.payload FROM current "
+                "JOIN pages ON pages.snapshot_id = current.snapshot_id "
+                "ORDER BY current.rowid, pages.position"
+            )
+            for (payload,) in rows:
+                if raw:
+                    yield json.loads(payload)
+                else:
+                    # The pages were validated when written. Building the
+                    # models in pydantic-core is still about 3x faster than
+                    # json.loads followed by nested model_construct calls.
+                    yield ProductSales.model_validate_json(payload)
+        finally:
+            conn.close()
+
+    def version(self) -> Optional[str]:
+        """Identifier of the current sales, or None if nothing was written yet."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vendor, snapshot_id FROM current ORDER BY rowid"
+            ).fetchall()
+        if not rows:
+            return None
+        payload = ",".join(f"{vendor}:{snapshot}" for vendor, snapshot in rows)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+    def vendors(self) -> List[Dict[str, Any]]:
+        """The current snapshot of every vendor."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT current.vendor, snapshots.id, snapshots.created_at, "
+                "snapshots.pages, snapshots.items FROM current "
+                "JOIN snapshots ON snapshots.id = current.snapshot_id "
+                "ORDER BY current.rowid"
+            ).fetchall()
+        return [
+            {
+                "vendor": vendor,
+                "snapshot": snapshot,
+                "created_at": created_at,
+                "pages": pages,
+                "items": items,
+            }
+            for vendor, snapshot, created_at, pages, items in rows
+        ]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute("SELECT 1 FROM current LIMIT 1").fetchone() is None
+            )
+
+    def import_json(self, path: Union[str, Path]) -> int:
+        """
+        Import a sales JSON file in the format previously written by sales_dao.
+
+        Returns:
+            int: The number of pages imported.
+        """
+        parsed = json.loads(Path(path).read_text(encoding="utf-8"))
+        pages = [
+            ProductSales.model_validate(item)
+            for item in (parsed if isinstance(parsed, list) else [parsed])
+        ]
+        self.upsert(pages)
+        return len(pages)
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or maintain the sales store")
+    parser.add_argument("command", choices=["vendors", "prune", "rollback"])
+    parser.add_argument("--keep", type=int, default=3, help="Snapshots kept by prune")
+    parser.add_argument("--vendor", help="Vendor to roll back")
+    parser.add_argument("--snapshot", type=int, help="Snapshot to roll back to")
+    args = parser.parse_args()
+
+    store = SalesStore()
+    if args.command == "prune":
+        print(f"Deleted {store.prune(args.keep)} snapshots")
+    elif args.command == "rollback":
+        if args.vendor is None or args.snapshot is None:
+            parser.error("rollback needs --vendor and --snapshot")
+        store.rollback(args.vendor, args.snapshot)
+    for vendor in store.vendors():
+        print(vendor)
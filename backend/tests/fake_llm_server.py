@@ -0,0 +1,158 @@
+"""
+A local stand-in for the OpenAI chat completions endpoint.
+
+Answers structured-output requests (JSON schema response format or a function
+call) with a SalesCatalog built by ``responder``, after an artificial latency.
+It counts the images it received and reports how many it handled per second.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _default_responder(request: Dict[str, Any], number: int) -> Dict[str, Any]:
+    return {
+        "products": [
+            {"name": f"Vare {number}", "sale": {"type": "price", "price": float(number)}}
+        ]
+    }
+
+
+def request_images(request: Dict[str, Any]) -> List[str]:
+    """The data URLs of all images in a chat completions request."""
+    return [
+        part["image_url"]["url"]
+        for message in request.get("messages", [])
+        if isinstance(message.get("content"), list)
+        for part in message["content"]
+        if part.get("type") == "image_url"
+    ]
+
+
+class FakeLLMServer:
+    """
+    Threaded HTTP server speaking enough of the OpenAI API for ChatOpenAI.
+
+    Usage:
+        with FakeLLMServer(latency=0.2) as server:
+            extractor = make_openai_extractor(api_key="fake", base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        responder: Optional[Callable[[Dict[str, Any], int], Dict[str, Any]]] = None,
+        fail_images: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.responder = responder or _default_responder
+        self.fail_images = fail_images
+        self.requests: List[Dict[str, Any]] = []
+        self.images = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def images_per_second(self) -> float:
+        if not self.images or self._first is None or self._last == self._first:
+            return 0.0
+        return self.images / (self._last - self._first)
+
+    def start(self) -> "FakeLLMServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _completion(self, request: Dict[str, Any], number: int) -> Dict[str, Any]:
+        arguments = json.dumps(self.responder(request, number), ensure_ascii=False)
+        message: Dict[str, Any] = {"role": "assistant", "content": arguments}
+        finish_reason = "stop"
+        if request.get("tools"):
+            name = request["tools"][0]["function"]["name"]
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [
+                    {
+                        "id": f"call_{number}",
+                        "type": "function",
+                        "function": {"name": name, "arguments": arguments},
+                    }
+                ],
+            }
+            finish_reason = "tool_calls"
+        return {
+            "id": f"chatcmpl-{number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [
+                {"index": 0, "message": message, "finish_reason": finish_reason}
+            ],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                with server._lock:
+                    server.requests.append(request)
+                    number = len(server.requests)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    fail = number <= server.fail_images
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    if fail:
+                        status, payload = 400, {"error": {"message": "bad image"}}
+                    else:
+                        status, payload = 200, server._completion(request, number)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                        if not fail:
+                            server.images += len(request_images(request))
+                            now = time.perf_counter()
+                            server._first = server._first or now - server.latency
+                            server._last = now
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,273 @@
+"""
+A local stand-in for the Kassal API, used by the client tests and benchmarks.
+
+Serves /products, /products/id/{id}, /products/ean/{ean}, /physical-stores and
+/physical-stores/{id} from an in-memory catalogue over HTTP/1.1 with keep-alive, with optional
+artificial latency and queued error responses. It records every request, the
+number of distinct client connections and the peak number of requests in flight.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+
+def _store(code: str) -> Dict[str, Any]:
+    name = code.split("_")[0].title()
+    return {
+        "name": name,
+        "code": code,
+        "url": f"https://{name.lower()}.no",
+        "logo": f"https://example.com/{name.lower()}.png",
+    }
+
+
+def product_json(
+    product_id: int, name: str, store: str = "MENY_NO", ean: Optional[str] = None
+) -> Dict[str, Any]:
+    return {
+        "id": product_id,
+        "name": name,
+        "brand": None,
+        "vendor": None,
+        "ean": ean or str(7_000_000_000_000 + product_id),
+        "url": f"https://example.com/products/{product_id}",
+        "image": f"https://example.com/images/{product_id}.png",
+        "description": None,
+        "ingredients": None,
+        "current_price": 10.0 + product_id % 50,
+        "current_unit_price": None,
+        "weight": None,
+        "weight_unit": None,
+        "store": _store(store),
+        "price_history": [],
+        "allergens": [],
+        "nutrition": [],
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-02T00:00:00Z",
+    }
+
+
+def ean_json(ean: str, products: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """The /products/ean/{ean} answer for the given product_json listings."""
+    per_product = ("ean", "current_unit_price", "allergens", "nutrition")
+    listings = []
+    for product in products:
+        listing = {k: v for k, v in product.items() if k not in per_product}
+        listing["current_price"] = {
+            "price": product["current_price"],
+            "unit_price": product["current_unit_price"],
+            "date": product["updated_at"],
+        }
+        listing["kassalapp"] = {"url": product["url"], "opengraph": None}
+        listings.append(listing)
+    return {"ean": ean, "products": listings, "allergens": [], "nutrition": []}
+
+
+def store_json(store_id: int, name: str, group: str = "MENY_NO") -> Dict[str, Any]:
+    return {
+        "id": store_id,
+        "group": group,
+        "name": name,
+        "address": "Storgata 1, 0155 Oslo",
+        "phone": "22 00 00 00",
+        "email": f"store{store_id}@example.com",
+        "fax": "22 00 00 01",
+        "logo": "https://example.com/logo.svg",
+        "website": None,
+        "detailUrl": f"https://example.com/stores/{store_id}",
+        "position": {"lat": "59.9", "lng": "10.7"},
+        "openingHours": {
+            day: "07:00-22:00"
+            for day in (
+                "monday",
+                "tuesday",
+                "wednesday",
+                "thursday",
+                "friday",
+                "saturday",
+                "sunday",
+            )
+        },
+    }
+
+
+def _page(items: List[dict], path: str, page: int, size: int) -> Dict[str, Any]:
+    start = (page - 1) * size
+    data = items[start : start + size]
+    last_page = max(1, -(-len(items) // size))
+    return {
+        "data": data,
+        "links": {
+            "first": f"{path}?page=1",
+            "last": f"{path}?page={last_page}",
+            "prev": f"{path}?page={page - 1}" if page > 1 else None,
+            "next": f"{path}?page={page + 1}" if page < last_page else None,
+        },
+        "meta": {
+            "current_page": page,
+            "from": start + 1 if data else 0,
+            "last_page": last_page,
+            "links": [],
+            "path": path,
+            "per_page": size,
+            "to": start + len(data),
+            "total": len(items),
+        },
+    }
+
+
+class FakeKassalServer:
+    """
+    Threaded HTTP server that answers like the Kassal API.
+
+    Products are given by id as a name, or as (name, store code, EAN) to serve
+    listings of the same product in several stores.
+
+    Usage:
+        with FakeKassalServer(latency=0.01) as server:
+            api = AsyncKassalAPI(token="t", base_url=server.base_url)
+    """
+
+    def __init__(
+        self,
+        products: Optional[Dict[int, Union[str, Tuple[str, str, str]]]] = None,
+        stores: Optional[Dict[int, str]] = None,
+        latency: float = 0.0,
+    ) -> None:
+        self.products = products or {i: f"Product {i}" for i in range(1, 101)}
+        self.stores = stores or {i: f"Store {i}" for i in range(1, 21)}
+        self.latency = latency
+        # Overrides of the products' updated_at, by id; date_desc sorts by it
+        self.updated_at: Dict[int, str] = {}
+
+        self.requests: List[Tuple[str, Dict[str, str]]] = []
+        self.connections: set = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._errors: Deque[Tuple[int, Dict[str, str]]] = deque()
+        self._lock = threading.Lock()
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1/"
+
+    def fail_next(
+        self, status: int, count: int = 1, headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Answer the next ``count`` requests with ``status`` instead of data."""
+        with self._lock:
+            self._errors.extend([(status, headers or {})] * count)
+
+    def start(self) -> "FakeKassalServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeKassalServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _product(self, product_id: int) -> Dict[str, Any]:
+        product = self.products[product_id]
+        if isinstance(product, str):
+            listing = product_json(product_id, product)
+        else:
+            listing = product_json(product_id, *product)
+        if product_id in self.updated_at:
+            listing["updated_at"] = self.updated_at[product_id]
+        return listing
+
+    def _route(self, path: str, query: Dict[str, str]) -> Tuple[int, Any]:
+        parts = path.strip("/").split("/")[2:]  # drop "api/v1"
+        page = int(query.get("page", 1))
+        size = int(query.get("size", 10))
+        if parts == ["products"]:
+            search = query.get("search", "").lower()
+            items = [
+                self._product(pid)
+                for pid in self.products
+                if search in self._product(pid)["name"].lower()
+            ]
+            if query.get("sort") == "date_desc":
+                items.sort(key=lambda p: p["updated_at"], reverse=True)
+            return 200, _page(items, path, page, size)
+        if len(parts) == 3 and parts[:2] == ["products", "id"]:
+            pid = int(parts[2])
+            if pid not in self.products:
+                return 404, {"message": "Not found"}
+            return 200, {"data": self._product(pid)}
+        if len(parts) == 3 and parts[:2] == ["products", "ean"]:
+            listings = [self._product(pid) for pid in self.products]
+            listings = [p for p in listings if p["ean"] == parts[2]]
+            if not listings:
+                return 404, {"message": "Not found"}
+            return 200, {"data": ean_json(parts[2], listings)}
+        if parts == ["physical-stores"]:
+            items = [store_json(sid, name) for sid, name in self.stores.items()]
+            return 200, _page(items, path, page, size)
+        if len(parts) == 2 and parts[0] == "physical-stores":
+            sid = int(parts[1])
+            if sid not in self.stores:
+                return 404, {"message": "Not found"}
+            return 200, {"data": store_json(sid, self.stores[sid])}
+        return 404, {"message": "Not found"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; don't let Nagle delay the body
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                url = urlparse(self.path)
+                query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                with server._lock:
+                    server.requests.append((url.path, query))
+                    server.connections.add(self.client_address)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    error = server._errors.popleft() if server._errors else None
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    headers: Dict[str, str] = {}
+                    if error is not None:
+                        status, headers = error
+                        payload: Any = {"message": "error"}
+                    else:
+                        status, payload = server._route(url.path, query)
+                finally:
+                    # Leave the in-flight count before replying, so a client that
+                    # sends its next request straight away is not counted twice
+                    with server._lock:
+                        server.in_flight -= 1
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_physical_stores import PhysicalStoresResponse
+from src.kassal.models_products import ProductsResponse
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+@pytest.fixture
+def server():
+    with FakeKassalServer() as fake:
+        yield fake
+
+
+def test_get_products_and_stores(server: FakeKassalServer):
+    async def run():
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            products = await api.get_products(search="product 1", size=5)
+            stores = await api.get_physical_stores(page=2, size=5)
+            product = await api.get_product_by_id(42)
+            return products, stores, product
+
+    products, stores, product = asyncio.run(run())
+    assert isinstance(products, ProductsResponse)
+    assert [p.name for p in products.data] == [f"Product {i}" for i in (1, 10, 11, 12, 13)]
+    assert isinstance(stores, PhysicalStoresResponse)
+    assert [s.id for s in stores.data] == [6, 7, 8, 9, 10]
+    assert product.id == 42
+    assert server.requests[0] == (
+        "/api/v1/products",
+        {"search": "product 1", "page": "1", "size": "5"},
+    )
+
+
+def test_connections_are_reused(server: FakeKassalServer):
+    async def run():
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            for product_id in range(1, 21):
+                await api.get_product_by_id(product_id)
+
+    asyncio.run(run())
+    assert len(server.requests) == 20
+    assert len(server.connections) == 1
+
+
+def test_concurrency_limit_is_respected():
+    async def run(server: FakeKassalServer):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, max_concurrency=4, rate_limit=None
+        ) as api:
+            await asyncio.gather(*(api.get_product_by_id(i) for i in range(1, 21)))
+
+    with FakeKassalServer(latency=0.05) as server:
+        asyncio.run(run(server))
+    assert len(server.requests) == 20
+    assert 1 < server.max_in_flight <= 4
+
+
+def test_errors(server: FakeKassalServer):
+    async def run():
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None, max_retries=0
+        ) as api:
+            server.fail_next(429)
+            with pytest.raises(Exception, match="Rate limit exceeded"):
+                await api.get_products()
+            with pytest.raises(Exception, match="404"):
+                await api.get_product_by_id(9999)
+            with pytest.raises(ValueError):
+                await api.get_physical_stores(lat=59.9)
+
+    asyncio.run(run())
+    # The invalid store query is rejected before anything is sent
+    assert len(server.requests) == 2
+
+
+def test_batch_lookups_dedupe_and_report_errors_per_item(server: FakeKassalServer):
+    async def run():
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            products = await api.get_products_by_ids([3, 999, 1, 3])
+            eans = await api.get_products_by_eans(["7000000000002", "123"])
+            return products, eans
+
+    products, eans = asyncio.run(run())
+    assert list(products) == [3, 999, 1]
+    assert products[3].id == 3 and products[1].id == 1
+    assert isinstance(products[999], Exception)
+    assert [p.id for p in eans["7000000000002"].products] == [2]
+    assert isinstance(eans["123"], Exception)
+    assert len(server.requests) == 5
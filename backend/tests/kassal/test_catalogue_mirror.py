@@ -0,0 +1,45 @@
+import asyncio
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.catalogue_mirror import CatalogueMirror
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+PRODUCTS = {i: f"Product {i}" for i in range(1, 26)}
+PRODUCTS.update({4: "Tine Helmelk 1l", 7: "Tine Lettmelk 1l", 9: "Grandiosa Original"})
+
+
+def test_crawls_incrementally_and_answers_searches(tmp_path):
+    mirror = CatalogueMirror(tmp_path / "mirror.sqlite3")
+
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            assert mirror.search(search="tine") is None  # Nothing crawled yet
+
+            # An interrupted first crawl resumes where it stopped
+            assert await mirror.crawl(api, max_pages=2, page_size=10) == 2
+            assert not mirror.complete
+            assert await mirror.crawl(api, page_size=10) == 1
+            assert mirror.complete
+
+            # Only the page with the products updated since is fetched again
+            server.products[9] = "Grandiosa Pepperoni"
+            server.updated_at[9] = "2024-03-01T00:00:00Z"
+            server.requests.clear()
+            assert await mirror.crawl(api, page_size=10) == 1
+            assert server.requests[0][1]["sort"] == "date_desc"
+
+    with FakeKassalServer(products=PRODUCTS) as server:
+        asyncio.run(run(server))
+
+    assert mirror.stats()["products"] == 25
+    result = mirror.search(search="Tine", sort="price_desc", size=1)
+    assert [p.name for p in result.data] == ["Tine Lettmelk 1l"]
+    assert result.meta.total == 2 and result.meta.last_page == 2
+    assert result.links.next == "/products?page=2&size=1"
+    assert [p.id for p in mirror.search(search="tin", price_max=14).data] == [4]
+    assert [p.id for p in mirror.search(search="pepperoni").data] == [9]
+    assert mirror.search(search="original") is None  # A miss goes to the live API
+    assert mirror.search(page=3, size=10).meta.to == 25
+    assert mirror.search(search="tine", unique=True) is None
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta, timezone
+
+from src.kassal.models_products import Product
+from src.kassal.price_history import PriceHistoryStore
+from tests.kassal.fake_kassal_server import product_json
+
+NOW = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def product(product_id, prices):
+    """A product with the given (days ago, price) history."""
+    data = product_json(product_id, f"Product {product_id}")
+    data["price_history"] = [
+        {"price": price, "date": (NOW - timedelta(days=days)).isoformat()}
+        for days, price in prices
+    ]
+    return Product.model_validate(data)
+
+
+def test_window_stats_discounts_and_drops(tmp_path):
+    store = PriceHistoryStore(tmp_path / "prices.sqlite3")
+    products = [
+        # Steady at 30, then down to 25: a real discount and a drop
+        product(1, [(60, 30.0), (20, 30.0), (2, 25.0)]),
+        # Raised to 40 just before a "sale" at 35: not below the 30-day low
+        product(2, [(60, 30.0), (10, 40.0), (3, 35.0)]),
+        # Unchanged for months
+        product(3, [(90, 19.9)]),
+    ]
+    assert store.record(products) == 7
+    assert store.record(products) == 0  # Already known
+
+    now = NOW.timestamp()
+    stats = store.window_stats(days=30, now=now)
+    assert stats.loc[1, "min"] == 25.0 and stats.loc[1, "max"] == 30.0
+    assert stats.loc[2, "median"] == 35.0 and stats.loc[2, "current"] == 35.0
+    assert stats.loc[3, "observations"] == 1  # The price carried into the window
+
+    discounts = store.discounts(days=30)
+    assert discounts.loc[1, "real_discount"]
+    assert round(discounts.loc[1, "discount_pct"], 1) == 16.7
+    assert not discounts.loc[2, "real_discount"]
+    assert discounts.loc[2, "reference_low"] == 30.0
+    assert not discounts.loc[3, "real_discount"]
+
+    drops = store.price_drops(days=7, min_drop_pct=10, now=now)
+    assert list(drops.index) == [1, 2]
+    assert list(store.price_drops(days=7, product_ids=[2], now=now).index) == [2]
+
+    # New observations reach the loaded frame, and survive a restart
+    store.record([product(3, [(90, 19.9), (1, 14.9)])])
+    assert store.discounts(product_ids=[3]).loc[3, "real_discount"]
+    store.close()
+    reopened = PriceHistoryStore(tmp_path / "prices.sqlite3")
+    assert len(reopened.frame()) == 8 and reopened.names[3] == "Product 3"
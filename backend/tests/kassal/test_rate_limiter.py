@@ -0,0 +1,102 @@
+import asyncio
+import random
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.rate_limiter import (
+    BACKGROUND,
+    INTERACTIVE,
+    TokenBucketLimiter,
+    background_priority,
+    backoff_delay,
+    parse_retry_after,
+)
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+def test_bucket_queues_callers_at_the_refill_rate():
+    async def run():
+        limiter = TokenBucketLimiter(rate=20, per=1.0, burst=2)
+        start = time.monotonic()
+        await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+        return limiter, time.monotonic() - start
+
+    limiter, elapsed = asyncio.run(run())
+    # Two tokens are available immediately, the other four refill at 20/s
+    assert 0.18 <= elapsed < 0.5
+    assert limiter.granted == 6
+    assert limiter.max_queue_depth == 4
+    assert limiter.queue_depth == 0
+
+
+def test_interactive_calls_are_served_before_background_calls():
+    async def run():
+        limiter = TokenBucketLimiter(rate=50, per=1.0, burst=1)
+        await limiter.acquire()
+        order = []
+
+        async def call(name, priority=None):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        with background_priority():
+            background = [asyncio.create_task(call(f"bulk-{i}")) for i in range(3)]
+        await asyncio.sleep(0)
+        await asyncio.gather(*background, call("user", INTERACTIVE))
+        return limiter, order
+
+    limiter, order = asyncio.run(run())
+    assert order == ["user", "bulk-0", "bulk-1", "bulk-2"]
+    metrics = limiter.metrics()
+    assert metrics["wait"]["background"]["count"] == 3
+    assert metrics["wait"]["interactive"]["count"] == 2
+
+
+def test_client_retries_after_429():
+    async def run(server, max_retries):
+        # A fast bucket, so the waits come from Retry-After alone
+        async with AsyncKassalAPI(
+            token="dummy",
+            base_url=server.base_url,
+            rate_limit=60_000,
+            max_retries=max_retries,
+        ) as api:
+            try:
+                return await api.get_products(size=1), api.metrics()
+            except Exception as e:
+                return e, api.metrics()
+
+    with FakeKassalServer() as server:
+        server.fail_next(429, count=2, headers={"Retry-After": "0.1"})
+        start = time.monotonic()
+        result, metrics = asyncio.run(run(server, max_retries=3))
+        assert len(result.data) == 1
+        assert time.monotonic() - start >= 0.2
+        assert metrics["requests"] == 3
+        assert metrics["retries"] == 2
+
+        server.fail_next(429, count=2, headers={"Retry-After": "0"})
+        result, metrics = asyncio.run(run(server, max_retries=1))
+        assert "Rate limit exceeded" in str(result)
+        assert metrics["rate_limited"] == 2
+
+
+def test_retry_after_and_backoff():
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 01 Jan 2025 12:00:30 GMT", now) == 30.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+    rng = random.Random(0)
+    for attempt in range(8):
+        delay = backoff_delay(attempt, base=1.0, cap=10.0, rng=rng)
+        expected = min(10.0, 2**attempt)
+        assert expected / 2 <= delay <= expected
+
+    with pytest.raises(ValueError):
+        TokenBucketLimiter(rate=0)
+    assert BACKGROUND > INTERACTIVE
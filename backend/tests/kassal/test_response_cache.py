@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.cache import (
+    MemoryCacheBackend,
+    ResponseCache,
+    SQLiteCacheBackend,
+    make_response_cache,
+)
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+def test_key_is_normalised():
+    assert ResponseCache.key("products/id/1") == "products/id/1?"
+    assert ResponseCache.key(
+        "/products/find-by-url/single", {"url": " https://x.no/a ", "b": None}
+    ) == ResponseCache.key("products/find-by-url/single", {"url": "https://x.no/a"})
+    assert ResponseCache.key("p", {"b": 2, "a": 1}) == ResponseCache.key(
+        "p", {"a": "1", "b": "2"}
+    )
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_backends_expire_and_evict_least_recently_used(kind, tmp_path):
+    # Each value is 8 bytes of JSON, so two fit
+    if kind == "memory":
+        backend = MemoryCacheBackend(max_bytes=16)
+    else:
+        backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_bytes=16)
+
+    backend.set("a", {"v": 1}, ttl=60)
+    backend.set("b", {"v": 2}, ttl=60)
+    time.sleep(0.01)
+    assert backend.get("a") == {"v": 1}  # "b" is now least recently used
+    time.sleep(0.01)
+    backend.set("c", {"v": 3}, ttl=60)
+    assert backend.get("b") is None
+    assert backend.get("a") == {"v": 1}
+    assert backend.evictions == 1
+    assert (len(backend), backend.nbytes) == (2, 16)
+
+    backend.set("d", {"v": 4}, ttl=0.05)
+    time.sleep(0.1)
+    assert backend.get("d") is None
+
+    if kind == "sqlite":
+        backend.close()
+        reopened = SQLiteCacheBackend(tmp_path / "cache.sqlite3")
+        assert reopened.get("a") == {"v": 1}
+        assert reopened.nbytes == 8 * len(reopened)
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_backends_are_bounded_by_bytes(kind, tmp_path):
+    if kind == "memory":
+        backend = MemoryCacheBackend(max_bytes=1000)
+    else:
+        backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3", max_bytes=1000)
+
+    for i in range(50):
+        backend.set(f"small-{i}", {"v": i}, ttl=60)
+    backend.set("large", {"history": "x" * 600}, ttl=60)
+    assert backend.nbytes <= 1000
+    assert backend.get("large") is not None
+    assert backend.get("small-0") is None and backend.get("small-49") is not None
+
+    # A response larger than the whole cache is not stored
+    backend.set("huge", {"history": "x" * 2000}, ttl=60)
+    assert backend.get("huge") is None
+    assert backend.nbytes <= 1000
+
+
+def test_sqlite_backend_runs_off_the_event_loop(tmp_path):
+    backend = SQLiteCacheBackend(tmp_path / "cache.sqlite3")
+    threads = []
+    for name in ("get", "set"):
+        method = getattr(backend, name)
+
+        def record(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        setattr(backend, name, record)
+    cache = ResponseCache(backend)
+
+    async def fetch():
+        return {"id": 1}
+
+    async def run():
+        await cache.get_or_fetch("products/id/1", None, fetch)
+        return await cache.get_or_fetch("products/id/1", None, fetch)
+
+    assert asyncio.run(run()) == {"id": 1}
+    assert len(threads) == 3
+    assert threading.get_ident() not in threads
+
+
+def test_client_coalesces_misses_and_caches_lookups_only():
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy",
+            base_url=server.base_url,
+            rate_limit=None,
+            max_retries=0,
+            cache=make_response_cache("memory"),
+        ) as api:
+            products = await asyncio.gather(
+                *(api.get_product_by_id(1) for _ in range(10))
+            )
+            assert len({id(p) for p in products}) == 10
+            await api.get_product_by_id(1)
+            await api.get_products(search="product")
+            await api.get_products(search="product")
+            for _ in range(2):
+                with pytest.raises(Exception, match="404"):
+                    await api.get_product_by_id(9999)
+            return api.cache.stats()
+
+    with FakeKassalServer(latency=0.05) as server:
+        stats = asyncio.run(run(server))
+
+    paths = [path for path, _ in server.requests]
+    assert paths.count("/api/v1/products/id/1") == 1
+    assert paths.count("/api/v1/products") == 2
+    assert paths.count("/api/v1/products/id/9999") == 2
+    product_stats = stats["endpoints"]["products/id/"]
+    assert (product_stats["hits"], product_stats["coalesced"]) == (1, 9)
+    assert product_stats["misses"] == 3
+    assert stats["entries"] == 1
@@ -0,0 +1,73 @@
+import asyncio
+import random
+
+import numpy as np
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_physical_stores import PhysicalStore
+from src.kassal.store_index import StoreDirectory, StoreIndex, haversine_km
+from tests.kassal.fake_kassal_server import FakeKassalServer, store_json
+
+
+def random_stores(n, seed=0):
+    rng = random.Random(seed)
+    stores = []
+    for store_id in range(1, n + 1):
+        data = store_json(
+            store_id, f"Store {store_id}", rng.choice(["MENY_NO", "KIWI", "REMA_1000"])
+        )
+        data["position"] = {"lat": rng.uniform(58, 71), "lng": rng.uniform(4, 31)}
+        stores.append(PhysicalStore.model_validate(data))
+    return stores
+
+
+def test_radius_and_nearest_match_brute_force():
+    stores = random_stores(2000)
+    index = StoreIndex(stores)
+    lats = np.array([s.position.lat for s in stores])
+    lngs = np.array([s.position.lng for s in stores])
+    rng = random.Random(1)
+    for _ in range(20):
+        lat, lng = rng.uniform(58, 71), rng.uniform(4, 31)
+        distances = haversine_km(lat, lng, lats, lngs)
+
+        found = index.within(lat, lng, 40)
+        expected = sorted(i for i in range(len(stores)) if distances[i] <= 40)
+        assert sorted(s.id - 1 for s, _ in found) == expected
+        assert [d for _, d in found] == sorted(d for _, d in found)
+
+        nearest = index.nearest(lat, lng, 5, group="KIWI")
+        kiwi = [i for i in np.argsort(distances) if stores[i].group == "KIWI"][:5]
+        assert [s.id - 1 for s, _ in nearest] == kiwi
+
+    assert index.nearest(60, 10, 3, max_km=0.001) == []
+    assert [s.id for s in index.filter(search="store 12")][:2] == [12, 120]
+
+
+def test_syncs_all_pages_and_serves_queries(tmp_path):
+    path = tmp_path / "stores.json"
+    directory = StoreDirectory(None, path=str(path), page_size=10)
+    assert directory.search(lat=59.9, lng=10.7) is None  # Nothing synced yet
+
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            directory.api = api
+            await directory.sync()
+            return len(server.requests)
+
+    stores = {i: f"Meny {i}" for i in range(1, 26)}
+    with FakeKassalServer(stores=stores) as server:
+        assert asyncio.run(run(server)) == 3
+
+    result = directory.search(lat=59.9, lng=10.7, km=1, size=10, page=3)
+    assert [s.id for s in result.data] == [21, 22, 23, 24, 25]
+    assert result.meta.total == 25 and result.links.next is None
+    assert directory.search(search="meny 7").meta.total == 1
+    assert directory.search(lat=62.0, lng=10.7, km=1).meta.total == 0
+    assert directory.get(7).name == "Meny 7"
+
+    # A restarted worker serves the saved stores without syncing
+    restarted = StoreDirectory(None, path=str(path))
+    assert restarted.load() and restarted.status()["stores"] == 25
@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.recommenders.calorie_index import CalorieIndex
+
+
+def _mask_rows(calories, goal, tolerance):
+    """The boolean-mask scan the index replaces."""
+    return np.flatnonzero((calories >= goal - tolerance) & (calories <= goal + tolerance))
+
+
+def test_windows_match_boolean_mask():
+    rng = np.random.default_rng(42)
+    calories = rng.gamma(2.0, 200.0, size=5_000).round(0)
+    calories[rng.integers(0, len(calories), size=50)] = np.nan
+    index = CalorieIndex(calories)
+
+    goals = [1000, 800, 200, 0, 50_000]
+    for goal, rows in zip(goals, index.windows(goals, 50)):
+        np.testing.assert_array_equal(rows, _mask_rows(calories, goal, 50))
+
+
+def test_window_bounds_are_inclusive_and_limit_keeps_dataset_order():
+    calories = np.array([150.0, 100.0, 250.0, 200.0, 100.0, np.nan])
+    index = CalorieIndex(calories)
+
+    np.testing.assert_array_equal(index.window(150, 50), [0, 1, 3, 4])
+    np.testing.assert_array_equal(index.window(150, 50, limit=2), [0, 1])
+    assert index.window(1000, 50).size == 0
+
+
+def test_persisted_order_is_used():
+    calories = np.array([3.0, 1.0, 2.0])
+    index = CalorieIndex(calories, order=np.array([1, 2, 0]))
+
+    np.testing.assert_array_equal(index.sorted_calories, [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(index.window(2, 1), [0, 1, 2])
@@ -0,0 +1,142 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from src.recommenders.embedding_index import (
+    EMBEDDING_INDEX_FILE,
+    EmbeddingIndex,
+    EmbeddingIndexRegistry,
+    brute_force_search,
+    recall_at_k,
+)
+from src.recommenders.meal_plan_service import suggestion_rows
+from src.recommenders.model_registry import ModelRegistry
+from src.recommenders.recipe_store import (
+    NUTRITION_COLUMNS,
+    RecipeStore,
+    build_recipe_store,
+)
+
+
+def _clustered_embeddings(n=4_000, dims=9, clusters=20, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dims))
+    labels = rng.integers(0, clusters, size=n)
+    return (centres[labels] + 0.3 * rng.normal(size=(n, dims))).astype(np.float32)
+
+
+def test_probing_every_list_is_exact():
+    embeddings = _clustered_embeddings()
+    index = EmbeddingIndex.build(embeddings, n_lists=32)
+
+    query = embeddings[123]
+    rows, scores = index.search(query, k=10, nprobe=index.n_lists)
+    exact_rows, exact_scores = brute_force_search(embeddings, query, k=10)
+
+    np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+    assert set(rows) == set(exact_rows)
+    assert rows[0] == 123
+
+
+def test_search_probes_more_lists_until_k_rows_are_found():
+    embeddings = _clustered_embeddings()
+    index = EmbeddingIndex.build(embeddings, n_lists=64)
+
+    rows, scores = index.search(embeddings[0], k=3_000, nprobe=4)
+    assert len(rows) == len(set(rows)) == 3_000
+    assert np.all(np.diff(scores) <= 0)
+    assert len(index.search(embeddings[0], k=10_000)[0]) == len(embeddings)
+
+
+def test_recall_with_default_nprobe():
+    embeddings = _clustered_embeddings()
+    index = EmbeddingIndex.build(embeddings, n_lists=64)
+
+    queries = embeddings[:100]
+    assert recall_at_k(index, embeddings, queries, k=10) >= 0.9
+
+
+def test_save_and_load_round_trip(tmp_path):
+    embeddings = _clustered_embeddings(n=500)
+    EmbeddingIndex.build(embeddings[:100], n_lists=4, version="old").save(
+        tmp_path / "index.npz"
+    )
+    index = EmbeddingIndex.build(embeddings, n_lists=8, version="abc")
+    index.save(tmp_path / "index.npz")
+
+    loaded = EmbeddingIndex.load(tmp_path / "index.npz")
+
+    # Replaced through a temporary file that is renamed into place
+    assert [p.name for p in tmp_path.iterdir()] == ["index.npz"]
+    assert loaded.version == "abc"
+    assert loaded.n_lists == 8
+    np.testing.assert_array_equal(
+        loaded.search(embeddings[0], k=5)[0], index.search(embeddings[0], k=5)[0]
+    )
+
+
+class _GatedModel:
+    """Scales its input; the second model blocks until the test releases it."""
+
+    def __init__(self, factor, gate):
+        self.factor = factor
+        self.gate = gate
+
+    def predict(self, X, verbose=0):
+        if self.factor != 1:
+            assert self.gate.wait(10)
+        return X * self.factor
+
+
+class _IdentityScaler:
+    def transform(self, X):
+        return np.asarray(X, dtype=float)
+
+
+def test_new_model_index_is_built_in_the_background_and_swapped_in(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.uniform(1, 500, size=(300, 9)), columns=NUTRITION_COLUMNS)
+    df.insert(0, "RecipeId", np.arange(300))
+    df.to_csv(tmp_path / "recipes.csv", index=False)
+    recipes = RecipeStore(
+        build_recipe_store(tmp_path / "recipes.csv", tmp_path / "store")
+    )
+
+    gate = threading.Event()
+    model_path, scaler_path = tmp_path / "model.keras", tmp_path / "scaler.pkl"
+    model_path.write_text("1")
+    scaler_path.write_text("scaler")
+    registry = ModelRegistry(
+        str(model_path),
+        str(scaler_path),
+        check_interval=0,
+        loader=lambda m, s: (_GatedModel(int(open(m).read()), gate), _IdentityScaler()),
+    )
+    indexes = EmbeddingIndexRegistry(lambda: recipes, registry)
+    registry.on_reload(indexes.rebuild)
+    first = indexes.get()
+    assert first.model is registry.get()
+
+    model_path.write_text("2")
+    os.utime(model_path, ns=(0, 10**18))
+    registry.get()
+
+    # The previous index and its model keep answering while the new one is built
+    assert indexes.building
+    assert indexes.get() is first
+    rows = suggestion_rows(1500, recipes, suggestions=5, index=indexes.get())
+    assert len(rows) == 5
+
+    gate.set()
+    indexes._thread.join(10)
+    second = indexes.get()
+    assert second is not first
+    assert second.model is registry.get()
+    assert second.version == f"{recipes.version}-{registry.get().version}"
+    # Published to the store before the swap, for the other workers
+    saved = EmbeddingIndex.load(recipes.store_dir / EMBEDDING_INDEX_FILE)
+    assert saved.version == second.version
+    assert not list(recipes.store_dir.glob(f"{EMBEDDING_INDEX_FILE}.tmp-*"))
+    assert indexes.status()["rebuild_count"] == 1
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from src.recommenders.ingestion import (
+    REVIEWS,
+    DatasetSchema,
+    ingest_csv,
+    is_dataset_stale,
+    load_columns,
+    open_dataset,
+    read_manifest,
+)
+
+
+@pytest.fixture
+def reviews_csv(tmp_path):
+    """A reviews.csv with free text spanning lines, invalid rows and an extra column."""
+    df = pd.DataFrame(
+        {
+            "ReviewId": [2, 7, 9, 13, 14, 15],
+            "RecipeId": pd.array([992, 4384, None, 4384, 44, 992], dtype="Int64"),
+            "AuthorId": [2008, 1634, 2046, 2046, 1773, 1773],
+            "AuthorName": ["gayg msft", "Bill Hilbrich", "Gay Gilmore", "a", "b", "c"],
+            "Rating": [5, 4, 5, 9, 0, 2],
+            "Review": ['better than "any"\nyou buy', "Nice", "Fine", "x", "y", "z"],
+            "DateSubmitted": [
+                "2000-01-25T21:44:00Z",
+                "2001-10-17T16:49:59Z",
+                "2000-02-25T09:00:00Z",
+                "2000-03-13T21:15:00Z",
+                "2000-03-19T11:39:00Z",
+                "2000-04-07T13:57:00Z",
+            ],
+            "DateModified": ["2000-01-25T21:44:00Z"] * 6,
+        }
+    )
+    path = tmp_path / "reviews.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_ingest_writes_typed_partitions_and_drops_invalid_rows(reviews_csv, tmp_path):
+    datasets_dir = tmp_path / "datasets"
+    ingest_csv(
+        REVIEWS,
+        reviews_csv,
+        datasets_dir,
+        rows_per_file=2,
+        row_group_rows=1,
+        block_size=128,
+    )
+
+    manifest = read_manifest(REVIEWS, datasets_dir)
+    # One review has no recipe and one a rating above 5
+    assert manifest["rows"] == 4 and manifest["dropped_rows"] == 2
+    assert manifest["distinct_keys"] == 3
+    assert [part["rows"] for part in manifest["files"]] == [2, 2]
+
+    table = open_dataset(REVIEWS, datasets_dir).to_table()
+    assert table.schema == REVIEWS.arrow_schema
+    assert "Review" not in table.column_names
+    assert table.column("ReviewId").to_pylist() == [2, 7, 14, 15]
+    assert table.column("Rating").type == pa.int8()
+
+    df = load_columns(REVIEWS, ["RecipeId", "DateSubmitted"], reviews_csv, datasets_dir)
+    assert list(df.columns) == ["RecipeId", "DateSubmitted"]
+    assert df["DateSubmitted"].iloc[0] == pd.Timestamp("2000-01-25T21:44:00Z")
+
+
+def test_categories_and_staleness(reviews_csv, tmp_path):
+    datasets_dir = tmp_path / "datasets"
+    schema = DatasetSchema(
+        name="authors",
+        columns={
+            "AuthorName": pa.dictionary(pa.int32(), pa.string()),
+            "RecipeId": pa.float64(),
+        },
+        key="RecipeId",
+    )
+    assert is_dataset_stale(schema, reviews_csv, datasets_dir)
+
+    df = load_columns(schema, ["AuthorName", "RecipeId"], reviews_csv, datasets_dir)
+    assert isinstance(df["AuthorName"].dtype, pd.CategoricalDtype)
+    assert len(df) == 5 and not np.isnan(df["RecipeId"]).any()
+    assert not is_dataset_stale(schema, reviews_csv, datasets_dir)
+
+    reviews_csv.write_text(reviews_csv.read_text() + "16,44,1,d,4,w,,\n")
+    assert is_dataset_stale(schema, reviews_csv, datasets_dir)
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.recommenders.model_registry import ModelRegistry
+
+
+class _DoublingModel:
+    def __init__(self, factor):
+        self.factor = factor
+
+    def predict(self, X, verbose=0):
+        return X * self.factor
+
+
+class _IdentityScaler:
+    data_min_ = np.zeros(3)
+
+    def transform(self, X):
+        return np.asarray(X, dtype=float)
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    model_path, scaler_path = tmp_path / "model.keras", tmp_path / "scaler.pkl"
+    model_path.write_text("1")
+    scaler_path.write_text("scaler")
+    return str(model_path), str(scaler_path)
+
+
+def _loader(model_path, scaler_path):
+    with open(model_path) as f:
+        return _DoublingModel(int(f.read())), _IdentityScaler()
+
+
+def test_model_is_loaded_once_and_warmed(model_files):
+    registry = ModelRegistry(*model_files, check_interval=3600, loader=_loader)
+    registry.warm()
+    registry.predict(np.ones((2, 3)))
+    registry.predict(np.ones((2, 3)))
+
+    metrics = registry.metrics()
+    assert registry.load_count == 1
+    assert metrics["predict_count"] == 3
+    assert metrics["load_seconds"] is not None
+    assert metrics["predict_p99_ms"] >= metrics["predict_p50_ms"]
+
+
+def test_hot_reload_swaps_model_when_files_change(model_files):
+    reloaded = []
+    registry = ModelRegistry(*model_files, check_interval=0, loader=_loader)
+    registry.on_reload(lambda loaded: reloaded.append(loaded.version))
+    first_version = registry.get().version
+    np.testing.assert_array_equal(registry.predict(np.ones((1, 3))), [[1, 1, 1]])
+
+    with open(model_files[0], "w") as f:
+        f.write("22")
+    os.utime(model_files[0], ns=(0, 10**18))
+
+    np.testing.assert_array_equal(registry.predict(np.ones((1, 3))), [[22, 22, 22]])
+    assert registry.get().version != first_version
+    assert registry.load_count == 2
+    assert reloaded == [first_version, registry.get().version]
+
+
+def test_failed_reload_keeps_serving_previous_model(model_files):
+    def flaky_loader(model_path, scaler_path):
+        if registry.load_count:
+            raise OSError("truncated model file")
+        return _loader(model_path, scaler_path)
+
+    registry = ModelRegistry(*model_files, check_interval=0, loader=flaky_loader)
+    registry.get()
+    with open(model_files[0], "w") as f:
+        f.write("3")
+    os.utime(model_files[0], ns=(0, 10**18))
+
+    np.testing.assert_array_equal(registry.predict(np.ones((1, 3))), [[1, 1, 1]])
+    assert registry.metrics()["last_error"] == "truncated model file"
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.recommenders.numpy_autoencoder import (
+    PREDICT_ATOL,
+    PREDICT_RTOL,
+    NumpyAutoencoder,
+    export_weights,
+    load_numpy_autoencoder,
+)
+
+MODELS_DIR = Path(__file__).resolve().parents[3] / "models"
+KERAS_MODEL = MODELS_DIR / "autoencoder_model.keras"
+SCALER = MODELS_DIR / "scaler.pkl"
+
+requires_model = pytest.mark.skipif(
+    not KERAS_MODEL.exists(), reason="Trained autoencoder not available"
+)
+
+
+def test_forward_pass_matches_hand_computation():
+    rng = np.random.default_rng(0)
+    arrays = {
+        "kernel_0": rng.normal(size=(3, 4)).astype(np.float32),
+        "bias_0": rng.normal(size=4).astype(np.float32),
+        "kernel_2": rng.normal(size=(4, 3)).astype(np.float32),
+        "bias_2": rng.normal(size=3).astype(np.float32),
+    }
+    layers = [
+        {"type": "dense", "activation": "linear"},
+        {"type": "leaky_relu", "negative_slope": 0.3},
+        {"type": "dense", "activation": "linear"},
+    ]
+    X = rng.normal(size=(10, 3)).astype(np.float32)
+
+    hidden = X @ arrays["kernel_0"] + arrays["bias_0"]
+    hidden = np.where(hidden >= 0, hidden, 0.3 * hidden)
+    expected = hidden @ arrays["kernel_2"] + arrays["bias_2"]
+
+    actual = NumpyAutoencoder(layers, arrays).predict(X, batch_size=4)
+    np.testing.assert_allclose(actual, expected, rtol=1e-6, atol=1e-6)
+
+
+@requires_model
+def test_exported_scaler_matches_sklearn(tmp_path):
+    joblib = pytest.importorskip("joblib")
+    weights = export_weights(KERAS_MODEL, SCALER, tmp_path / "weights.npz")
+    _, scaler = load_numpy_autoencoder(weights, weights)
+
+    X = np.random.default_rng(0).uniform(0, 2000, size=(50, 9))
+    np.testing.assert_allclose(
+        scaler.transform(X), joblib.load(SCALER).transform(X), rtol=1e-12
+    )
+
+
+@requires_model
+def test_exported_model_matches_keras(tmp_path):
+    pytest.importorskip("tensorflow")
+    from tensorflow.keras.models import load_model
+
+    weights = export_weights(KERAS_MODEL, SCALER, tmp_path / "weights.npz")
+    X = np.random.default_rng(1).uniform(size=(1000, 9)).astype(np.float32)
+
+    np.testing.assert_allclose(
+        NumpyAutoencoder.load(weights).predict(X),
+        load_model(KERAS_MODEL).predict(X, verbose=0),
+        rtol=PREDICT_RTOL,
+        atol=PREDICT_ATOL,
+    )
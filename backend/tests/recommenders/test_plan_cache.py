@@ -0,0 +1,59 @@
+import numpy as np
+
+from src.recommenders.plan_cache import ENTRY_OVERHEAD, PlanCache
+
+
+def _rows(calories):
+    """Rows that differ per calorie target, like a computed meal plan."""
+    return tuple(np.arange(3) + calories + meal for meal in range(4))
+
+
+def test_profiles_in_one_bucket_share_an_entry():
+    cache = PlanCache(bucket=10)
+    calls = []
+
+    def compute(key):
+        calls.append(key.daily_calories)
+        return _rows(key.daily_calories)
+
+    first = cache.key(2203, 50, 3, "v1")
+    second = cache.key(2198, 50, 3, "v1")
+    assert first == second and first.daily_calories == 2200
+
+    rows = cache.get_or_compute(first, lambda: compute(first))
+    assert cache.get_or_compute(second, lambda: compute(second)) is rows
+    np.testing.assert_array_equal(rows[0], [2200, 2201, 2202])
+    assert not rows[0].flags.writeable
+
+    other = cache.key(2203, 100, 3, "v1")
+    cache.get_or_compute(other, lambda: compute(other))
+    assert calls == [2200, 2200]
+    assert cache.status()["hits"] == 1 and cache.status()["misses"] == 2
+
+
+def test_least_recently_used_entries_are_evicted_past_the_memory_bound():
+    entry = 4 * 3 * 8 + ENTRY_OVERHEAD
+    cache = PlanCache(max_bytes=2 * entry, bucket=1)
+    keys = [cache.key(calories, 50, 3, "v1") for calories in (1000, 2000, 3000)]
+
+    cache.get_or_compute(keys[0], lambda: _rows(1000))
+    cache.get_or_compute(keys[1], lambda: _rows(2000))
+    cache.get_or_compute(keys[0], lambda: _rows(1000))
+    cache.get_or_compute(keys[2], lambda: _rows(3000))
+
+    assert len(cache) == 2 and cache.nbytes == 2 * entry
+    assert cache.evictions == 1
+    # The entry used least recently was the 2000 kcal one
+    cache.get_or_compute(keys[0], lambda: _rows(1000))
+    assert cache.hits == 2
+
+
+def test_new_data_or_model_version_invalidates_the_entries():
+    cache = PlanCache()
+    cache.get_or_compute(cache.key(2000, 50, 3, "v1"), lambda: _rows(2000))
+    cache.get_or_compute(cache.key(2000, 50, 3, "v2"), lambda: _rows(2000))
+    assert len(cache) == 1 and cache.invalidations == 1
+    assert cache.status()["version"] == "v2"
+
+    cache.clear()
+    assert len(cache) == 0 and cache.nbytes == 0 and cache.invalidations == 2
@@ -0,0 +1,103 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommenders.recipe_store import (
+    RecipeStore,
+    build_recipe_store,
+    is_store_stale,
+    load_recipe_store,
+)
+
+
+@pytest.fixture
+def recipes_csv(tmp_path):
+    """Write a small recipes.csv with the same mix of column types as the real file."""
+    df = pd.DataFrame(
+        {
+            "RecipeId": [38, 39, 40, 41, 42],
+            "Name": ["Low-Fat Berry Blue Frozen Dessert", "Biryani", "Æblekage", "Soup", ""],
+            "AuthorId": [1533, 1567, 1566, 1586, 1600],
+            "CookTime": ["PT24H", None, "PT25M", "PT2H", None],
+            "RecipeYield": [None, "4", None, "1 loaf", None],
+            "AggregatedRating": [4.5, 3.0, np.nan, 5.0, 4.0],
+            "Calories": [170.9, 1110.7, 311.1, 536.1, 95.0],
+            "RecipeServings": [4.0, 6.0, np.nan, 2.0, 1.0],
+        }
+    )
+    path = tmp_path / "recipes.csv"
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_build_round_trips_numeric_and_text_columns(recipes_csv, tmp_path):
+    """The store returns the same values as pd.read_csv, with missing text as None."""
+    csv_path, df = recipes_csv
+    store = RecipeStore(build_recipe_store(csv_path, tmp_path / "store", chunksize=2))
+
+    assert len(store) == len(df)
+    assert store.columns == list(df.columns)
+    np.testing.assert_array_equal(store.column("Calories"), df["Calories"])
+    assert store.column("RecipeId").dtype == np.int64
+
+    taken = store.take([3, 0])
+    assert taken.index.tolist() == [3, 0]
+    assert taken["Name"].tolist() == ["Soup", "Low-Fat Berry Blue Frozen Dessert"]
+    assert taken["CookTime"].tolist() == ["PT2H", "PT24H"]
+    # Numeric-looking text stays text
+    assert store.take([1], columns=["RecipeYield"])["RecipeYield"].tolist() == ["4"]
+    assert store.take([2])["Name"].tolist() == ["Æblekage"]
+    assert store.take([2])["RecipeYield"].tolist() == [None]
+
+
+def test_numeric_stacks_selected_rows(recipes_csv, tmp_path):
+    csv_path, df = recipes_csv
+    store = RecipeStore(build_recipe_store(csv_path, tmp_path / "store"))
+
+    stacked = store.numeric(["Calories", "RecipeServings"], rows=np.array([1, 3]))
+    np.testing.assert_array_equal(stacked, [[1110.7, 6.0], [536.1, 2.0]])
+
+
+def test_load_rebuilds_when_csv_changes(recipes_csv, tmp_path):
+    csv_path, df = recipes_csv
+    store_dir = tmp_path / "store"
+    first = load_recipe_store(csv_path, store_dir)
+    assert not is_store_stale(csv_path, store_dir)
+
+    df.iloc[:2].to_csv(csv_path, index=False)
+    assert is_store_stale(csv_path, store_dir)
+    second = load_recipe_store(csv_path, store_dir)
+
+    assert len(second) == 2
+    assert second.version != first.version
+
+
+def test_row_of_finds_recipes_by_id(recipes_csv, tmp_path):
+    csv_path, df = recipes_csv
+    store_dir = build_recipe_store(csv_path, tmp_path / "store")
+    store = RecipeStore(store_dir)
+
+    assert store.row_of(40) == 2
+    assert store.row_of(37) is None and store.row_of(99) is None
+
+    # Stores built before the RecipeId order was saved sort the ids on load
+    (Path(store_dir) / "RecipeId.order.npy").unlink()
+    assert RecipeStore(store_dir).row_of(42) == 4
+
+
+def test_rows_without_a_valid_id_are_dropped(recipes_csv, tmp_path):
+    path, df = recipes_csv
+    df = df.astype({"RecipeId": object, "AuthorId": object})
+    df.loc[1, "RecipeId"] = None
+    df.loc[3, "AuthorId"] = "unknown"
+    df.to_csv(path, index=False)
+
+    store = RecipeStore(build_recipe_store(path, tmp_path / "store", chunksize=2))
+
+    assert len(store) == 3
+    assert store.meta["dropped_rows"] == 2
+    np.testing.assert_array_equal(store.column("RecipeId"), [38, 40, 42])
+    np.testing.assert_array_equal(store.column("AuthorId"), [1533, 1566, 1600])
+    assert store.take([1], columns=["Name"])["Name"].tolist() == ["Æblekage"]
@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+
+from src.recommenders.models import (
+    RESPONSE_FIELDS,
+    SUMMARY_FIELDS,
+    RecommendationView,
+    _transform_df_to_pydantic,
+    recommendation_rows,
+    view_fields,
+)
+from src.recommenders.recipe_store import NUTRITION_COLUMNS
+
+
+@pytest.fixture
+def recipes():
+    """Recipes as taken from the recipe store, with missing values in both kinds."""
+    n = 3
+    df = pd.DataFrame(
+        {
+            "RecipeId": np.array([38, 39, 40], dtype=np.int64),
+            "Name": ["Berry Dessert", "Biryani", "Æblekage"],
+            "AuthorId": np.array([1533, 1567, 1566], dtype=np.int64),
+            "AuthorName": ["Dancer", "elly9812", "Stephen Little"],
+            "CookTime": ["PT24H", None, "PT25M"],
+            "PrepTime": ["PT45M", "PT4H", "PT5M"],
+            "TotalTime": ["PT24H45M", "PT4H25M", "PT30M"],
+            "DatePublished": [
+                "1999-08-09T21:46:00Z",
+                "1999-08-29T13:12:00Z",
+                "1999-09-05T19:52:00Z",
+            ],
+            "Description": ["Make and share", None, "Cake"],
+            "RecipeIngredientParts": ['c("blueberries")', 'c("rice")', 'c("apples")'],
+            "AggregatedRating": [4.5, 3.0, np.nan],
+            "ReviewCount": [4.0, np.nan, 2.0],
+            "RecipeServings": [4.0, 6.0, np.nan],
+            "RecipeInstructions": ['c("Toss")', 'c("Soak")', 'c("Bake")'],
+        },
+        index=[7, 2, 9],
+    )
+    for column in [
+        "Images",
+        "RecipeCategory",
+        "Keywords",
+        "RecipeIngredientQuantities",
+        "RecipeYield",
+    ]:
+        df[column] = [None] * n
+    for i, column in enumerate(NUTRITION_COLUMNS):
+        df[column] = np.array([170.9, 1110.7, 311.1]) + i
+    df["Extra"] = 1.0  # Columns outside the response are dropped
+    return df
+
+
+def test_rows_serialise_like_the_response_model(recipes):
+    expected = [
+        json.loads(r.model_dump_json()) for r in _transform_df_to_pydantic(recipes)
+    ]
+    rows = recommendation_rows(recipes)
+
+    assert orjson.loads(orjson.dumps(rows)) == expected
+    assert list(rows[0]) == RESPONSE_FIELDS
+    assert rows[2]["AggregatedRating"] is None and rows[1]["CookTime"] is None
+
+
+def test_rows_keep_only_the_requested_fields(recipes):
+    rows = recommendation_rows(recipes, fields=["RecipeId", "Name", "Calories"])
+    assert rows[0] == {"RecipeId": 38, "Name": "Berry Dessert", "Calories": 170.9}
+    assert recommendation_rows(pd.DataFrame(), fields=["RecipeId"]) == []
+    with pytest.raises(ValueError, match="Extra"):
+        recommendation_rows(recipes, fields=["RecipeId", "Extra"])
+
+
+def test_view_fields_picks_the_requested_projection():
+    assert view_fields() == RESPONSE_FIELDS
+    assert view_fields(RecommendationView.summary) == SUMMARY_FIELDS
+    assert view_fields(RecommendationView.summary, ["Name,RecipeId", "Name"]) == [
+        "Name",
+        "RecipeId",
+    ]
+    with pytest.raises(ValueError):
+        view_fields(fields=["Calories,Price"])
@@ -0,0 +1,172 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommenders import review_ranking
+from src.recommenders.recipe_store import RecipeStore, build_recipe_store
+from src.recommenders.review_ranking import (
+    ReviewScores,
+    ReviewScoresRegistry,
+    build_review_scores,
+    load_review_scores,
+)
+
+
+@pytest.fixture
+def recipes(tmp_path):
+    """A store whose rows are not in RecipeId order."""
+    df = pd.DataFrame(
+        {
+            "RecipeId": [40, 38, 41, 39],
+            "Name": ["Æblekage", "Berry Dessert", "Soup", "Biryani"],
+            "Calories": [311.1, 170.9, 536.1, 1110.7],
+        }
+    )
+    csv_path = tmp_path / "recipes.csv"
+    df.to_csv(csv_path, index=False)
+    return RecipeStore(build_recipe_store(csv_path, tmp_path / "store"))
+
+
+@pytest.fixture
+def reviews_csv(tmp_path):
+    day = pd.Timestamp("2020-01-01", tz="UTC")
+    reviews = [
+        # RecipeId, Rating, days before the newest review
+        (38, 5, 0),
+        (39, 4, 0),
+        (39, 5, 10),
+        (39, 4, 20),
+        (39, 5, 30),
+        (41, 1, 0),
+        (41, 2, 5),
+        (99, 5, 0),  # Not in the store
+    ]
+    df = pd.DataFrame(
+        {
+            "ReviewId": range(1, len(reviews) + 1),
+            "RecipeId": [r[0] for r in reviews],
+            "AuthorId": 1,
+            "Rating": [r[1] for r in reviews],
+            "DateSubmitted": [
+                (day - pd.Timedelta(days=r[2])).strftime("%Y-%m-%dT%H:%M:%SZ")
+                for r in reviews
+            ],
+            "DateModified": "2020-01-01T00:00:00Z",
+        }
+    )
+    path = tmp_path / "reviews.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_scores_are_bayesian_averages_aligned_with_store_rows(
+    recipes, reviews_csv, tmp_path
+):
+    scores = build_review_scores(
+        recipes, reviews_csv=reviews_csv, datasets_dir=tmp_path / "datasets"
+    )
+    rows = recipes.rows_of([38, 39, 40, 41, 12])
+    np.testing.assert_array_equal(rows, [1, 3, 0, 2, -1])
+
+    mean = 26 / 7
+    np.testing.assert_array_equal(scores.review_count[rows[:4]], [1, 4, 0, 2])
+    np.testing.assert_allclose(
+        scores.bayesian_average[rows[:4]],
+        [
+            (mean * 10 + 5) / 11,
+            (mean * 10 + 18) / 14,
+            mean,
+            (mean * 10 + 3) / 12,
+        ],
+        rtol=1e-6,
+    )
+    # The recipe with four good reviews outranks the one with a single 5
+    assert list(scores.rank(np.arange(len(recipes)))) == [3, 1, 0, 2]
+    assert list(scores.rank([2, 0, 1], k=2)) == [1, 0]
+
+
+def test_old_reviews_count_less():
+    count = np.array([4, 4, 0])
+    scores = ReviewScores.from_totals(
+        count,
+        rating_sum=np.array([20.0, 20.0, 0.0]),
+        last_review=np.array([1000 * 86400, 0, 0]),
+        half_life_days=1000,
+    )
+    assert scores.bayesian_average[0] == scores.bayesian_average[1]
+    np.testing.assert_allclose(
+        scores.score[1] - scores.prior_mean,
+        (scores.score[0] - scores.prior_mean) / 2,
+    )
+    assert scores.score[2] == pytest.approx(scores.prior_mean)
+
+
+def test_load_rebuilds_when_the_reviews_change(recipes, reviews_csv, tmp_path):
+    datasets_dir = tmp_path / "datasets"
+    assert load_review_scores(recipes, tmp_path / "missing.csv", datasets_dir) is None
+
+    first = load_review_scores(recipes, reviews_csv, datasets_dir)
+    assert first.version.startswith(recipes.version)
+    assert (
+        load_review_scores(recipes, reviews_csv, datasets_dir).version == first.version
+    )
+
+    reviews_csv.write_text(
+        reviews_csv.read_text() + "9,40,1,5,2020-01-02T00:00:00Z,2020-01-02T00:00:00Z\n"
+    )
+    second = load_review_scores(recipes, reviews_csv, datasets_dir)
+    assert second.version != first.version
+    # The scores in the store directory are replaced through a renamed temp file
+    assert not list(recipes.store_dir.glob("review_scores.npz.tmp-*"))
+    assert ReviewScores.load(recipes.store_dir / "review_scores.npz").version == (
+        second.version
+    )
+    assert second.review_count[recipes.row_of(40)] == 1
+
+
+def test_registry_loads_in_the_background_and_retries_missing_scores(
+    recipes, reviews_csv, tmp_path, monkeypatch
+):
+    missing = tmp_path / "missing.csv"
+    current = {"recipes": recipes}
+    registry = ReviewScoresRegistry(
+        lambda: current["recipes"], missing, tmp_path / "datasets", retry_after=60
+    )
+    assert registry.load() is None
+
+    # Unavailable scores are not looked up again on every call...
+    reviews_csv.rename(missing)
+    assert registry.get() is None
+    assert not registry.building
+
+    # ...but once the cooldown has passed, off the caller's thread
+    registry.retry_after = 0
+    assert registry.get() is None
+    registry._thread.join(10)
+    first = registry.get()
+    assert first is not None and first.version.startswith(recipes.version)
+    assert registry.get() is first
+
+    # The scores of a new store are built while requests get None
+    gate = threading.Event()
+
+    def gated_load(*args):
+        assert gate.wait(10)
+        return load_review_scores(*args)
+
+    monkeypatch.setattr(review_ranking, "load_review_scores", gated_load)
+    df = pd.DataFrame({"RecipeId": [40, 39], "Calories": [311.1, 1110.7]})
+    df.to_csv(tmp_path / "other.csv", index=False)
+    current["recipes"] = RecipeStore(
+        build_recipe_store(tmp_path / "other.csv", tmp_path / "other")
+    )
+    assert registry.get() is None
+    assert registry.building
+
+    gate.set()
+    registry._thread.join(10)
+    second = registry.get()
+    assert second.version.startswith(current["recipes"].version)
+    assert len(second.review_count) == 2
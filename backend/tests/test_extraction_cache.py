@@ -0,0 +1,141 @@
+import asyncio
+import shutil
+import sqlite3
+from pathlib import Path
+
+from PIL import Image
+
+from src.extraction_cache import ExtractionCache, hash_image
+from src.image_preprocessing import DEFAULT_PREPROCESS, PreprocessConfig
+from src.sales_service import (
+    EXTRACTION_PROMPT_VERSION,
+    SalesCatalog,
+    SalesItem,
+    Sale,
+)
+
+STALE_VERSION = "0"
+
+
+def test_wrapped_extractor_only_pays_for_new_pages(tmp_path):
+    Image.new("RGB", (40, 60), "white").save(tmp_path / "a.jpg")
+    Image.new("RGB", (40, 60), "black").save(tmp_path / "b.jpg")
+    shutil.copy(tmp_path / "a.jpg", tmp_path / "a-copy.jpg")
+    pages = [tmp_path / name for name in ("a.jpg", "b.jpg", "a-copy.jpg")]
+    calls = []
+
+    async def extractor(image: Path) -> SalesCatalog:
+        calls.append(image.name)
+        await asyncio.sleep(0.01)
+        return SalesCatalog(
+            products=[SalesItem(name=image.stem, sale=Sale(type="price", price=1))]
+        )
+
+    cache = ExtractionCache(tmp_path / "cache.sqlite3")
+
+    async def run(prompt_version: str):
+        extract = cache.wrap(extractor, model="gpt-test", prompt_version=prompt_version)
+        return await asyncio.gather(*(extract(page) for page in pages))
+
+    first = asyncio.run(run(EXTRACTION_PROMPT_VERSION))
+    # The copy has the same content, so it shares the call for a.jpg
+    assert sorted(calls) == ["a.jpg", "b.jpg"]
+    assert first[0] == first[2]
+
+    calls.clear()
+    assert asyncio.run(run(EXTRACTION_PROMPT_VERSION)) == first
+    assert calls == []
+    assert cache.stats()["hits"] == 4
+
+    asyncio.run(run(STALE_VERSION))
+    assert sorted(calls) == ["a.jpg", "b.jpg"]
+    by_version = {
+        row["prompt_version"]: row["entries"] for row in cache.stats()["by_version"]
+    }
+    assert by_version == {EXTRACTION_PROMPT_VERSION: 2, STALE_VERSION: 2}
+
+    assert cache.invalidate(prompt_version=EXTRACTION_PROMPT_VERSION) == 2
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+    reopened = ExtractionCache(tmp_path / "cache.sqlite3")
+    assert reopened.stats()["by_version"] == [
+        {
+            "prompt_version": STALE_VERSION,
+            "model": "gpt-test",
+            "preprocess": DEFAULT_PREPROCESS.key(),
+            "entries": 2,
+        }
+    ]
+    assert reopened.invalidate(keep_current=True) == 2
+
+
+def test_entries_are_keyed_on_the_extractors_model_and_preprocessing(tmp_path):
+    Image.new("RGB", (40, 60), "white").save(tmp_path / "a.jpg")
+    calls = []
+
+    def make_extractor(model_name, preprocess):
+        async def extract(image: Path) -> SalesCatalog:
+            calls.append((model_name, preprocess))
+            return SalesCatalog(products=[])
+
+        extract.model_name, extract.preprocess = model_name, preprocess
+        return extract
+
+    tiled = PreprocessConfig(tile_above_aspect=2.0)
+    extractors = [
+        make_extractor("gpt-a", DEFAULT_PREPROCESS),
+        make_extractor("gpt-b", DEFAULT_PREPROCESS),
+        make_extractor("gpt-a", tiled),
+        make_extractor("gpt-a", PreprocessConfig(tile_above_aspect=2.0)),
+    ]
+    cache = ExtractionCache(tmp_path / "cache.sqlite3")
+
+    async def run():
+        for extractor in extractors:
+            await cache.wrap(extractor)(tmp_path / "a.jpg")
+
+    asyncio.run(run())
+    # Only an extractor with the same model and options reuses an entry
+    assert calls == [
+        ("gpt-a", DEFAULT_PREPROCESS),
+        ("gpt-b", DEFAULT_PREPROCESS),
+        ("gpt-a", tiled),
+    ]
+    assert cache.stats()["entries"] == 3
+
+
+def test_entries_of_caches_without_preprocessing_keep_working(tmp_path):
+    Image.new("RGB", (40, 60), "white").save(tmp_path / "a.jpg")
+    catalog = SalesCatalog(
+        products=[SalesItem(name="melk", sale=Sale(type="price", price=1))]
+    )
+    path = tmp_path / "cache.sqlite3"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE extractions (image_hash TEXT NOT NULL, "
+            "prompt_version TEXT NOT NULL, model TEXT NOT NULL, catalog TEXT NOT NULL, "
+            "created_at REAL NOT NULL, "
+            "PRIMARY KEY (image_hash, prompt_version, model))"
+        )
+        conn.execute(
+            "INSERT INTO extractions VALUES (?, ?, ?, ?, 0)",
+            (
+                hash_image(tmp_path / "a.jpg"),
+                EXTRACTION_PROMPT_VERSION,
+                "gpt-test",
+                catalog.model_dump_json(),
+            ),
+        )
+    conn.close()
+
+    cache = ExtractionCache(path)
+    assert (
+        cache.get(
+            hash_image(tmp_path / "a.jpg"),
+            EXTRACTION_PROMPT_VERSION,
+            "gpt-test",
+            DEFAULT_PREPROCESS.key(),
+        )
+        == catalog
+    )
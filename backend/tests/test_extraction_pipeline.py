@@ -0,0 +1,77 @@
+import asyncio
+from pathlib import Path
+
+from PIL import Image
+
+from src.extraction_pipeline import ExtractionCheckpoint, run_extraction
+from src.sales_service import SalesCatalog, SalesItem, Sale, make_openai_extractor
+from tests.fake_llm_server import FakeLLMServer
+
+
+def _write_pages(root: Path, pages: dict) -> None:
+    for vendor, count in pages.items():
+        (root / vendor).mkdir(parents=True)
+        for i in range(count):
+            Image.new("RGB", (40, 60), "white").save(root / vendor / f"page{i}.jpg")
+        (root / vendor / "notes.txt").write_text("not an image")
+
+
+def test_pages_of_all_vendors_share_one_worker_pool(tmp_path):
+    _write_pages(tmp_path, {"kiwi-no": 3, "meny-no": 2})
+
+    latency = 0.3
+    with FakeLLMServer(latency=latency) as server:
+        extractor = make_openai_extractor(api_key="fake", base_url=server.base_url)
+        result = asyncio.run(
+            run_extraction(
+                ["kiwi-no", "missing-no", "meny-no"],
+                extractor,
+                images_root=tmp_path,
+                checkpoint=ExtractionCheckpoint(tmp_path / "checkpoint.jsonl"),
+                concurrency=4,
+            )
+        )
+
+    assert result.extracted == 5
+    assert result.missing_vendors == ["missing-no"]
+    assert [ps.vendor for ps in result.sales] == ["kiwi-no"] * 3 + ["meny-no"] * 2
+    assert server.images == 5
+    assert 1 < server.max_in_flight <= 4
+    # Faster than the one page per latency period of a sequential run
+    assert server.images_per_second() > 1 / latency
+    assert len((tmp_path / "checkpoint.jsonl").read_text().splitlines()) == 5
+
+
+def test_rerun_resumes_from_checkpoint(tmp_path):
+    _write_pages(tmp_path, {"kiwi-no": 4})
+    checkpoint = ExtractionCheckpoint(tmp_path / "checkpoint.jsonl")
+    calls, failed_once = [], set()
+
+    async def flaky(image: Path) -> SalesCatalog:
+        calls.append(image.name)
+        if image.name == "page2.jpg" and image.name not in failed_once:
+            failed_once.add(image.name)
+            raise RuntimeError("connection reset")
+        return SalesCatalog(
+            products=[SalesItem(name=image.stem, sale=Sale(type="price", price=1))]
+        )
+
+    first = asyncio.run(run_extraction(["kiwi-no"], flaky, tmp_path, checkpoint))
+    assert first.extracted == 3
+    assert list(first.failed) == [str(tmp_path / "kiwi-no" / "page2.jpg")]
+
+    # A changed page is extracted again, unchanged finished pages are not
+    Image.new("RGB", (80, 60), "black").save(tmp_path / "kiwi-no" / "page0.jpg")
+    calls.clear()
+    second = asyncio.run(run_extraction(["kiwi-no"], flaky, tmp_path, checkpoint))
+    assert sorted(calls) == ["page0.jpg", "page2.jpg"]
+    assert (second.extracted, second.resumed, second.failed) == (2, 2, {})
+    assert [ps.products.products[0].name for ps in second.sales] == [
+        "page0",
+        "page1",
+        "page2",
+        "page3",
+    ]
+
+    checkpoint.clear()
+    assert not (tmp_path / "checkpoint.jsonl").exists()
@@ -0,0 +1,119 @@
+import asyncio
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from src.image_preprocessing import PreprocessConfig, preprocess_page, tile_boxes
+from src.sales_service import (
+    SalesCatalog,
+    SalesItem,
+    Sale,
+    make_openai_extractor,
+    merge_tile_catalogs,
+)
+from tests.fake_llm_server import FakeLLMServer
+
+
+def _decode(jpeg: bytes) -> Image.Image:
+    return Image.open(BytesIO(jpeg))
+
+
+def test_pages_are_downscaled_and_converted():
+    page = Image.new("RGBA", (1500, 3000), (255, 0, 0, 255))
+
+    (jpeg,) = preprocess_page(page, PreprocessConfig(max_dimension=1000))
+    assert _decode(jpeg).size == (500, 1000)
+    assert _decode(jpeg).mode == "RGB"
+
+    (gray,) = preprocess_page(
+        page, PreprocessConfig(max_dimension=None, grayscale=True)
+    )
+    assert _decode(gray).size == (1500, 3000)
+    assert _decode(gray).mode == "L"
+    (color,) = preprocess_page(page, PreprocessConfig(max_dimension=None))
+    assert len(gray) < len(color)
+
+
+def test_tall_pages_are_tiled_with_overlap():
+    config = PreprocessConfig(tile_above_aspect=2.0, tile_aspect=1.0, tile_overlap=0.25)
+    assert tile_boxes((1000, 1900), config) == [(0, 0, 1000, 1900)]
+
+    boxes = tile_boxes((1000, 3100), config)
+    assert boxes == [
+        (0, 0, 1000, 1000),
+        (0, 750, 1000, 1750),
+        (0, 1500, 1000, 2500),
+        (0, 2100, 1000, 3100),
+    ]
+    for (_, _, _, bottom), (_, top, _, _) in zip(boxes, boxes[1:]):
+        assert top < bottom
+
+
+def test_tiles_stay_inside_the_page():
+    config = PreprocessConfig(tile_above_aspect=1.4, tile_aspect=1.4, tile_overlap=0.5)
+    # Just taller than the threshold, the rounded tile height still fits
+    for size in [(1000, 1401), (999, 1399), (3, 5), (1, 2)]:
+        boxes = tile_boxes(size, config)
+        assert all(0 <= top < bottom <= size[1] for _, top, _, bottom in boxes)
+        assert boxes[-1][3] == size[1]
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"tile_above_aspect": 1.0, "tile_aspect": 1.4},
+        {"tile_overlap": 1.0},
+        {"tile_aspect": 0},
+    ],
+)
+def test_inconsistent_tiling_options_are_rejected(options):
+    with pytest.raises(ValueError):
+        PreprocessConfig(**options)
+
+
+def _catalog(*items) -> SalesCatalog:
+    return SalesCatalog(
+        products=[
+            SalesItem(name=name, sale=Sale(type="price", price=price))
+            for name, price in items
+        ]
+    )
+
+
+def test_items_in_tile_overlaps_are_merged():
+    merged = merge_tile_catalogs(
+        [
+            _catalog(("Tine Melk", 20), ("Grandiosa", 50)),
+            _catalog(("grandiosa ", 50), ("Pepsi Max", 30)),
+            _catalog(("Pepsi  max", 30), ("Grandiosa", 40), ("Tine Melk", 20)),
+        ]
+    )
+    assert [(item.name, item.sale.price) for item in merged.products] == [
+        ("Tine Melk", 20),
+        ("Grandiosa", 50),
+        ("Pepsi Max", 30),
+        ("Grandiosa", 40),
+        ("Tine Melk", 20),
+    ]
+
+
+def test_extractor_sends_one_request_per_tile(tmp_path):
+    Image.new("RGB", (400, 1300), "white").save(tmp_path / "page.png")
+
+    def responder(request, number):
+        items = [{"name": f"Vare {number}", "sale": {"type": "price", "price": 1.0}}]
+        items.append({"name": "Kaffe", "sale": {"type": "price", "price": 2.0}})
+        return {"products": items}
+
+    config = PreprocessConfig(max_dimension=256, tile_above_aspect=2.0, tile_aspect=1.5)
+    with FakeLLMServer(responder=responder) as server:
+        extractor = make_openai_extractor(
+            api_key="fake", base_url=server.base_url, preprocess=config
+        )
+        catalog = asyncio.run(extractor(tmp_path / "page.png"))
+
+    assert server.images == len(tile_boxes((400, 1300), config)) == 3
+    names = [item.name for item in catalog.products]
+    assert names.count("Kaffe") == 1
+    assert sorted(n for n in names if n != "Kaffe") == ["Vare 1", "Vare 2", "Vare 3"]
@@ -0,0 +1,134 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import httpx
+
+# main reads its credentials at import time
+for _name in (
+    "KASSAL_API_KEY",
+    "GOOGLE_CLIENT_ID",
+    "GOOGLE_CLIENT_SECRET",
+    "GOOGLE_REDIRECT_URI",
+):
+    os.environ.setdefault(_name, "dummy")
+
+import main  # noqa: E402
+from src.kassal.models_products_compare import ProductsCompareData  # noqa: E402
+from src.kassal.price_history import PriceHistoryStore  # noqa: E402
+from src.on_sale_catalog import OnSaleCatalog  # noqa: E402
+from src.sale_resolution import SaleIndex, SaleResolution, SaleResolver  # noqa: E402
+from src.sales_registry import LoadedSales  # noqa: E402
+from src.sales_service import ProductSales, Sale, SalesCatalog, SalesItem  # noqa: E402
+from tests.kassal.fake_kassal_server import ean_json, product_json  # noqa: E402
+
+
+def _get(path: str, **params):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            response = await client.get(path, params=params)
+        # Price history is recorded off the request path
+        await asyncio.gather(*main._price_recordings)
+        return response
+
+    return asyncio.run(run())
+
+
+def test_compare_by_url_attaches_sales_and_records_price_history(tmp_path, monkeypatch):
+    listings = [product_json(1, "Tine Helmelk 1l", "KIWI", "7001")]
+    listings.append(product_json(2, "Tine Helmelk 1l", "MENY_NO", "7001"))
+    for listing in listings:
+        listing["price_history"] = [
+            {"price": listing["current_price"], "date": "2024-01-02T00:00:00Z"}
+        ]
+    compared = ProductsCompareData.model_validate(ean_json("7001", listings))
+
+    async def find_product_by_url_compare(url):
+        return compared
+
+    sale = Sale(type="price", price=12.9)
+    resolution = SaleResolution(
+        vendor="kiwi-no", store="KIWI", name="Tine Helmelk", sale=sale
+    )
+    resolution.product_ids = [1]
+    monkeypatch.setattr(
+        main.kassal_api, "find_product_by_url_compare", find_product_by_url_compare
+    )
+    monkeypatch.setattr(main, "_sale_enricher", lambda: SaleIndex([resolution]))
+    history = PriceHistoryStore(tmp_path / "prices.sqlite3")
+    monkeypatch.setattr(main, "price_history", history)
+
+    response = _get("/products/find-by-url/compare", url="https://example.com/1")
+
+    assert response.status_code == 200
+    products = response.json()["products"]
+    assert [p["sale"] for p in products] == [sale.model_dump(), None]
+    assert sorted(history.frame()["product_id"]) == [1, 2]
+
+
+def test_failed_on_sale_builds_are_not_restarted_by_every_request(monkeypatch):
+    searches = []
+
+    class FailingApi:
+        async def get_products(self, search=None, size=10):
+            searches.append(search)
+            raise RuntimeError("Kassal is down")
+
+    items = [SalesItem(name="Tine Helmelk", sale=Sale(type="price", price=20.0))]
+    sales = [ProductSales(products=SalesCatalog(products=items), vendor="kiwi-no")]
+    resolver = SaleResolver(FailingApi(), path=None)
+    monkeypatch.setattr(main, "sale_resolver", resolver)
+    monkeypatch.setattr(
+        main,
+        "on_sale_catalog",
+        OnSaleCatalog(FailingApi(), path=None, resolver=resolver),
+    )
+    monkeypatch.setattr(
+        main.sales_registry, "current", LoadedSales(sales, version="v1")
+    )
+
+    first = _get("/products/on-sale")
+    second = _get("/products/on-sale")
+    status = _get("/status/on-sale").json()
+
+    assert searches == ["Tine Helmelk"]
+    assert first.status_code == second.status_code == 503
+    assert "All 1 sale item lookups failed" in second.json()["detail"]
+    assert status["retry_at"] > status["failed_at"]
+    assert resolver.status()["last_error"] == "All 1 sale item lookups failed"
+
+
+def test_on_sale_products_are_empty_without_sales(monkeypatch):
+    async def get_products(**kwargs):
+        raise AssertionError("Nothing is searched without sales")
+
+    api = SimpleNamespace(get_products=get_products)
+    resolver = SaleResolver(api, path=None)
+    monkeypatch.setattr(main, "sale_resolver", resolver)
+    monkeypatch.setattr(
+        main, "on_sale_catalog", OnSaleCatalog(api, path=None, resolver=resolver)
+    )
+    # An empty sales store, or a failed first load
+    monkeypatch.setattr(main.sales_registry, "current", LoadedSales())
+
+    response = _get("/products/on-sale")
+
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+    assert response.json()["meta"]["total"] == 0
+
+
+def test_importing_main_writes_no_files(tmp_path):
+    backend_dir = Path(main.__file__).resolve().parent
+    env = {**os.environ, "PYTHONPATH": str(backend_dir)}
+    subprocess.run(
+        [sys.executable, "-c", "import main"], cwd=tmp_path, env=env, check=True
+    )
+    # The price history database is only opened in the lifespan
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,139 @@
+import asyncio
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.on_sale_catalog import OnSaleCatalog
+from src.sale_matcher import SaleMatcher
+from src.sale_resolution import SaleResolver
+from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+from tests.kassal.fake_kassal_server import FakeKassalServer
+
+
+def _sales(*names: str, vendor: str = "meny-no") -> list:
+    items = [SalesItem(name=name, sale=Sale(type="price", price=10)) for name in names]
+    return [ProductSales(products=SalesCatalog(products=items), vendor=vendor)]
+
+
+PRODUCTS = {
+    1: "Tine Melk",
+    2: "Grandiosa",
+    3: "Pepsi Max",
+    4: "Tine Smør",
+    5: "Norvegia",
+}
+
+
+def test_builds_once_per_version_in_stable_order(tmp_path):
+    sales = _sales("pepsi", "tine", "grandiosa", "pepsi", "ukjent")
+
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            catalog = OnSaleCatalog(api, path=tmp_path / "on_sale.json", concurrency=2)
+            matcher = SaleMatcher.from_sales(sales)
+            await catalog.ensure(sales, matcher, "v1")
+            requests_after_build = len(server.requests)
+            assert catalog.ensure(sales, matcher, "v1") is None
+
+            reloaded = OnSaleCatalog(api, path=tmp_path / "on_sale.json")
+            assert not reloaded.load("v2")
+            assert reloaded.load("v1")
+            return catalog, reloaded, requests_after_build
+
+    with FakeKassalServer(products=PRODUCTS) as server:
+        catalog, reloaded, requests_after_build = asyncio.run(run(server))
+
+    # One search per distinct sale name, none repeated for the same version
+    assert requests_after_build == 4
+    assert len(server.requests) == 4
+    assert [p.name for p in catalog.products] == ["Pepsi Max", "Tine Melk", "Grandiosa"]
+    assert all(p.sale is not None for p in catalog.products)
+    assert [p.id for p in reloaded.products] == [3, 1, 2]
+
+    first, total = catalog.page(1, 2)
+    second, _ = catalog.page(2, 2)
+    assert total == 3
+    assert [p.id for p in first + second] == [3, 1, 2]
+    assert catalog.page(3, 2) == ([], 3)
+    assert catalog.status()["searched"] == 4
+
+
+def test_serves_previous_list_while_rebuilding_and_skips_failed_builds():
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None, max_retries=0
+        ) as api:
+            catalog = OnSaleCatalog(api, path=None)
+            await catalog.ensure(_sales("melk"), SaleMatcher([]), "v1")
+
+            task = catalog.ensure(_sales("melk", "norvegia"), SaleMatcher([]), "v2")
+            during = (catalog.version, [p.id for p in catalog.products])
+            await task
+
+            server.fail_next(500, count=1)
+            await catalog.ensure(_sales("pepsi"), SaleMatcher([]), "v3")
+            return catalog, during
+
+    with FakeKassalServer(products=PRODUCTS) as server:
+        catalog, during = asyncio.run(run(server))
+
+    assert during == ("v1", [1])
+    assert catalog.version == "v2"
+    assert [p.id for p in catalog.products] == [1, 5]
+    assert catalog.last_error == "All 1 product lookups failed"
+
+
+def test_lists_the_products_sales_were_resolved_to():
+    products = {
+        1: ("Tine Helmelk 1l", "MENY_NO", "7001"),
+        2: ("Tine Helmelk 1l", "KIWI", "7002"),
+        3: ("Grandiosa Original", "MENY_NO", "7003"),
+    }
+    # Holdbart is not on Kassal, so its items are still found by name
+    sales = _sales("Tine Helmelk", vendor="kiwi-no") + _sales(
+        "Grandiosa", vendor="holdbart-no"
+    )
+
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            resolver = SaleResolver(api, path=None)
+            catalog = OnSaleCatalog(api, path=None, resolver=resolver)
+            await catalog.ensure(sales, SaleMatcher.from_sales(sales), "v1")
+            return catalog
+
+    with FakeKassalServer(products=products) as server:
+        catalog = asyncio.run(run(server))
+
+    # Meny's milk, the first search result, does not get Kiwi's milk sale
+    assert [p.id for p in catalog.products] == [2, 3]
+    assert all(p.sale is not None for p in catalog.products)
+
+
+def test_failed_builds_are_retried_after_a_cooldown():
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None, max_retries=0
+        ) as api:
+            catalog = OnSaleCatalog(api, path=None, retry_after=60)
+            server.fail_next(500, count=1)
+            await catalog.ensure(_sales("melk"), SaleMatcher([]), "v1")
+            requests_after_failure = len(server.requests)
+            # Requests for the same version do not start another build
+            assert catalog.ensure(_sales("melk"), SaleMatcher([]), "v1") is None
+            status = catalog.status()
+
+            catalog.retry_after = 0
+            await catalog.ensure(_sales("melk"), SaleMatcher([]), "v1")
+            return catalog, status, requests_after_failure
+
+    with FakeKassalServer(products=PRODUCTS) as server:
+        catalog, status, requests_after_failure = asyncio.run(run(server))
+
+    assert requests_after_failure == 1
+    assert not status["ready"]
+    assert status["last_error"] == "All 1 product lookups failed"
+    assert status["retry_at"] == status["failed_at"] + 60
+    assert catalog.ready and [p.id for p in catalog.products] == [1]
+    assert catalog.status()["last_error"] is None
@@ -0,0 +1,68 @@
+import random
+
+from src.sale_matcher import SaleMatcher
+from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+
+
+def _sale(price: float) -> Sale:
+    return Sale(type="price", price=price)
+
+
+def _naive_first_match(entries, product_name):
+    """The substring scan SaleMatcher replaces."""
+    sale_map = {}
+    for name, sale in entries:
+        sale_map[name.lower()] = sale
+    for sale_name, sale in sale_map.items():
+        if sale_name in product_name.lower():
+            return sale
+    return None
+
+
+def test_first_match_agrees_with_substring_scan():
+    rng = random.Random(7)
+    alphabet = "abcø "
+    entries = [
+        ("".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))), _sale(i))
+        for i in range(60)
+    ]
+    matcher = SaleMatcher(entries)
+
+    for _ in range(500):
+        name = "".join(rng.choice(alphabet + "AB") for _ in range(rng.randint(0, 20)))
+        assert matcher.match(name) is _naive_first_match(entries, name)
+
+
+def test_duplicate_names_keep_first_position_and_last_sale():
+    entries = [("pepsi", _sale(1)), ("pepsi max", _sale(2)), ("Pepsi", _sale(3))]
+    matcher = SaleMatcher(entries)
+
+    assert len(matcher) == 2
+    assert matcher.match("PEPSI MAX 1,5l").price == 3
+
+
+def test_longest_match_prefers_longest_then_earliest():
+    entries = [("melk", _sale(1)), ("lettmelk", _sale(2)), ("tine", _sale(3))]
+    matcher = SaleMatcher(entries, longest_match=True)
+
+    assert matcher.match("Tine Lettmelk 1l").price == 2
+    assert matcher.match("Tine Melk").price == 1
+    assert SaleMatcher(entries).match("Tine Lettmelk 1l").price == 1
+    assert matcher.match("Brus") is None
+
+
+def test_from_sales_flattens_all_vendors():
+    sales = [
+        ProductSales(
+            products=SalesCatalog(products=[SalesItem(name="Red Bull", sale=_sale(64.9))]),
+            vendor="kiwi-no",
+        ),
+        ProductSales(
+            products=SalesCatalog(products=[SalesItem(name="Grandiosa", sale=_sale(50))]),
+            vendor="meny-no",
+        ),
+    ]
+    matcher = SaleMatcher.from_sales(sales)
+
+    assert matcher.match("Grandiosa Original 575g").price == 50
+    assert matcher.match("Red Bull Regular 250ml").price == 64.9
@@ -0,0 +1,158 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.kassal.async_kassal_service import AsyncKassalAPI
+from src.kassal.models_products import Product
+from src.kassal.models_products_ean import ProductsByEanData
+from src.sale_resolution import (
+    SaleIndex,
+    SaleResolution,
+    SaleResolver,
+    resolve_sale_item,
+)
+from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+from tests.kassal.fake_kassal_server import FakeKassalServer, ean_json, product_json
+
+PRODUCTS = {
+    1: ("Tine Helmelk 1l", "KIWI", "7001"),
+    2: ("Tine Helmelk 1l", "MENY_NO", "7001"),
+    3: ("Grandiosa Original", "MENY_NO", "7003"),
+    4: ("Grandiosa Pepperoni", "MENY_NO", "7004"),
+    5: ("Pepsi Max 1,5l", "MENY_NO", "7005"),
+    # Not found by searching for "Pepsi Max", only through the EAN
+    6: ("Pepsi-Max flaske 1,5l", "KIWI", "7005"),
+}
+
+
+def _sales(vendor: str, *names: str) -> ProductSales:
+    items = [
+        SalesItem(name=name, sale=Sale(type="price", price=float(len(name))))
+        for name in names
+    ]
+    return ProductSales(products=SalesCatalog(products=items), vendor=vendor)
+
+
+SALES = [
+    _sales("kiwi-no", "Tine Helmelk", "Pepsi Max", "Kvikk Lunsj"),
+    _sales("meny-no", "Grandiosa", "grandiosa"),
+    _sales("holdbart-no", "Tine Helmelk"),
+]
+
+
+def test_resolves_sales_to_the_vendors_own_products(tmp_path):
+    async def run(server):
+        async with AsyncKassalAPI(
+            token="dummy", base_url=server.base_url, rate_limit=None
+        ) as api:
+            resolver = SaleResolver(api, path=tmp_path / "sale_index.json")
+            assert not resolver.ready
+            await resolver.ensure(SALES, "v1")
+
+            reloaded = SaleResolver(api, path=tmp_path / "sale_index.json")
+            assert not reloaded.load("v2")
+            assert reloaded.load("v1")
+            products = [await api.get_product_by_id(pid) for pid in PRODUCTS]
+            return resolver, reloaded, products
+
+    with FakeKassalServer(products=PRODUCTS) as server:
+        resolver, reloaded, products = asyncio.run(run(server))
+
+    matches = {p.id: resolver.index.match(p) for p in products}
+    sales = {pid: sale for pid, sale in matches.items() if sale is not None}
+    # The KIWI milk sale is not attached to Meny's listing of the same milk, and
+    # both Grandiosa variants at Meny get the Grandiosa sale. Holdbart is not on
+    # Kassal, so its milk sale is attached by name to the listings without one.
+    assert sorted(sales) == [1, 2, 3, 4, 6]
+    assert sales[2] is SALES[2].products.products[0].sale
+    assert sales[1].price == len("Tine Helmelk")
+    assert sales[6].price == len("Pepsi Max")
+    assert reloaded.index.by_id == resolver.index.by_id
+
+    status = resolver.status()
+    assert status["items"] == 5
+    assert status["resolved"] == 3
+    assert status["ambiguous"] == 1
+    assert status["by_method"] == {"search": 2, "ean": 1}
+    assert status["unresolved"] == {"no_match": 1, "unknown_vendor": 1}
+    assert status["vendors"]["kiwi-no"] == {
+        "items": 3,
+        "resolved": 2,
+        "match_rate": 2 / 3,
+    }
+
+
+def test_sales_of_vendors_without_a_store_code_are_matched_by_name():
+    kiwi_sale = Sale(type="price", price=20.0)
+    holdbart_sale = Sale(type="percentage", percentage=30.0)
+    resolutions = [
+        SaleResolution(
+            vendor="kiwi-no",
+            store="KIWI",
+            name="Kvikk Lunsj",
+            sale=kiwi_sale,
+            product_ids=[1],
+        ),
+        SaleResolution(
+            vendor="holdbart-no",
+            store=None,
+            name="Kvikk Lunsj",
+            sale=holdbart_sale,
+            reason="unknown_vendor",
+        ),
+        SaleResolution(
+            vendor="kiwi-no",
+            store="KIWI",
+            name="Smash",
+            sale=kiwi_sale,
+            reason="no_match",
+        ),
+    ]
+    index = SaleIndex(resolutions)
+    products = [
+        Product.model_validate(product_json(1, "Kvikk Lunsj 47g", "KIWI")),
+        Product.model_validate(product_json(2, "Kvikk Lunsj 47g", "MENY_NO")),
+        Product.model_validate(product_json(3, "Smash Salt 100g", "KIWI")),
+    ]
+    index.enrich(products)
+
+    # The vendor's own resolved sale wins over the name match
+    assert [p.sale for p in products] == [kiwi_sale, holdbart_sale, None]
+
+
+def test_listings_without_a_store_are_skipped():
+    listings = [product_json(6, "Pepsi Max 1,5l", "KIWI", "7005")]
+    listings.insert(0, {**product_json(5, "Pepsi Max 1,5l", ean="7005"), "store": None})
+    other_store = Product.model_validate(product_json(7, "Pepsi Max 1,5l", ean="7005"))
+
+    async def get_products(search, size):
+        return SimpleNamespace(data=[other_store])
+
+    async def get_product_by_ean(ean):
+        return ProductsByEanData.model_validate(ean_json(ean, listings))
+
+    api = SimpleNamespace(
+        get_products=get_products, get_product_by_ean=get_product_by_ean
+    )
+    sale = Sale(type="price", price=25.0)
+    resolution = asyncio.run(resolve_sale_item(api, "kiwi-no", "Pepsi Max", sale))
+
+    assert resolution.product_ids == [6]
+    assert resolution.method == "ean"
+
+
+def test_no_sales_version_gives_an_empty_index_without_building():
+    async def get_products(**kwargs):
+        raise AssertionError("Nothing is resolved without sales")
+
+    async def run():
+        resolver = SaleResolver(SimpleNamespace(get_products=get_products), path=None)
+        # An empty sales store or a failed first load has no version
+        assert resolver.ensure([], None) is None
+        index = await resolver.index_for([], None)
+        resolver._fail("v1", "Kassal is down")
+        assert resolver.ensure([], None) is None
+        return resolver, index
+
+    resolver, index = asyncio.run(run())
+    assert resolver.ready and resolver.version is None
+    assert len(index) == 0 and len(index.by_name) == 0
@@ -0,0 +1,57 @@
+import asyncio
+
+from src.sales_registry import SalesRegistry
+from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+
+
+def _sales(*names: str) -> list:
+    return [
+        ProductSales(
+            vendor="kiwi",
+            products=SalesCatalog(
+                products=[
+                    SalesItem(name=name, sale=Sale(type="price", price=9.9))
+                    for name in names
+                ]
+            ),
+        )
+    ]
+
+
+def test_watcher_swaps_in_new_snapshots_and_keeps_the_last_good_one():
+    snapshot = {"version": "v1", "sales": _sales("Melk")}
+
+    def loader():
+        if snapshot["sales"] is None:
+            raise ValueError("corrupt snapshot")
+        return snapshot["sales"]
+
+    registry = SalesRegistry(loader, lambda: snapshot["version"], check_interval=0.01)
+    swapped = []
+    registry.on_reload(lambda loaded: swapped.append(loaded.version))
+
+    async def run():
+        assert await registry.refresh()
+        assert not await registry.refresh()  # Unchanged version, nothing to load
+        first = registry.current
+        registry.start()
+
+        snapshot.update(version="v2", sales=None)
+        await asyncio.sleep(0.05)
+        assert registry.current is first
+        assert registry.status()["last_error"] == "corrupt snapshot"
+
+        snapshot.update(sales=_sales("Ost", "Brød"))
+        await asyncio.sleep(0.05)
+        await registry.close()
+        return first
+
+    first = asyncio.run(run())
+    assert swapped == ["v1", "v2"]
+    assert first.matcher.names == ["melk"]
+    status = registry.status()
+    assert status["version"] == "v2"
+    assert status["items"] == 2
+    assert status["last_error"] is None
+    assert not status["watching"]
+    assert registry.current.matcher.names == ["ost", "brød"]
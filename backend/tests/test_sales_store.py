@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from src.sales_service import ProductSales, SalesCatalog, SalesItem, Sale
+from src.sales_store import SalesStore
+
+
+def _page(vendor: str, *names: str) -> ProductSales:
+    return ProductSales(
+        vendor=vendor,
+        products=SalesCatalog(
+            products=[
+                SalesItem(name=name, sale=Sale(type="price", price=10.0))
+                for name in names
+            ]
+        ),
+    )
+
+
+def test_upserting_a_vendor_leaves_the_others_and_keeps_snapshots(tmp_path):
+    store = SalesStore(tmp_path / "sales.sqlite3")
+    assert store.version() is None
+    store.upsert([_page("kiwi", "Melk"), _page("meny", "Ost"), _page("kiwi", "Brød")])
+    first_version = store.version()
+    kiwi_first = store.vendors()[0]["snapshot"]
+
+    store.upsert_vendor("kiwi", [_page("kiwi", "Egg", "Smør")])
+    assert store.version() != first_version
+    # kiwi keeps its position before meny, and meny is unchanged
+    names = [item.name for ps in store.iter_sales() for item in ps.products.products]
+    assert names == ["Egg", "Smør", "Ost"]
+    assert [v["vendor"] for v in store.vendors()] == ["kiwi", "meny"]
+
+    store.rollback("kiwi", kiwi_first)
+    assert store.version() == first_version
+    pages = list(store.iter_sales())
+    assert [item.name for item in pages[1].products.products] == ["Brød"]
+
+    # The current snapshot survives pruning even when it is not the newest
+    assert store.prune(keep=1) == 0
+    assert store.prune(keep=0) == 1
+    assert store.version() == first_version
+    store.close()
+
+
+def test_import_json_reads_the_legacy_file(tmp_path):
+    legacy = tmp_path / "sales_data.json"
+    pages = [_page("joker", "Kaffe"), _page("bunnpris", "Te")]
+    legacy.write_text(
+        json.dumps([json.loads(ps.model_dump_json()) for ps in pages]),
+        encoding="utf-8",
+    )
+    store = SalesStore(tmp_path / "sales.sqlite3")
+    assert store.is_empty()
+    assert store.import_json(legacy) == 2
+    assert list(store.iter_sales()) == pages
+
+
+def test_pages_are_validated_on_write_and_streamed(tmp_path):
+    store = SalesStore(tmp_path / "sales.sqlite3")
+    invalid = ProductSales.model_construct(
+        vendor="kiwi",
+        products=SalesCatalog.model_construct(
+            products=[
+                SalesItem.model_construct(
+                    name="Melk", sale=Sale.model_construct(type="gratis")
+                )
+            ]
+        ),
+    )
+    with pytest.raises(ValidationError):
+        store.upsert_vendor("kiwi", [invalid])
+    assert store.is_empty()
+
+    pages = [_page("kiwi", "Melk", "Brød"), _page("kiwi", "Ost")]
+    store.upsert_vendor("kiwi", pages)
+    stream = store.iter_sales()
+    assert next(stream) == pages[0]
+    assert list(stream) == pages[1:]
+    assert list(store.iter_sales(raw=True)) == [ps.model_dump() for ps in pages]
+    store.close()